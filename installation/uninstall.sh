@@ -24,7 +24,7 @@ echo -n "Running daemon-reload..."
 sudo systemctl daemon-reload && echo -e "   ${GREEN}[ OK ]${NC}" || echo -e "   ${RED}[ FAILED ]${NC}"
 
 echo -n "Removing config and cash files..."
-rm -f ~/.speaker/config.json ~/.speaker/speech.cash >/dev/null && echo -e "   ${GREEN}[ OK ]${NC}" || echo -e "   ${RED}[ FAILED ]${NC}"
+rm -rf ~/.speaker/config.json ~/.speaker/speech.cash ~/.speaker/speech_cash >/dev/null && echo -e "   ${GREEN}[ OK ]${NC}" || echo -e "   ${RED}[ FAILED ]${NC}"
 
 echo -e "${GREEN}Done!${NC} Heytelepat-speaker successfully uninstalled. Don't forget to remove \`heytelepat-speaker\` directory."
 
@@ -0,0 +1,303 @@
+"""
+Persistent audio output, one PortAudio stream plays queue of PCM buffers back to back.
+"""
+
+import asyncio
+import logging
+import queue
+import threading
+from concurrent.futures import Future
+
+import pyaudio
+
+
+def _buffer_chunks(audio_data, chunk_size):
+    """Slices of buffer without copying it
+
+    :param bytes | memoryview audio_data: PCM data
+    :param integer chunk_size: Size of one chunk in bytes
+    :rtype: Iterator[memoryview]
+    """
+
+    view = memoryview(audio_data).cast('B').toreadonly()
+    for i in range(0, len(view), chunk_size):
+        yield view[i:i + chunk_size]
+
+
+class AudioOutput:
+    """Plays PCM buffers through one long-lived output stream.
+
+    Buffers are queued and played by background thread one after another without reopening device,
+    so consecutive phrases have no gap between them. Every queued buffer has a future which is resolved
+    when it is played, result is `True` if playback was interrupted.
+    """
+
+    SAMPLE_WIDTH = 2
+
+    def __init__(self, sample_rate=16000, num_channels=1, chunk_size=4000, interrupt_function=None, idle_timeout=5):
+        """
+        :param integer sample_rate: Default sampling frequency of played audio, default `16000`
+        :param integer num_channels: Default count of channels in audio, default `1`
+        :param integer chunk_size: Size of one written chunk in bytes, default `4000`
+        :param function | None interrupt_function: Function returns `True` if playback must be interrupted,
+            e.g. button is pressed, checked before every chunk, default `None`
+        :param integer | float idle_timeout: Seconds without audio after which stream is stopped, PortAudio
+            is kept open, default `5`
+        :return: __init__ should return None
+        :rtype: None
+        """
+
+        self.sample_rate = sample_rate
+        self.num_channels = num_channels
+        self.chunk_size = chunk_size - chunk_size % self.SAMPLE_WIDTH
+        self.interrupt_function = interrupt_function
+        self.idle_timeout = idle_timeout
+
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._generation = 0
+        """Incremented by `.interrupt()`, items queued with older generation are dropped"""
+        self._current = None
+        self._stop_current = False
+
+        self._pyaudio = None
+        self._stream = None
+        self._stream_format = None
+
+    def _open_stream(self, sample_rate, num_channels):
+        """Start output stream with given format, stream is reopened only if format changes."""
+
+        if self._stream is not None and self._stream_format == (sample_rate, num_channels):
+            if self._stream.is_stopped():
+                self._stream.start_stream()
+            return
+
+        self._close_stream()
+        if self._pyaudio is None:
+            self._pyaudio = pyaudio.PyAudio()
+        logging.debug("Opening audio output stream {} Hz, {} channels".format(sample_rate, num_channels))
+        self._stream = self._pyaudio.open(
+            format=pyaudio.paInt16,
+            channels=num_channels,
+            rate=sample_rate,
+            output=True,
+            frames_per_buffer=self.chunk_size
+        )
+        self._stream_format = (sample_rate, num_channels)
+
+    def _close_stream(self):
+        if self._stream is not None:
+            self._stream.stop_stream()
+            self._stream.close()
+            self._stream = None
+            self._stream_format = None
+
+    def _must_stop(self, generation):
+        return self._stop_current or generation != self._generation or (
+                self.interrupt_function is not None and self.interrupt_function())
+
+    def _play_item(self, chunks, sample_rate, num_channels, generation):
+        """
+        Write chunks to stream
+
+        :return: True if playback was interrupted
+        :rtype: bool
+        """
+
+        if generation != self._generation:
+            return True
+
+        self._open_stream(sample_rate, num_channels)
+        for chunk in chunks:
+            if self._must_stop(generation):
+                if generation == self._generation and not self._stop_current:
+                    # Interrupted by button, everything queued after is dropped too
+                    self.interrupt()
+                return True
+            self._stream.write(chunk)
+        return False
+
+    def _worker(self):
+        """Background thread plays queued items."""
+
+        while True:
+            try:
+                item = self._queue.get(timeout=self.idle_timeout)
+            except queue.Empty:
+                if self._stream is not None and self._stream.is_active():
+                    logging.debug("Audio output is idle, stopping stream")
+                    self._stream.stop_stream()
+                continue
+
+            if item is None:
+                break
+
+            future, chunks, sample_rate, num_channels, generation = item
+            if not future.set_running_or_notify_cancel():
+                continue
+
+            with self._lock:
+                self._current = future
+                self._stop_current = False
+            try:
+                interrupted = self._play_item(chunks, sample_rate, num_channels, generation)
+            except Exception as e:
+                logging.error("Audio output error: {}".format(e))
+                self._close_stream()
+                future.set_exception(e)
+            else:
+                future.set_result(interrupted)
+            finally:
+                with self._lock:
+                    self._current = None
+
+        self._close_stream()
+        if self._pyaudio is not None:
+            self._pyaudio.terminate()
+            self._pyaudio = None
+
+    def _enqueue(self, chunks, sample_rate, num_channels):
+        future = Future()
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._worker, daemon=True)
+                self._thread.start()
+            self._queue.put((
+                future, chunks, sample_rate or self.sample_rate, num_channels or self.num_channels, self._generation
+            ))
+        return future
+
+    def enqueue(self, audio_data, num_channels=None, sample_rate=None):
+        """
+        Queue PCM buffer to play after everything queued before, buffer is not copied
+
+        :param bytes | memoryview audio_data: PCM data
+        :param integer | None num_channels: Count of channels in audio, default is output's
+        :param integer | None sample_rate: The sampling frequency of audio, default is output's
+        :return: Future resolved with `True` if playback was interrupted or `False` when buffer is played
+        :rtype: concurrent.futures.Future
+        """
+        return self._enqueue(_buffer_chunks(audio_data, self.chunk_size), sample_rate, num_channels)
+
+    def enqueue_stream(self, audio_chunks, num_channels=None, sample_rate=None):
+        """
+        Queue iterator of PCM chunks, that is read while it is played
+
+        :param Iterator[bytes] audio_chunks: Iterator yields PCM data
+        :param integer | None num_channels: Count of channels in audio, default is output's
+        :param integer | None sample_rate: The sampling frequency of audio, default is output's
+        :return: Future resolved with `True` if playback was interrupted or `False` when stream is played
+        :rtype: concurrent.futures.Future
+        """
+        return self._enqueue(audio_chunks, sample_rate, num_channels)
+
+    def play(self, audio_data, num_channels=None, sample_rate=None, **kwargs):
+        """
+        Play audio and wait until it is played, can be used as `play_audio_function`
+
+        :param bytes | memoryview audio_data: PCM data
+        :param integer | None num_channels: Count of channels in audio, default is output's
+        :param integer | None sample_rate: The sampling frequency of audio, default is output's
+        :return: True if playback was interrupted
+        :rtype: bool
+        """
+        return self.enqueue(audio_data, num_channels, sample_rate).result()
+
+    def play_stream(self, audio_chunks, num_channels=None, sample_rate=None, **kwargs):
+        """
+        Play audio while it is received and wait until it is played, can be used as `play_audio_stream_function`
+
+        :param Iterator[bytes] audio_chunks: Iterator yields PCM data
+        :param integer | None num_channels: Count of channels in audio, default is output's
+        :param integer | None sample_rate: The sampling frequency of audio, default is output's
+        :return: True if playback was interrupted
+        :rtype: bool
+        """
+        return self.enqueue_stream(audio_chunks, num_channels, sample_rate).result()
+
+    async def wait(self, future):
+        """
+        Await future returned by `.enqueue()`, if awaiting task is cancelled playback stops
+
+        :param concurrent.futures.Future future: Future returned by `.enqueue()`
+        :return: True if playback was interrupted
+        :rtype: bool
+        """
+        try:
+            return await asyncio.wrap_future(future)
+        except asyncio.CancelledError:
+            self.cancel(future)
+            raise
+
+    async def play_async(self, audio_data, num_channels=None, sample_rate=None):
+        """
+        Play audio and await until it is played, if task is cancelled playback stops
+
+        :param bytes | memoryview audio_data: PCM data
+        :param integer | None num_channels: Count of channels in audio, default is output's
+        :param integer | None sample_rate: The sampling frequency of audio, default is output's
+        :return: True if playback was interrupted
+        :rtype: bool
+        """
+        return await self.wait(self.enqueue(audio_data, num_channels, sample_rate))
+
+    async def play_stream_async(self, audio_chunks, num_channels=None, sample_rate=None):
+        """
+        Play audio while it is received and await until it is played, if task is cancelled playback stops
+
+        :param Iterator[bytes] audio_chunks: Iterator yields PCM data
+        :param integer | None num_channels: Count of channels in audio, default is output's
+        :param integer | None sample_rate: The sampling frequency of audio, default is output's
+        :return: True if playback was interrupted
+        :rtype: bool
+        """
+        return await self.wait(self.enqueue_stream(audio_chunks, num_channels, sample_rate))
+
+    def cancel(self, future):
+        """
+        Stop playing buffer of given future or remove it from queue
+
+        :param concurrent.futures.Future future: Future returned by `.enqueue()`
+        :rtype: None
+        """
+        with self._lock:
+            if not future.cancel() and self._current is future:
+                self._stop_current = True
+
+    def interrupt(self):
+        """Stop current playback immediately and drop everything queued."""
+
+        with self._lock:
+            self._generation += 1
+            self._stop_current = True
+
+    def barge_in(self):
+        """
+        Interrupt playback if something is playing, can be used as `core.button.ButtonService` press callback
+
+        :return: True if playback was interrupted
+        :rtype: bool
+        """
+        if not self.is_playing():
+            return False
+        logging.info("Playback interrupted by user")
+        self.interrupt()
+        return True
+
+    def is_playing(self):
+        """
+        :return: True if something is playing or queued
+        :rtype: bool
+        """
+        return self._current is not None or not self._queue.empty()
+
+    def close(self):
+        """Stop playback, and close stream and PortAudio."""
+
+        self.interrupt()
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._queue.put(None)
+            thread.join()
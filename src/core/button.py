@@ -0,0 +1,199 @@
+"""
+Button on GPIO pin handled with edge interrupts instead of polling. Presses are debounced and classified into
+gestures, that are delivered to asyncio.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+
+try:
+    import RPi.GPIO as GPIO
+except ImportError:
+    logging.warning("RPi.GPIO is not available, button is disabled")
+
+
+class ButtonService:
+    """Recognizes button gestures from GPIO edges.
+
+    `PRESS` is delivered immediately when button is pressed. After button is released, presses that follow
+    each other within `multi_press_gap` are counted and delivered as `SHORT`, `DOUBLE` or `TRIPLE`,
+    held button is delivered as `LONG` after release.
+    """
+
+    PRESS = 'press'
+    SHORT = 'short'
+    LONG = 'long'
+    DOUBLE = 'double'
+    TRIPLE = 'triple'
+
+    def __init__(self, gpio_pin=17, debounce=0.03, long_press=0.8, multi_press_gap=0.4):
+        """
+        :param integer gpio_pin: Pin which button connected to, default `17`
+        :param float debounce: Seconds edges are ignored after state change, default `0.03`
+        :param float long_press: Seconds button must be held for long press, default `0.8`
+        :param float multi_press_gap: Maximum seconds between presses of double and triple press, default `0.4`
+        :return: __init__ should return None
+        :rtype: None
+        """
+
+        self.gpio_pin = gpio_pin
+        self.debounce = debounce
+        self.long_press = long_press
+        self.multi_press_gap = multi_press_gap
+
+        self.pressed = False
+        """Current debounced state of button"""
+
+        self._started = False
+        self._lock = threading.Lock()
+        self._waiters = []
+        self._press_callbacks = []
+        self._last_change = None
+        self._press_time = None
+        self._first_press_time = None
+        self._presses = 0
+        self._consumed = False
+        self._timer = None
+
+    def start(self):
+        """Setup pin and start edge detection, does nothing if it is already started."""
+
+        if self._started:
+            return
+        GPIO.setmode(GPIO.BCM)
+        GPIO.setup(self.gpio_pin, GPIO.IN, GPIO.PUD_UP)
+        GPIO.add_event_detect(self.gpio_pin, GPIO.BOTH, callback=self._edge)
+        self._started = True
+        logging.info("Started button service on pin {}".format(self.gpio_pin))
+
+    def close(self):
+        """Stop edge detection."""
+
+        if self._started:
+            GPIO.remove_event_detect(self.gpio_pin)
+            self._started = False
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+
+    def add_press_callback(self, callback):
+        """
+        Call function in GPIO thread as soon as button is pressed. If function returns `True` press is consumed,
+        its gesture is not delivered, e.g. press that stopped playback.
+
+        :param function callback: Function without arguments
+        :rtype: None
+        """
+
+        self._press_callbacks.append(callback)
+
+    def remove_press_callback(self, callback):
+        """
+        Remove function added with `.add_press_callback()`
+
+        :param function callback: Added function
+        :rtype: None
+        """
+
+        if callback in self._press_callbacks:
+            self._press_callbacks.remove(callback)
+
+    def _edge(self, _):
+        """GPIO thread callback on both edges."""
+
+        self._handle(GPIO.input(self.gpio_pin) == GPIO.LOW, time.monotonic())
+
+    def _handle(self, pressed, now):
+        """
+        Update state on edge
+
+        :param bool pressed: True if button is pressed after edge
+        :param float now: `time.monotonic()` of edge
+        :rtype: None
+        """
+
+        with self._lock:
+            if pressed == self.pressed:
+                return
+            if self._last_change is not None and now - self._last_change < self.debounce:
+                return
+            self._last_change = now
+            self.pressed = pressed
+
+            if pressed:
+                if self._timer is not None:
+                    self._timer.cancel()
+                    self._timer = None
+                if self._presses == 0:
+                    self._first_press_time = now
+                    self._consumed = False
+                self._press_time = now
+            else:
+                if now - self._press_time >= self.long_press:
+                    gesture = self.LONG if self._presses == 0 else None
+                    self._presses = 0
+                    if gesture is not None and not self._consumed:
+                        self._emit(gesture, self._first_press_time)
+                    return
+                self._presses += 1
+                self._timer = threading.Timer(self.multi_press_gap, self._finish_presses)
+                self._timer.daemon = True
+                self._timer.start()
+
+        if not pressed:
+            return
+        consumed = any([callback() for callback in self._press_callbacks])
+        with self._lock:
+            if consumed:
+                self._consumed = True
+            elif self._presses == 0:
+                self._emit(self.PRESS, now)
+
+    def _finish_presses(self):
+        """Timer thread delivers gesture when no more presses follow."""
+
+        with self._lock:
+            if self.pressed or self._presses == 0:
+                return
+            count, self._presses, self._timer = self._presses, 0, None
+            if self._consumed:
+                return
+            gesture = {1: self.SHORT, 2: self.DOUBLE}.get(count, self.TRIPLE)
+            self._emit(gesture, self._first_press_time)
+
+    def _emit(self, gesture, timestamp):
+        """Resolve futures of coroutines awaiting gesture, called with lock held."""
+
+        logging.debug("Button gesture '{}'".format(gesture))
+        waiters = [w for w in self._waiters if gesture in w[2]]
+        self._waiters = [w for w in self._waiters if gesture not in w[2]]
+        for loop, future, _ in waiters:
+            loop.call_soon_threadsafe(self._set_result, future, (gesture, timestamp))
+
+    @staticmethod
+    def _set_result(future, result):
+        if not future.done():
+            future.set_result(result)
+
+    async def wait(self, gestures=(PRESS,)):
+        """
+        Await one of gestures
+
+        :param Iterable[string] gestures: Gestures to wait, default only `PRESS`
+        :return: Gesture and `time.monotonic()` when its first press started
+        :rtype: tuple[str, float]
+        """
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        waiter = (loop, future, frozenset(gestures))
+        with self._lock:
+            self._waiters.append(waiter)
+        try:
+            return await future
+        finally:
+            with self._lock:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
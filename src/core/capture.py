@@ -0,0 +1,344 @@
+"""
+Continuous microphone capture into ring buffer shared by all audio consumers: wake word, recognition and
+ggwave decoding. Device is opened once at its native rate, every subscriber gets audio resampled to its own rate
+and sample format, and can start from audio captured before it subscribed.
+"""
+
+import functools
+import logging
+import math
+import threading
+import time
+
+import numpy as np
+import pyaudio
+
+
+class RingBuffer:
+    """Fixed-size ring buffer of samples addressed by absolute position, number of samples written before."""
+
+    def __init__(self, capacity, dtype=np.int16):
+        """
+        :param integer capacity: Number of samples kept
+        :param numpy.dtype dtype: Type of samples, default `numpy.int16`
+        :return: __init__ should return None
+        :rtype: None
+        """
+
+        self.capacity = capacity
+        self.position = 0
+        """Absolute position of the next written sample"""
+
+        self._data = np.zeros(capacity, dtype=dtype)
+
+    @property
+    def oldest(self):
+        """Absolute position of the oldest sample still kept
+
+        :rtype: int
+        """
+        return max(0, self.position - self.capacity)
+
+    def write(self, samples):
+        """Append samples, overwriting the oldest ones
+
+        :param numpy.ndarray samples: Samples to write
+        :rtype: None
+        """
+
+        if samples.size > self.capacity:
+            self.position += samples.size - self.capacity
+            samples = samples[-self.capacity:]
+
+        start = self.position % self.capacity
+        first = min(samples.size, self.capacity - start)
+        self._data[start:start + first] = samples[:first]
+        self._data[:samples.size - first] = samples[first:]
+        self.position += samples.size
+
+    def view(self, start, count):
+        """
+        Samples from absolute position without copying if they are contiguous in buffer.
+        View is valid until samples are overwritten, `capacity` samples later.
+
+        :param integer start: Absolute position of the first sample
+        :param integer count: Maximum number of samples
+        :return: Samples and absolute position of the first returned sample
+        :rtype: tuple[numpy.ndarray, int]
+        """
+
+        start = max(start, self.oldest)
+        count = max(0, min(count, self.position - start))
+        offset = start % self.capacity
+        if offset + count <= self.capacity:
+            return self._data[offset:offset + count], start
+        return self.read(start, count)
+
+    def read(self, start, count):
+        """
+        Copy samples from absolute position, positions that are already overwritten are skipped
+
+        :param integer start: Absolute position of the first sample
+        :param integer count: Maximum number of samples
+        :return: Samples and absolute position of the first returned sample
+        :rtype: tuple[numpy.ndarray, int]
+        """
+
+        start = max(start, self.oldest)
+        count = max(0, min(count, self.position - start))
+        offset = start % self.capacity
+        if offset + count <= self.capacity:
+            return self._data[offset:offset + count].copy(), start
+        return np.concatenate([self._data[offset:], self._data[:offset + count - self.capacity]]), start
+
+
+@functools.lru_cache(maxsize=8)
+def lowpass_taps(ratio, taps_per_ratio=8):
+    """
+    Windowed sinc low-pass filter for decimation by `ratio`
+
+    :param float ratio: Ratio of input and output sample rates, more than 1
+    :param integer taps_per_ratio: Filter length per unit of ratio, default `8`
+    :rtype: numpy.ndarray
+    """
+
+    half = int(math.ceil(ratio * taps_per_ratio / 2))
+    n = np.arange(-half, half + 1)
+    taps = np.sinc(n / ratio) * np.hamming(n.size)
+    return (taps / taps.sum()).astype(np.float32)
+
+
+def convert_samples(samples, dtype):
+    """
+    Convert samples to 16 bit integer or 32 bit float in range [-1, 1]
+
+    :param numpy.ndarray samples: Samples in 16 bit integer range, int16 or float
+    :param numpy.dtype dtype: `numpy.int16` or `numpy.float32`
+    :rtype: numpy.ndarray
+    """
+
+    if samples.dtype == dtype:
+        return samples
+    if np.dtype(dtype) == np.float32:
+        return samples.astype(np.float32) / 32768
+    return np.clip(np.rint(samples), -32768, 32767).astype(dtype)
+
+
+class Subscription:
+    """Iterator over captured audio of one subscriber, counts audio lost because subscriber was too slow"""
+
+    def __init__(self, hub, chunks, dtype):
+        """
+        :param CaptureHub hub: Capture hub
+        :param function chunks: Function of subscription, returns iterator of samples
+        :param numpy.dtype dtype: Sample format
+        :return: __init__ should return None
+        :rtype: None
+        """
+
+        self.hub = hub
+        self.dtype = dtype
+        self.overruns = 0
+        self.lost_samples = 0
+
+        self._chunks = chunks(self)
+
+    def overrun(self, lost):
+        """Register lost audio
+
+        :param integer lost: Number of lost device samples
+        :rtype: None
+        """
+
+        self.overruns += 1
+        self.lost_samples += lost
+        self.hub.overruns += 1
+        logging.warning("Audio capture subscriber lost {} samples".format(lost))
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        return convert_samples(next(self._chunks), self.dtype)
+
+    def close(self):
+        """Stop subscription."""
+
+        self._chunks.close()
+
+
+class CaptureHub:
+    """Captures microphone audio at device native rate in background thread into ring buffer.
+
+    Input stream is opened once and shared by subscribers, each reads from its own position, so they
+    do not block each other. Audio in native format is handed out as views into ring buffer without copying.
+    """
+
+    def __init__(self, device_rate=48000, frames_per_buffer=2400, buffer_seconds=10):
+        """
+        :param integer device_rate: Native sampling frequency of input device, default `48000`
+        :param integer frames_per_buffer: Number of frames read from device at once, default `2400`
+        :param integer | float buffer_seconds: Duration of kept audio, default `10`
+        :return: __init__ should return None
+        :rtype: None
+        """
+
+        self.device_rate = device_rate
+        self.frames_per_buffer = frames_per_buffer
+        self.ring = RingBuffer(int(buffer_seconds * device_rate))
+
+        self.overruns = 0
+        """Number of times subscriber was too slow and lost audio"""
+        self.error = None
+        """Exception that stopped capture thread, subscribers raise it instead of waiting for audio"""
+
+        self._condition = threading.Condition()
+        self._last_write_time = None
+        self._thread = None
+        self._stop = threading.Event()
+
+    def start(self):
+        """Open input stream and start capture thread, does nothing if it is already running."""
+
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self.error = None
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def close(self):
+        """Stop capture thread and close input stream."""
+
+        self._stop.set()
+        with self._condition:
+            self._condition.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        """Capture thread, if capture fails error is stored and waiting subscribers are woken up."""
+
+        try:
+            self._capture()
+        except Exception as e:
+            logging.exception("Audio capture failed: {}".format(e))
+            self.error = e
+        finally:
+            with self._condition:
+                self._stop.set()
+                self._condition.notify_all()
+
+    def _capture(self):
+        """Read device and write into ring buffer until hub is closed."""
+
+        p = pyaudio.PyAudio()
+        try:
+            stream = p.open(
+                format=pyaudio.paInt16,
+                channels=1,
+                rate=self.device_rate,
+                input=True,
+                frames_per_buffer=self.frames_per_buffer
+            )
+        except Exception:
+            p.terminate()
+            raise
+        logging.info("Started audio capture with {} Hz".format(self.device_rate))
+        try:
+            while not self._stop.is_set():
+                samples = np.frombuffer(
+                    stream.read(self.frames_per_buffer, exception_on_overflow=False), dtype=np.int16)
+                with self._condition:
+                    self.ring.write(samples)
+                    self._last_write_time = time.monotonic()
+                    self._condition.notify_all()
+        finally:
+            stream.stop_stream()
+            stream.close()
+            p.terminate()
+
+    def position_at(self, timestamp=None):
+        """
+        Absolute position of sample captured at given moment
+
+        :param float | None timestamp: `time.monotonic()` timestamp, if `None` the current position
+        :rtype: int
+        """
+
+        with self._condition:
+            if timestamp is None or self._last_write_time is None:
+                return self.ring.position
+            delay = int((self._last_write_time - timestamp) * self.device_rate)
+            return max(self.ring.oldest, self.ring.position - delay)
+
+    def _wait_for(self, position):
+        """Wait until sample at absolute position is captured
+
+        :return: False if hub is closed
+        :rtype: bool
+        :raises RuntimeError: If capture thread failed
+        """
+
+        while not self._condition.wait_for(lambda: self.ring.position > position or self._stop.is_set(), timeout=1):
+            pass
+        if self.error is not None:
+            raise RuntimeError("Audio capture failed: {}".format(self.error)) from self.error
+        return not self._stop.is_set()
+
+    def _native_chunks(self, subscription, position, chunk_size):
+        while True:
+            with self._condition:
+                if not self._wait_for(position + chunk_size - 1):
+                    return
+                samples, start = self.ring.view(position, chunk_size)
+            samples.flags.writeable = False
+            if start != position:
+                subscription.overrun(start - position)
+            position = start + samples.size
+            yield samples
+
+    def _resampled_chunks(self, subscription, position, chunk_size, sample_rate):
+        """Resample with linear interpolation, low-pass filtered before if rate is decreased."""
+
+        step = self.device_rate / sample_rate
+        taps = lowpass_taps(step) if step > 1 else None
+        half = taps.size // 2 + 1 if taps is not None else 1
+        out_position = int(math.ceil(position / step))
+
+        while True:
+            x = (out_position + np.arange(chunk_size)) * step
+            first, last = int(x[0]) - half, int(math.ceil(x[-1])) + half
+            with self._condition:
+                if not self._wait_for(last):
+                    return
+                samples, start = self.ring.read(first, last - first + 1)
+            if start > max(first, 0):
+                # Lost audio, continue from the oldest available
+                subscription.overrun(start - first)
+                out_position = int(math.ceil((start + half) / step))
+                continue
+
+            data = samples.astype(np.float32)
+            if taps is not None:
+                data = np.convolve(data, taps, mode='same')
+            out_position += chunk_size
+            yield np.interp(x - start, np.arange(data.size), data)
+
+    def subscribe(self, sample_rate=None, chunk_size=4000, dtype=np.int16, since=None):
+        """
+        Captured audio in given format, blocks until more audio is captured
+
+        :param integer | None sample_rate: Sampling frequency, default is device native rate
+        :param integer chunk_size: Number of frames in yielded chunk, default `4000`
+        :param numpy.dtype dtype: Sample format `numpy.int16` or `numpy.float32`, default `numpy.int16`
+        :param float | None since: `time.monotonic()` timestamp of the first sample, if `None` starts from now
+        :return: Iterator of samples, native rate `int16` chunks are read only views into shared buffer
+        :rtype: Subscription
+        """
+
+        position = self.position_at(since)
+        if sample_rate is None or sample_rate == self.device_rate:
+            return Subscription(self, lambda s: self._native_chunks(s, position, chunk_size), dtype)
+        return Subscription(self, lambda s: self._resampled_chunks(s, position, chunk_size, sample_rate), dtype)
@@ -0,0 +1,92 @@
+"""
+Process-wide pymorphy2 analyzer. Dictionaries are loaded once, on first use or in background after boot,
+and results of word inflection are memoized for all dialogs.
+"""
+
+import functools
+import logging
+import threading
+
+import pymorphy2
+
+_analyzer = None
+_lock = threading.Lock()
+
+
+def get_analyzer():
+    """
+    Shared analyzer, dictionaries are loaded on the first call
+
+    :rtype: pymorphy2.MorphAnalyzer
+    """
+
+    global _analyzer
+    if _analyzer is None:
+        with _lock:
+            if _analyzer is None:
+                logging.info("Loading pymorphy2 dictionaries")
+                _analyzer = pymorphy2.MorphAnalyzer()
+    return _analyzer
+
+
+def load_in_background():
+    """Load dictionaries in daemon thread, so first dialog does not wait for them.
+
+    :rtype: threading.Thread
+    """
+
+    thread = threading.Thread(target=get_analyzer, daemon=True)
+    thread.start()
+    return thread
+
+
+@functools.lru_cache(maxsize=1024)
+def parse(word):
+    """
+    Cached `MorphAnalyzer.parse()`
+
+    :param string word: Word to parse
+    :return: Possible parses, the most probable first
+    :rtype: tuple[pymorphy2.analyzer.Parse]
+    """
+    return tuple(get_analyzer().parse(word))
+
+
+@functools.lru_cache(maxsize=1024)
+def inflect(word, *grammemes):
+    """
+    Inflect the most probable parse of word, e.g. `inflect('Москва', 'loct')`
+
+    :param string word: Word to inflect
+    :param string grammemes: Required grammemes
+    :return: Inflected word in lowercase, or word itself if it can not be inflected
+    :rtype: string
+    """
+
+    inflected = parse(word)[0].inflect(set(grammemes))
+    return inflected.word if inflected is not None else word
+
+
+@functools.lru_cache(maxsize=1024)
+def agree_with_number(word, number):
+    """
+    Form of word that agrees with number, e.g. `agree_with_number('градус', 5)` is 'градусов'
+
+    :param string word: Word to agree
+    :param integer number: Number
+    :return: Word in lowercase
+    :rtype: string
+    """
+
+    agreed = parse(word)[0].make_agree_with_number(number)
+    return agreed.word if agreed is not None else word
+
+
+def cache_info():
+    """
+    Statistics of memoized results
+
+    :return: `functools.lru_cache` statistics by function name
+    :rtype: dict
+    """
+    return {f.__name__: f.cache_info() for f in (parse, inflect, agree_with_number)}
@@ -0,0 +1,511 @@
+"""
+Append-only storage for synthesized phrases.
+
+PCM data is appended to segment files, and a small JSON lines index maps phrase text to
+`(segment, offset, length)`. Only the index is loaded on startup, audio is memory-mapped on lookup,
+so playback reads bytes straight from the page cache. Writers from several processes
+(e.g. `speaker.py --store_cash` run by the updater) are serialized with `flock`.
+
+Store can be limited with byte budget: unpinned phrases are evicted with LRU or LFU policy
+and segment files are compacted when evicted data takes more space than live data.
+"""
+
+import fcntl
+import json
+import logging
+import mmap
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+
+class PhraseStore:
+    """Segment files with PCM audio and an append-only index of phrases."""
+
+    INDEX_FILENAME = 'index.jsonl'
+    LOCK_FILENAME = 'store.lock'
+    STATS_FILENAME = 'stats.json'
+    SEGMENT_PREFIX = 'segment-'
+    SEGMENT_SUFFIX = '.pcm'
+    POLICIES = ('lru', 'lfu')
+
+    def __init__(self, dirname, segment_size=8 * 1024 * 1024, max_bytes=None, policy='lru', stats_save_interval=60):
+        """
+        :param string dirname: Directory where index and segment files are stored
+        :param integer segment_size: Size in bytes after which new segment file is started, default 8 MiB
+        :param integer | None max_bytes: Budget of stored audio in bytes, `None` for unlimited, default `None`
+        :param string policy: Eviction policy `lru` or `lfu`, default `lru`
+        :param integer | float stats_save_interval: Minimal interval in seconds between statistics saves, default `60`
+        :return: __init__ should return None
+        :rtype: None
+        """
+
+        if policy not in self.POLICIES:
+            raise ValueError("`policy` must be one of {}, but got '{}'".format(self.POLICIES, policy))
+
+        self.dirname = dirname
+        self.segment_size = segment_size
+        self.max_bytes = max_bytes
+        self.policy = policy
+        self.stats_save_interval = stats_save_interval
+
+        self._entries = {}
+        """Stores `{text: (segment, offset, length)}` loaded from index."""
+        self._pinned = set()
+        """Stores texts of phrases that are never evicted."""
+        self._stats = {}
+        """Stores `{text: {'hits': int, 'misses': int, 'bytes': int, 'last_used': float}}`."""
+        self._stats_saved_time = time.time()
+        self._maps = {}
+        """Stores `{segment: mmap.mmap}`, maps are never closed explicitly as views may still be played."""
+        self._index_position = 0
+        self._index_inode = None
+        self._lock = threading.RLock()
+
+        os.makedirs(self.dirname, exist_ok=True)
+        self._load_stats()
+        self.refresh()
+        logging.info("Loaded phrase store `{}` with {} phrases".format(self.dirname, len(self._entries)))
+
+    @property
+    def index_filename(self):
+        return os.path.join(self.dirname, self.INDEX_FILENAME)
+
+    @property
+    def stats_filename(self):
+        return os.path.join(self.dirname, self.STATS_FILENAME)
+
+    def _segment_filename(self, segment):
+        return os.path.join(self.dirname, '{}{:05d}{}'.format(self.SEGMENT_PREFIX, segment, self.SEGMENT_SUFFIX))
+
+    def _segments(self):
+        """
+        Numbers of segment files that exist on disk
+
+        :rtype: list[int]
+        """
+
+        segments = list()
+        for filename in os.listdir(self.dirname):
+            if filename.startswith(self.SEGMENT_PREFIX) and filename.endswith(self.SEGMENT_SUFFIX):
+                try:
+                    segments.append(int(filename[len(self.SEGMENT_PREFIX):-len(self.SEGMENT_SUFFIX)]))
+                except ValueError:
+                    continue
+        return sorted(segments)
+
+    @contextmanager
+    def _file_lock(self):
+        """Exclusive lock shared between processes that write into the store."""
+
+        with open(os.path.join(self.dirname, self.LOCK_FILENAME), 'a') as f:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+    def _apply_record(self, record):
+        """Apply one index record to in-memory entries.
+
+        :param dict record: Decoded index line
+        :rtype: None
+        """
+
+        text = record['text']
+        op = record.get('op', 'add')
+        if op == 'add':
+            self._entries[text] = (record['segment'], record['offset'], record['length'])
+            if record.get('pinned'):
+                self._pinned.add(text)
+            else:
+                self._pinned.discard(text)
+        elif op == 'pin':
+            self._pinned.add(text)
+        elif op == 'del':
+            self._entries.pop(text, None)
+            self._pinned.discard(text)
+
+    def refresh(self):
+        """Read index records appended since last refresh, reload index if it was replaced."""
+
+        with self._lock:
+            try:
+                stat = os.stat(self.index_filename)
+            except FileNotFoundError:
+                self._entries = {}
+                self._pinned = set()
+                self._index_position = 0
+                self._index_inode = None
+                return
+
+            if stat.st_ino != self._index_inode or stat.st_size < self._index_position:
+                self._entries = {}
+                self._pinned = set()
+                self._maps = {}
+                self._index_position = 0
+                self._index_inode = stat.st_ino
+
+            if stat.st_size == self._index_position:
+                return
+
+            with open(self.index_filename, 'rb') as f:
+                f.seek(self._index_position)
+                data = f.read()
+
+            # Line without trailing newline is still being written by other process
+            complete = data.rfind(b'\n') + 1
+            for line in data[:complete].splitlines():
+                if not line.strip():
+                    continue
+                try:
+                    self._apply_record(json.loads(line))
+                except (ValueError, KeyError) as e:
+                    logging.warning("Skipping broken phrase store index record: {}".format(e))
+            self._index_position += complete
+
+    def _view(self, segment, offset, length):
+        """
+        Memory-mapped view of audio data
+
+        :rtype: memoryview
+        """
+
+        m = self._maps.get(segment)
+        if m is None or len(m) < offset + length:
+            with open(self._segment_filename(segment), 'rb') as f:
+                m = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self._maps[segment] = m
+        return memoryview(m)[offset:offset + length]
+
+    def get(self, text):
+        """
+        Get audio data of phrase
+
+        :param string text: Phrase text
+        :return: Read-only view of PCM data or None if phrase is not stored
+        :rtype: memoryview | None
+        """
+
+        with self._lock:
+            view = self._get(text)
+            self._count(text, hit=view is not None)
+            return view
+
+    def _get(self, text):
+        """`.get()` without statistics counting"""
+
+        if text not in self._entries:
+            self.refresh()
+        if (entry := self._entries.get(text)) is None:
+            return
+        segment, offset, length = entry
+        if length == 0:
+            return memoryview(b'')
+        try:
+            return self._view(segment, offset, length)
+        except (FileNotFoundError, ValueError):
+            logging.warning("Phrase store segment {} is unavailable, text: '{}'".format(segment, text))
+            del self._entries[text]
+            return
+
+    def _count(self, text, hit):
+        """Update statistics of phrase lookup
+
+        :param string text: Phrase text
+        :param boolean hit: If phrase was found in store
+        :rtype: None
+        """
+
+        stats = self._stats.setdefault(text, {'hits': 0, 'misses': 0, 'bytes': 0, 'last_used': 0})
+        stats['hits' if hit else 'misses'] += 1
+        stats['last_used'] = time.time()
+        self._save_stats_if_due()
+
+    def _save_stats_if_due(self):
+        """Save statistics if `stats_save_interval` passed since last save, so frequent lookups do not
+        rewrite the file every time."""
+
+        if (time.time() - self._stats_saved_time) > self.stats_save_interval:
+            self.save_stats()
+
+    def _append_index_records(self, records):
+        """Append records to index file, caller must hold the file lock.
+
+        :param list[dict] records: Records to write
+        :rtype: None
+        """
+
+        with open(self.index_filename, 'ab') as f:
+            # Terminate line left by interrupted writer, otherwise next record is glued to it
+            if f.tell() > 0:
+                with open(self.index_filename, 'rb') as r:
+                    r.seek(-1, os.SEEK_END)
+                    if r.read(1) != b'\n':
+                        f.write(b'\n')
+            f.write(b''.join(
+                json.dumps(record, ensure_ascii=False).encode('utf-8') + b'\n' for record in records))
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _writable_segment(self):
+        """
+        Number of segment file new data should be appended to
+
+        :rtype: int
+        """
+
+        segments = self._segments()
+        if not segments:
+            return 0
+        segment = segments[-1]
+        if os.path.getsize(self._segment_filename(segment)) >= self.segment_size:
+            return segment + 1
+        return segment
+
+    def append(self, text, audio_data, pinned=False):
+        """
+        Store audio data of phrase, only new data is written to disk
+
+        :param string text: Phrase text
+        :param bytes | memoryview audio_data: PCM data
+        :param boolean pinned: If phrase must never be evicted, default `False`
+        :return: Read-only view of stored PCM data
+        :rtype: memoryview
+        """
+
+        if not isinstance(text, str):
+            raise ValueError("`text` must be str, but got {}".format(type(text)))
+
+        with self._lock:
+            if text in self._entries and (not pinned or text in self._pinned):
+                return self._get(text)
+
+        with self._lock, self._file_lock():
+            self.refresh()
+            if text in self._entries:
+                if pinned and text not in self._pinned:
+                    self._pin(text)
+                return self._get(text)
+
+            segment = self._writable_segment()
+            with open(self._segment_filename(segment), 'ab') as f:
+                offset = f.tell()
+                f.write(audio_data)
+                f.flush()
+                os.fsync(f.fileno())
+
+            self._append_index_records([
+                {'text': text, 'segment': segment, 'offset': offset, 'length': len(audio_data), 'pinned': pinned}
+            ])
+            self.refresh()
+            logging.debug("Stored phrase '{}' into segment {}".format(text, segment))
+
+            stats = self._stats.setdefault(text, {'hits': 0, 'misses': 0, 'bytes': 0, 'last_used': time.time()})
+            stats['bytes'] = len(audio_data)
+            self._evict(keep=text)
+            self._compact_if_needed()
+            self._save_stats_if_due()
+
+            return self._get(text)
+
+    def pin(self, text):
+        """
+        Mark stored phrase as never evicted
+
+        :param string text: Phrase text
+        :return: Read-only view of stored PCM data or None if phrase is not stored
+        :rtype: memoryview | None
+        """
+
+        with self._lock:
+            if text in self._entries and text in self._pinned:
+                return self._get(text)
+
+        with self._lock, self._file_lock():
+            self.refresh()
+            if text not in self._entries:
+                return
+            if text not in self._pinned:
+                self._pin(text)
+            return self._get(text)
+
+    def _pin(self, text):
+        """Append pin record of stored phrase, caller must hold the file lock."""
+
+        self._append_index_records([{'op': 'pin', 'text': text}])
+        self.refresh()
+
+    @property
+    def total_bytes(self):
+        """Size of live audio data in bytes"""
+
+        return sum(length for _, _, length in self._entries.values())
+
+    def _eviction_key(self, text):
+        stats = self._stats.get(text, {})
+        if self.policy == 'lfu':
+            return stats.get('hits', 0), stats.get('last_used', 0)
+        return stats.get('last_used', 0)
+
+    def _evict(self, keep=None):
+        """Remove unpinned phrases until store fits into `max_bytes`, caller must hold the file lock.
+
+        :param string | None keep: Text of phrase that must not be evicted, e.g. just appended, default `None`
+        """
+
+        if self.max_bytes is None or (total_bytes := self.total_bytes) <= self.max_bytes:
+            return
+
+        records = list()
+        candidates = sorted(
+            (t for t in self._entries if t not in self._pinned and t != keep), key=self._eviction_key)
+        for text in candidates:
+            if total_bytes <= self.max_bytes:
+                break
+            total_bytes -= self._entries[text][2]
+            records.append({'op': 'del', 'text': text})
+            logging.debug("Evicting phrase '{}' with policy {}".format(text, self.policy))
+
+        if total_bytes > self.max_bytes:
+            logging.warning("Pinned and new phrases take {} bytes, that is more than budget {} bytes".format(
+                total_bytes, self.max_bytes))
+        if records:
+            self._append_index_records(records)
+            self.refresh()
+
+    def _compact_if_needed(self):
+        """Rewrite live phrases into new segments if evicted data takes more space than live data,
+        caller must hold the file lock."""
+
+        segments = self._segments()
+        if not segments:
+            return
+        live_bytes = self.total_bytes
+        dead_bytes = sum(os.path.getsize(self._segment_filename(i)) for i in segments) - live_bytes
+        if dead_bytes <= max(live_bytes, self.segment_size):
+            return
+
+        logging.info("Compacting phrase store, live {} bytes, dead {} bytes".format(live_bytes, dead_bytes))
+        segment = segments[-1] + 1
+        offset = 0
+        records = list()
+        f = open(self._segment_filename(segment), 'wb')
+        try:
+            for text, (old_segment, old_offset, length) in self._entries.items():
+                if offset >= self.segment_size:
+                    f.close()
+                    segment += 1
+                    offset = 0
+                    f = open(self._segment_filename(segment), 'wb')
+                f.write(self._view(old_segment, old_offset, length) if length else b'')
+                records.append({
+                    'text': text, 'segment': segment, 'offset': offset, 'length': length,
+                    'pinned': text in self._pinned
+                })
+                offset += length
+            f.flush()
+            os.fsync(f.fileno())
+        finally:
+            f.close()
+
+        tmp_filename = self.index_filename + '.tmp'
+        with open(tmp_filename, 'wb') as tmp:
+            tmp.write(b''.join(json.dumps(r, ensure_ascii=False).encode('utf-8') + b'\n' for r in records))
+            tmp.flush()
+            os.fsync(tmp.fileno())
+        os.replace(tmp_filename, self.index_filename)
+
+        # Mapped old segments stay readable after unlink until their views are released
+        for i in segments:
+            os.remove(self._segment_filename(i))
+        self.refresh()
+
+    def _load_stats(self):
+        try:
+            with open(self.stats_filename) as f:
+                self._stats = json.load(f)
+        except (FileNotFoundError, ValueError):
+            self._stats = {}
+
+    def save_stats(self):
+        """Store lookup statistics to file, so it can be read by other processes."""
+
+        with self._lock:
+            self._stats = {k: v for k, v in self._stats.items() if k in self._entries or v.get('misses')}
+            tmp_filename = self.stats_filename + '.tmp'
+            with open(tmp_filename, 'w') as f:
+                json.dump(self._stats, f, ensure_ascii=False)
+            os.replace(tmp_filename, self.stats_filename)
+            self._stats_saved_time = time.time()
+
+    def stats(self):
+        """
+        Lookup statistics of store and every phrase
+
+        :return: Dictionary with totals and `phrases` dictionary `{text: {'hits', 'misses', 'bytes', 'last_used',
+            'pinned'}}`
+        :rtype: dict
+        """
+
+        with self._lock:
+            self.refresh()
+            phrases = {
+                text: dict(
+                    self._stats.get(text, {'hits': 0, 'misses': 0, 'last_used': 0}),
+                    bytes=length, pinned=text in self._pinned, stored=True
+                )
+                for text, (_, _, length) in self._entries.items()
+            }
+            for text, stats in self._stats.items():
+                if text not in phrases:
+                    phrases[text] = dict(stats, bytes=0, pinned=False, stored=False)
+
+            hits = sum(i['hits'] for i in phrases.values())
+            misses = sum(i['misses'] for i in phrases.values())
+            return {
+                'phrases_count': len(self._entries),
+                'bytes': self.total_bytes,
+                'pinned_bytes': sum(self._entries[t][2] for t in self._pinned if t in self._entries),
+                'max_bytes': self.max_bytes,
+                'policy': self.policy,
+                'hits': hits,
+                'misses': misses,
+                'hit_rate': hits / (hits + misses) if hits + misses else None,
+                'phrases': phrases,
+            }
+
+    def clear(self):
+        """Remove all phrases from the store."""
+
+        with self._lock, self._file_lock():
+            tmp_filename = self.index_filename + '.tmp'
+            open(tmp_filename, 'wb').close()
+            os.replace(tmp_filename, self.index_filename)
+            # Empty segment keeps numbers increasing, so other processes with old entries never read new data
+            segments = self._segments()
+            if segments:
+                open(self._segment_filename(segments[-1] + 1), 'wb').close()
+            for segment in segments:
+                os.remove(self._segment_filename(segment))
+            self._maps = {}
+            self._stats = {}
+            self.refresh()
+            self.save_stats()
+
+    def keys(self):
+        with self._lock:
+            self.refresh()
+            return list(self._entries.keys())
+
+    def __contains__(self, text):
+        with self._lock:
+            if text not in self._entries:
+                self.refresh()
+            return text in self._entries
+
+    def __len__(self):
+        with self._lock:
+            self.refresh()
+            return len(self._entries)
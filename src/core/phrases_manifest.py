@@ -0,0 +1,197 @@
+"""
+Manifest of static phrases and cache warm-up.
+
+Manifest is built by scanning sources of dialogs, events and gates for phrases that are played
+with `cache=True`, declared with `next_phrases` or played with `play_template` with literal template.
+Warm-up synthesizes missing phrases in background after start, so after firmware update
+cache is filled before phrases are needed by user.
+"""
+
+import ast
+import asyncio
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+MANIFEST_SOURCES = ('dialogs', 'events', 'init_gates', os.path.join('core', 'sound_processor.py'))
+
+
+def _literal_string(node):
+    """
+    Get string value of node if it is string literal or concatenation of literals
+
+    :param ast.AST node: Expression node
+    :rtype: str | None
+    """
+
+    if isinstance(node, ast.Constant) and isinstance(node.value, str):
+        return node.value
+    if isinstance(node, ast.BinOp) and isinstance(node.op, ast.Add):
+        left, right = _literal_string(node.left), _literal_string(node.right)
+        if left is not None and right is not None:
+            return left + right
+
+
+def _call_name(node):
+    if isinstance(node.func, ast.Attribute):
+        return node.func.attr
+    if isinstance(node.func, ast.Name):
+        return node.func.id
+
+
+def _scan_source(source, filename='<unknown>'):
+    """
+    Find static phrases and templates in python source
+
+    :param string source: Python source code
+    :param string filename: Filename for syntax errors
+    :return: Set of phrases and set of templates
+    :rtype: tuple[set[str], set[str]]
+    """
+
+    phrases, templates = set(), set()
+    for node in ast.walk(ast.parse(source, filename)):
+        if not isinstance(node, ast.Call) or not node.args:
+            continue
+        name = _call_name(node)
+
+        if name == 'play':
+            cache = any(
+                k.arg == 'cache' and isinstance(k.value, ast.Constant) and k.value.value is True
+                for k in node.keywords
+            ) or (len(node.args) > 1 and isinstance(node.args[1], ast.Constant) and node.args[1].value is True)
+            if cache and (text := _literal_string(node.args[0])) is not None:
+                phrases.add(text)
+        elif name in ('next_phrases', 'hint_next_phrases', 'cash_only'):
+            phrases.update(text for arg in node.args if (text := _literal_string(arg)) is not None)
+        elif name in ('play_template', 'hint_next_template', 'prefetch_template'):
+            if (template := _literal_string(node.args[0])) is not None:
+                templates.add(template)
+
+    return phrases, templates
+
+
+def _scan_base_phrases():
+    """Phrases of `BasePhrases` that are needed when network is unavailable
+
+    :rtype: set[str]
+    """
+
+    from init_gates.connection_gate import BasePhrases
+
+    return {getattr(BasePhrases, i) for i in dir(BasePhrases) if not i.startswith('__')}
+
+
+def build_manifest(base_dir=BASE_DIR, sources=MANIFEST_SOURCES):
+    """
+    Scan sources and build manifest of static phrases
+
+    :param string | Path base_dir: Directory with speaker sources, default `src`
+    :param tuple[str] sources: Directories and files relative to `base_dir` to scan
+    :return: Dictionary `{'phrases': [str], 'templates': [str]}`
+    :rtype: dict
+    """
+
+    filenames = list()
+    for source in sources:
+        path = os.path.join(base_dir, source)
+        if os.path.isdir(path):
+            filenames.extend(
+                os.path.join(path, i) for i in sorted(os.listdir(path)) if i.endswith('.py'))
+        elif os.path.isfile(path):
+            filenames.append(path)
+
+    phrases, templates = _scan_base_phrases(), set()
+    for filename in filenames:
+        with open(filename, encoding='utf-8') as f:
+            file_phrases, file_templates = _scan_source(f.read(), filename)
+        phrases |= file_phrases
+        templates |= file_templates
+
+    logging.debug("Built phrases manifest with {} phrases and {} templates from {} files".format(
+        len(phrases), len(templates), len(filenames)))
+    return {'phrases': sorted(phrases), 'templates': sorted(templates)}
+
+
+def manifest_texts(play_speech, manifest):
+    """
+    Texts that must be in cache according to manifest, long phrases are split the same way
+    `PlaySpeech.play()` splits them
+
+    :param core.speech.PlaySpeech play_speech: PlaySpeech instance
+    :param dict manifest: Manifest from `build_manifest()`
+    :rtype: list[str]
+    """
+
+    texts = list()
+    for phrase in manifest['phrases']:
+        texts.extend(play_speech.segments(phrase))
+    for template in manifest['templates']:
+        texts.extend(play_speech.template_fragments(template))
+    return list(dict.fromkeys(texts))
+
+
+def store_manifest_phrases(play_speech, manifest=None):
+    """
+    Synthesize and store all phrases from manifest synchronously
+
+    :param core.speech.PlaySpeech play_speech: PlaySpeech instance
+    :param dict | None manifest: Manifest, built if `None`
+    :rtype: None
+    """
+
+    for text in manifest_texts(play_speech, manifest or build_manifest()):
+        play_speech.cash_only(text)
+
+
+def _lower_thread_priority(niceness=10):
+    """Lower scheduling priority of current thread, Linux threads have their own nice value."""
+
+    try:
+        os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), niceness)
+    except (AttributeError, OSError) as e:
+        logging.debug("Can't lower warm-up thread priority: {}".format(e))
+
+
+async def warm_up_cache(play_speech, manifest=None, concurrency=2, delay=10):
+    """
+    Background task synthesizes phrases from manifest that are missing in cache,
+    in low priority threads with bounded concurrency
+
+    :param core.speech.PlaySpeech play_speech: PlaySpeech instance
+    :param dict | None manifest: Manifest, built if `None`
+    :param integer concurrency: Number of phrases synthesized at once, default `2`
+    :param integer | float delay: Seconds to wait before start, so it does not delay readiness, default `10`
+    :rtype: None
+    """
+
+    await asyncio.sleep(delay)
+    if play_speech.speech_synthesis is None:
+        logging.warning("Speechkit session is unavailable, skipping cache warm-up")
+        return
+
+    loop = asyncio.get_running_loop()
+    manifest = manifest or await loop.run_in_executor(None, build_manifest)
+    missing = [i for i in manifest_texts(play_speech, manifest) if i not in play_speech.store]
+    if not missing:
+        logging.info("Cache warm-up: all {} manifest phrases are cached".format(len(manifest['phrases'])))
+        return
+    logging.info("Cache warm-up: synthesizing {} phrases".format(len(missing)))
+
+    def cash_only(text):
+        try:
+            play_speech.cash_only(text)
+        except Exception as e:
+            logging.warning("Cache warm-up failed for phrase '{}': {}".format(text, e))
+
+    executor = ThreadPoolExecutor(max_workers=concurrency, initializer=_lower_thread_priority)
+    try:
+        await asyncio.gather(*(loop.run_in_executor(executor, cash_only, text) for text in missing))
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    logging.info("Cache warm-up done")
@@ -1,87 +1,40 @@
 import asyncio
 import logging
-import struct
+import time
 
 import aioconsole
-import pyaudio
 
-try:
-    import RPi.GPIO as GPIO
-except ImportError:
-    logging.warning("RPi.GPIO is not available, button is disabled")
-try:
-    import pvporcupine
-except ImportError:
-    logging.warning("pvporcupine is not available, required -d mode")
 
+async def wakeup_word_input_function(object_storage):
+    """Async wake up word input, waits for detection of persistent detector thread
 
-async def wakeup_word_input_function(_, k=2, sensitivity=0.6, async_delay=0.02):
-    keywords = [
-        'alexa', 'bumblebee', 'computer', 'hey google', 'hey siri',
-        'jarvis', 'picovoice', 'porcupine', 'terminator'
-    ]
-    keyword = keywords[k]
-
-    porcupine = pvporcupine.create(keywords=[keyword], sensitivities=[sensitivity])
-
-    pa = None
-    audio_stream = None
-
-    try:
-        pa = pyaudio.PyAudio()
-
-        audio_stream = pa.open(
-            rate=porcupine.sample_rate,
-            channels=1,
-            format=pyaudio.paInt16,
-            input=True,
-            frames_per_buffer=porcupine.frame_length)
-
-        logging.info("Listening wake up word '{}'...".format(keyword))
+    :param init_gates.ObjectStorage object_storage: ObjectStorage instance
+    :return: `time.monotonic()` when wake word was detected
+    :rtype: float
+    """
 
-        while True:
-            pcm = audio_stream.read(porcupine.frame_length)
-            pcm = struct.unpack_from("h" * porcupine.frame_length, pcm)
+    return await object_storage.wake_word_detector.wait()
 
-            keyword_index = porcupine.process(pcm)
-            if keyword_index >= 0:
-                break
-            await asyncio.sleep(async_delay)
-    finally:
-        if audio_stream is not None:
-            audio_stream.close()
-        if pa is not None:
-            pa.terminate()
-        porcupine.delete()
 
+async def raspberry_input_function(object_storage):
+    """Async raspberrypi input button, waits for press edge from button service
 
-# noinspection PyUnusedLocal
-async def raspberry_input_function(loop, gpio_pin=17, async_delay=0.1):
-    """Async raspberrypi input button
-
-    :param asyncio.AbstractEventLoop loop: Asyncio event asyncio_loop
-    :param integer gpio_pin: Pin which button connected to
-    :param async_delay: Delay in seconds that button updates
-    :return: None
-    :rtype: None
+    :param init_gates.ObjectStorage object_storage: ObjectStorage instance
+    :return: `time.monotonic()` when button was pressed
+    :rtype: float
     """
 
-    GPIO.setmode(GPIO.BCM)
-    GPIO.setup(gpio_pin, GPIO.IN, GPIO.PUD_UP)
-
     logging.info("Waiting button...")
-    while True:
-        if GPIO.input(gpio_pin) == GPIO.LOW:
-            logging.info("Button was pushed!")
-            return
-        await asyncio.sleep(async_delay)
+    _, press_time = await object_storage.button.wait()
+    logging.info("Button was pushed!")
+    return press_time
 
 
 # noinspection PyUnusedLocal
-async def async_simple_input_function(loop, phrase="Press enter and tell something! "):
+async def async_simple_input_function(object_storage, phrase="Press enter and tell something! "):
     """Async equivalent of `input()`
 
-    :param asyncio.AbstractEventLoop loop: Asyncio event asyncio_loop
+    :param init_gates.ObjectStorage object_storage: ObjectStorage instance
     :param string phrase: Phrase that will be printed before input
     :return: Inputted string
     :rtype: string
@@ -105,6 +58,7 @@ class SoundProcessor:
         self.dialog_engine_instance = dialog_engine_instance
 
         self.stop = False
+        self._turn_task = None
 
         logging.info("Created SoundProcessor engine")
 
@@ -112,56 +66,61 @@ class SoundProcessor:
         """Kill event async"""
 
         self.stop = True
+        if self._turn_task is not None:
+            self._turn_task.cancel()
+
+    async def _wait_input(self):
+        """Await input function
+
+        :return: `time.monotonic()` when input was triggered
+        :rtype: float
+        """
 
-    def _get_voice_sr(self):
-        text = self.object_storage.listen_recognize_speech.listen()
+        trigger_time = await self.object_storage.inputFunction(self.object_storage)
+        return trigger_time if isinstance(trigger_time, float) else time.monotonic()
+
+    async def _get_voice_sr(self, trigger_time=None):
+        text = await self.object_storage.listen_recognize_speech.listen_async(
+            self.dialog_engine_instance.listen_profile, trigger_time)
 
         if text is None:
-            self.object_storage.play_speech.play(
+            await self.object_storage.play_speech.play_async(
                 "Я не расслышал, повторите, пожалуйста еще. Перед ответом нажмите на кнопку.", cache=True)
             return
 
         return text
 
-    async def _run_item(self):
-        """Process sound input"""
+    async def _turn(self):
+        """Wait for user input, then listen and process answers while dialog needs permanent answer."""
 
-        # self.object_storage.pixels.wakeup()
-        text = await self.object_storage.event_loop.run_in_executor(
-            None, self._get_voice_sr
-        )
+        trigger_time = await self._wait_input()
+        while True:
+            # self.object_storage.pixels.wakeup()
+            text = await self._get_voice_sr(trigger_time)
+            if text is None:
+                return
 
-        if text is not None:
-            if await self.object_storage.event_loop.run_in_executor(
+            if not await self.object_storage.event_loop.run_in_executor(
                     None, lambda t=text: self.dialog_engine_instance.process_input(t)
             ):
-                await self._run_item()
+                return
+            trigger_time = None
 
     async def run(self):
         """Main async run function provides waiting for user input and handles voice."""
 
         logging.info("Started soundProcessorInstance")
 
-        input_func_task = self.object_storage.event_loop.create_task(
-            self.object_storage.inputFunction(self.object_storage.event_loop)
-        )
-        run_item_task = None
-
-        while True:
-            if input_func_task and input_func_task.done():
-                run_item_task = self.object_storage.event_loop.create_task(self._run_item())
-                input_func_task = None
-            if run_item_task and run_item_task.done():
-                input_func_task = self.object_storage.event_loop.create_task(
-                    self.object_storage.inputFunction(self.object_storage.event_loop)
-                )
-                run_item_task = None
-
-            if self.stop:
-                if input_func_task and not input_func_task.cancelled():
-                    input_func_task.cancel()
-                if run_item_task and not run_item_task.cancelled():
-                    run_item_task.cancel()
-                break
-
-            await asyncio.sleep(1)
+        self.object_storage.capture_hub.start()
+
+        while not self.stop:
+            self._turn_task = self.object_storage.event_loop.create_task(self._turn())
+            try:
+                await self._turn_task
+            except asyncio.CancelledError:
+                if not self.stop:
+                    raise
+            except Exception as e:
+                logging.exception("Error in sound processor turn: {}".format(e))
+            finally:
+                self._turn_task = None
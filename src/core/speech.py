@@ -2,19 +2,26 @@
 Utils for using Yandex Speechkit with speechkit lib, listen phrases and synthesis.
 """
 
+import asyncio
+import functools
 import logging
-import os
-import pickle
+import queue
+import re
+import string
+import threading
 
+import grpc
+import numpy as np
 import pyaudio
+import requests
 import simpleaudio as sa
 from iterators import TimeoutIterator
 from speechkit import Session, SpeechSynthesis, DataStreamingRecognition
+from speechkit._recognition.yandex.cloud.ai.stt.v2 import stt_service_pb2_grpc
+from speechkit.exceptions import RequestError
 
-try:
-    import RPi.GPIO as GPIO
-except ImportError:
-    logging.warning("RPi.GPIO is not available, button is disabled")
+from core.phrase_store import PhraseStore
+from core.vad import LISTEN_PROFILES, vad_audio_chunks
 
 
 def pyaudio_play_audio_function(audio_data, num_channels=1, sample_rate=48000, chunk_size=4000):
@@ -44,50 +51,186 @@ def pyaudio_play_audio_function(audio_data, num_channels=1, sample_rate=48000, c
         p.terminate()
 
 
-def raspberry_simple_audio_play_audio_function(audio_data, num_channels=1, sample_rate=48000, gpio_pin=17):
+def simple_audio_play_audio_function(audio_data, num_channels=1, sample_rate=48000, **kwargs):
     """
     Function to play audio, that can be changed on different devices
 
     :param bytes audio_data: byte array vaw audio
     :param integer num_channels: Count of channels in audio, for stereo set `2`
     :param integer sample_rate: The sampling frequency of the submitted audio, default `48000`
-    :param integer gpio_pin: Pin which button connected to
     :rtype: None
     """
-    GPIO.setmode(GPIO.BCM)
-    GPIO.setup(gpio_pin, GPIO.IN, GPIO.PUD_UP)
-
     play_obj = sa.play_buffer(
         audio_data,
         num_channels,
         2,  # Number of bytes per second (16 bit = 2 bytes)
         sample_rate,
     )
-    while play_obj.is_playing():
-        if GPIO.input(gpio_pin) == GPIO.LOW:
-            play_obj.stop()
-            break
+    play_obj.wait_done()
 
 
-def simple_audio_play_audio_function(audio_data, num_channels=1, sample_rate=48000, **kwargs):
+default_play_audio_function = pyaudio_play_audio_function
+
+
+class JitterBuffer:
+    """Thread safe audio buffer between synthesis network stream and playback.
+
+    Playback starts after `prebuffer_bytes` are received, and if buffer runs dry before synthesis is finished,
+    playback waits until `prebuffer_bytes` are buffered again instead of underrunning device.
     """
-    Function to play audio, that can be changed on different devices
 
-    :param bytes audio_data: byte array vaw audio
-    :param integer num_channels: Count of channels in audio, for stereo set `2`
-    :param integer sample_rate: The sampling frequency of the submitted audio, default `48000`
-    :rtype: None
+    SAMPLE_WIDTH = 2
+
+    def __init__(self, prebuffer_bytes, chunk_size=4000):
+        """
+        :param integer prebuffer_bytes: Number of bytes to buffer before playback start
+        :param integer chunk_size: Size of yielded chunk, default `4000`
+        :return: __init__ should return None
+        :rtype: None
+        """
+
+        self.prebuffer_bytes = prebuffer_bytes
+        self.chunk_size = chunk_size - chunk_size % self.SAMPLE_WIDTH
+
+        self.underruns = 0
+        self.closed = False
+        self.aborted = False
+
+        self._buffer = bytearray()
+        self._condition = threading.Condition()
+
+    def put(self, data):
+        """Put received audio data
+
+        :param bytes data: PCM data
+        :rtype: None
+        """
+
+        with self._condition:
+            self._buffer.extend(data)
+            self._condition.notify()
+
+    def close(self):
+        """Mark that all data is received."""
+
+        with self._condition:
+            self.closed = True
+            self._condition.notify()
+
+    def abort(self):
+        """Stop playback and receiving, buffered data is dropped."""
+
+        with self._condition:
+            self.aborted = True
+            self.closed = True
+            self._buffer.clear()
+            self._condition.notify()
+
+    def _ready(self, need):
+        return self.closed or len(self._buffer) >= need
+
+    def __iter__(self):
+        """
+        Yields audio chunks ready to be written to output device
+
+        :rtype: Iterator[bytes]
+        """
+
+        need = self.prebuffer_bytes
+        while True:
+            with self._condition:
+                if need == self.chunk_size and not self._ready(need):
+                    # Device would starve on the next write, so buffer again
+                    self.underruns += 1
+                    logging.debug("Synthesis stream underrun, buffering")
+                    need = self.prebuffer_bytes
+                self._condition.wait_for(lambda: self._ready(need))
+                if self.aborted:
+                    return
+                size = min(self.chunk_size, len(self._buffer))
+                size -= size % self.SAMPLE_WIDTH
+                if size == 0:
+                    return
+                chunk = bytes(self._buffer[:size])
+                del self._buffer[:size]
+                need = self.chunk_size
+            yield chunk
+
+
+def split_sentences(text, max_length=200, min_length=30):
     """
-    play_obj = sa.play_buffer(
-        audio_data,
-        num_channels,
-        2,  # Number of bytes per second (16 bit = 2 bytes)
-        sample_rate,
-    )
-    play_obj.wait_done()
+    Split text into segments at sentence boundaries, too long sentences are split at clause boundaries
 
+    :param string text: Text to split
+    :param integer max_length: Maximum length of segment if it can be split, default `200`
+    :param integer min_length: Segments shorter than this are joined with the next one, default `30`
+    :return: List of segments
+    :rtype: list[str]
+    """
 
-default_play_audio_function = pyaudio_play_audio_function
+    segments = list()
+    for sentence in re.split(r'(?:(?<=[.!?…])|(?<=[.!?…][\'"»)]))\s+', text.strip()):
+        if len(sentence) <= max_length:
+            segments.append(sentence)
+            continue
+        part = ''
+        for clause in re.split(r'(?<=[,;:—-])\s+', sentence):
+            if part and len(part) + len(clause) + 1 > max_length:
+                segments.append(part)
+                part = clause
+            else:
+                part = part + ' ' + clause if part else clause
+        if part:
+            segments.append(part)
+
+    merged = list()
+    for segment in segments:
+        if not segment:
+            continue
+        if merged and len(merged[-1]) < min_length:
+            merged[-1] = merged[-1] + ' ' + segment
+        else:
+            merged.append(segment)
+    return merged
+
+
+def splice_audio(pieces, sample_rate, crossfade_seconds=0.01, silence_threshold=300, keep_silence_seconds=0.03):
+    """
+    Concatenate PCM pieces into one utterance, silence synthesized around every piece is trimmed
+    and pieces are joined with short linear crossfade
+
+    :param list[bytes | memoryview | float] pieces: PCM data, or float number of seconds of silence
+    :param integer sample_rate: The sampling frequency of audio
+    :param float crossfade_seconds: Duration of crossfade between pieces, default `0.01`
+    :param integer silence_threshold: Absolute sample value below which sample is silence, default `300`
+    :param float keep_silence_seconds: Silence kept at both sides of trimmed piece, default `0.03`
+    :return: PCM data
+    :rtype: bytes
+    """
+
+    crossfade = int(crossfade_seconds * sample_rate)
+    keep = int(keep_silence_seconds * sample_rate)
+
+    result = np.zeros(0, dtype=np.float32)
+    for piece in pieces:
+        if isinstance(piece, (int, float)):
+            result = np.concatenate([result, np.zeros(int(piece * sample_rate), dtype=np.float32)])
+            continue
+
+        samples = np.frombuffer(piece, dtype=np.int16)
+        loud = np.flatnonzero(np.abs(samples.astype(np.int32)) > silence_threshold)
+        if loud.size == 0:
+            continue
+        samples = samples[max(loud[0] - keep, 0):loud[-1] + keep + 1].astype(np.float32)
+
+        overlap = min(crossfade, result.size, samples.size)
+        if overlap:
+            ramp = np.linspace(0, 1, overlap, dtype=np.float32)
+            result[-overlap:] = result[-overlap:] * (1 - ramp) + samples[:overlap] * ramp
+            samples = samples[overlap:]
+        result = np.concatenate([result, samples])
+
+    return np.clip(result, -32768, 32767).astype(np.int16).tobytes()
 
 
 def gen_audio_capture_function(sample_rate, chunk_size=4000, num_channels=1):
@@ -122,6 +265,9 @@ class ListenRecognizeSpeech:
     """Listen and recognize audio using speechkit."""
 
     PRE_LIGHT_TURN_DELAY = 0.7
+    VAD_CHUNK_SECONDS = 0.1
+    PRE_ROLL_SECONDS = 0.3
+    RECOGNITION_HOST = 'stt.api.cloud.yandex.net:443'
 
     def __init__(
             self,
@@ -130,7 +276,9 @@ class ListenRecognizeSpeech:
             sample_rate=8000,
             timeout=15,
             generate_audio_function=gen_audio_capture_function,
-            chunk_size=4000
+            chunk_size=4000,
+            listen_profiles=LISTEN_PROFILES,
+            capture_hub=None
     ):
         """
         :param Session session: speechkit Session
@@ -139,12 +287,18 @@ class ListenRecognizeSpeech:
         :param integer timeout: Timeout in seconds, default `15`
         :param function generate_audio_function: Function generates audio data
         :param int chunk_size: chunk size for audio playing, default 4000
+        :param dict[str, core.vad.ListenProfile] | None listen_profiles: Voice activity detection profiles by name,
+            capture is ended locally when utterance ends, `None` disables detection, default `core.vad.LISTEN_PROFILES`
+        :param core.capture.CaptureHub | None capture_hub: Shared continuous capture, if given audio is read from it
+            instead of `generate_audio_function` and recognition starts from the trigger moment, default `None`
         """
         self.pixels = pixels
         self.sample_rate = sample_rate
         self.timeout = timeout
         self.generate_audio_function = generate_audio_function
         self.chunk_size = chunk_size
+        self.listen_profiles = listen_profiles
+        self.capture_hub = capture_hub
 
         self.data_streaming_recognition = DataStreamingRecognition(
             session,
@@ -155,10 +309,47 @@ class ListenRecognizeSpeech:
             single_utterance=True,
         )
 
-    def listen(self):
+    def _gen_audio(self, profile='default', stop=None, trigger_time=None):
+        """
+        Captured audio for recognition, ends when utterance ends or `stop` is set
+
+        :param string profile: Name of listen profile
+        :param threading.Event | None stop: Event to stop audio capture
+        :param float | None trigger_time: `time.monotonic()` of trigger, with `capture_hub` audio starts
+            `PRE_ROLL_SECONDS` before it, default `None` starts from now
+        :return: Yields pcm data bytes format
+        :rtype: Iterator[bytes]
+        """
+
+        chunk_size = self.chunk_size
+        if self.listen_profiles is not None:
+            chunk_size = min(chunk_size, int(self.sample_rate * self.VAD_CHUNK_SECONDS))
+
+        if self.capture_hub is not None:
+            audio_chunks = (i.tobytes() for i in self.capture_hub.subscribe(
+                self.sample_rate, chunk_size,
+                since=None if trigger_time is None else trigger_time - self.PRE_ROLL_SECONDS))
+        else:
+            audio_chunks = self.generate_audio_function(self.sample_rate, chunk_size=chunk_size)
+
+        if self.listen_profiles is not None:
+            audio_chunks = vad_audio_chunks(
+                audio_chunks, self.sample_rate, self.listen_profiles.get(profile, self.listen_profiles['default']))
+
+        try:
+            for chunk in audio_chunks:
+                if stop is not None and stop.is_set():
+                    return
+                yield chunk
+        finally:
+            audio_chunks.close()
+
+    def listen(self, profile='default', trigger_time=None):
         """
         Listen phrase and recognizes text from audio stream
 
+        :param string profile: Name of listen profile, e.g. `yes_no`, default `default`
+        :param float | None trigger_time: `time.monotonic()` of button press or wake word, default `None`
         :return: Recognized Text or None if timeout or empty string
         :rtype: str | None
         """
@@ -167,8 +358,7 @@ class ListenRecognizeSpeech:
         logging.info("Listening audio input, recognizing...")
 
         for text, final, _ in TimeoutIterator(
-                self.data_streaming_recognition.recognize(
-                    self.generate_audio_function, self.sample_rate, chunk_size=self.chunk_size),
+                self.data_streaming_recognition.recognize(self._gen_audio, profile, None, trigger_time),
                 timeout=self.timeout, sentinel=([None], True, False)
         ):
             text = text[0]
@@ -179,56 +369,143 @@ class ListenRecognizeSpeech:
             self.pixels.off()
             return text
 
+    def _streaming_call(self, profile, stop, trigger_time=None):
+        """
+        Start streaming recognition gRPC call
+
+        `speechkit.DataStreamingRecognition.recognize` hides gRPC call, so it can't be cancelled, call is made
+        here with the same requests.
+
+        :param string profile: Name of listen profile
+        :param threading.Event stop: Event to stop audio capture
+        :param float | None trigger_time: `time.monotonic()` of trigger
+        :return: Iterator of responses, `cancel()` can be called from any thread
+        :rtype: grpc.Call
+        """
+
+        channel = grpc.secure_channel(self.RECOGNITION_HOST, grpc.ssl_channel_credentials())
+        stub = stt_service_pb2_grpc.SttServiceStub(channel)
+        return stub.StreamingRecognize(
+            self.data_streaming_recognition._gen(self._gen_audio, profile, stop, trigger_time),
+            metadata=(self.data_streaming_recognition._headers,)
+        )
+
+    @staticmethod
+    def _recognize(call, stop):
+        """
+        Recognize first utterance, then audio capture is stopped and gRPC call is cancelled
+
+        :param grpc.Call call: Streaming recognition call
+        :param threading.Event stop: Event to stop audio capture
+        :return: Recognized Text or None if empty string or call was cancelled
+        :rtype: str | None
+        """
+
+        try:
+            for response in call:
+                text = [i.text for i in response.chunks[0].alternatives][0]
+                if text and text.strip() == '':
+                    text = None
+                return text
+        except grpc.RpcError as e:
+            if e.code() != grpc.StatusCode.CANCELLED:
+                raise
+        finally:
+            stop.set()
+            call.cancel()
+
+    async def listen_async(self, profile='default', trigger_time=None):
+        """
+        Asyncio equivalent of `.listen()`, recognition runs in executor and is stopped
+        on timeout or if awaiting task is cancelled
+
+        :param string profile: Name of listen profile, e.g. `yes_no`, default `default`
+        :param float | None trigger_time: `time.monotonic()` of button press or wake word, default `None`
+        :return: Recognized Text or None if timeout or empty string
+        :rtype: str | None
+        """
+        self.pixels.wakeup(sleep=self.PRE_LIGHT_TURN_DELAY)
+        self.pixels.listen(sleep=self.PRE_LIGHT_TURN_DELAY)
+        logging.info("Listening audio input, recognizing...")
+
+        stop = threading.Event()
+        call = self._streaming_call(profile, stop, trigger_time)
+        recognition = asyncio.get_running_loop().run_in_executor(None, self._recognize, call, stop)
+        try:
+            text = await asyncio.wait_for(asyncio.shield(recognition), self.timeout)
+        except asyncio.TimeoutError:
+            text = None
+        finally:
+            # Cancelled call ends response iteration at once, so executor thread does not wait for server
+            stop.set()
+            call.cancel()
+            self.pixels.off()
+
+        logging.info("RECOGNIZED TEXT '{}'".format(text))
+        return text
+
 
 class PlaySpeech:
     """Generates plays and cashes speech"""
     voice = 'filipp'  # 'alena'
     speed = 1.15
 
+    SYNTHESIS_URL = 'https://tts.api.cloud.yandex.net/speech/v1/tts:synthesize'
+    TEMPLATE_PAUSES = {'.': 0.3, '!': 0.3, '?': 0.3, '…': 0.3, ',': 0.15, ';': 0.15, ':': 0.15, '-': 0.1, '—': 0.1}
+
     def __init__(
             self,
             session,
-            cashed_data_filename,
+            cashed_data_dirname,
             pixels,
             play_audio_function=default_play_audio_function,
             sample_rate_hertz=16000,
-            chunk_size=4000
+            chunk_size=4000,
+            cache_max_bytes=None,
+            cache_policy='lru',
+            play_audio_stream_function=None,
+            prebuffer_seconds=0.3,
+            pipeline_min_length=120,
+            audio_output=None,
+            http_client=None
     ):
         """
         :param Session session: speechkit Session
-        :param string cashed_data_filename: filename of pickle data
+        :param string cashed_data_dirname: directory of phrase store
         :param core.pixels.Pixels pixels: Object to control LEDs
         :param function play_audio_function: Function that plays raw audio bytes
         :param integer synthesis_sample_rate_hertz: sample rate for playing audio, default `16000`
         :param int chunk_size: chunk size for audio playing, default 4000
+        :param integer | None cache_max_bytes: Budget of phrase store in bytes, `None` for unlimited, default `None`
+        :param string cache_policy: Eviction policy of phrase store `lru` or `lfu`, default `lru`
+        :param function | None play_audio_stream_function: Function that plays iterator of raw audio chunks,
+            if given uncached phrases are played while synthesis is running, default `None`
+        :param float prebuffer_seconds: Seconds of audio buffered before streaming playback starts, default `0.3`
+        :param integer pipeline_min_length: Texts longer than this are split into sentences, which are synthesized
+            while previous ones are playing, default `120`
+        :param core.audio_output.AudioOutput | None audio_output: Output used by async methods,
+            if `None` they run `play_audio_function` in executor, default `None`
+        :param network.HttpClient | None http_client: Client for synthesis requests, default is `requests` module
         """
         self.pixels = pixels
-        self.cashed_data_filename = cashed_data_filename
+        self.cashed_data_dirname = cashed_data_dirname
         self.sample_rate = sample_rate_hertz
         self.play_audio_function = play_audio_function
+        self.play_audio_stream_function = play_audio_stream_function
+        self.prebuffer_seconds = prebuffer_seconds
+        self.pipeline_min_length = pipeline_min_length
         self.chunk_size = chunk_size
+        self.audio_output = audio_output
+        self.http = http_client or requests
 
+        self.session = session
         self.speech_synthesis = SpeechSynthesis(session) if session else None
-        self.data = {}
-        self._load_data()
-
-    def _load_data(self):
-        """Load data from file, and store it into `self.data`."""
-
-        try:
-            with open(self.cashed_data_filename, 'rb') as f:
-                self.data = pickle.load(f)
-        except FileNotFoundError:
-            self.data = {}
-            self._store_data()
+        self.store = PhraseStore(cashed_data_dirname, max_bytes=cache_max_bytes, policy=cache_policy)
 
-    def _store_data(self):
-        """Store data to file or create it if file does not exists."""
-
-        logging.debug("Storing data, data: {data_keys}".format(data_keys=self.data.keys()))
-        os.makedirs(os.path.dirname(self.cashed_data_filename), exist_ok=True)
-        with open(self.cashed_data_filename, 'wb') as f:
-            pickle.dump(self.data, f)
+        self._prefetch_queue = queue.Queue()
+        self._prefetch_pending = set()
+        self._prefetch_lock = threading.Lock()
+        self._prefetch_thread = None
 
     def _synthesize_data(self, text):
         """
@@ -242,11 +519,389 @@ class PlaySpeech:
             text=text, voice=self.voice, format='lpcm', sampleRateHertz=str(self.sample_rate), speed=self.speed
         )
 
+    def _synthesize_chunks(self, text, chunk_size=4000):
+        """
+        Synthesis audio from given text and yield it as soon as it is received
+
+        `speechkit.SpeechSynthesis` reads the whole answer before return, so request is made here
+        with the same parameters.
+
+        :param string text: Text to synthesize
+        :param integer chunk_size: Size of network read, default `4000`
+        :return: Yields bytes audio data
+        :rtype: Iterator[bytes]
+        """
+        params = {
+            'text': text, 'voice': self.voice, 'format': 'lpcm',
+            'sampleRateHertz': str(self.sample_rate), 'speed': self.speed
+        }
+        if self.session.folder_id:
+            params['folderId'] = self.session.folder_id
+
+        with self.http.post(self.SYNTHESIS_URL, headers=self.session.header, data=params, stream=True) as answer:
+            if not answer.ok:
+                raise RequestError(answer.json())
+            answer.raw.decode_content = True
+            for chunk in answer.iter_content(chunk_size):
+                yield chunk
+
+    def _jitter_buffer(self):
+        return JitterBuffer(int(self.prebuffer_seconds * self.sample_rate * JitterBuffer.SAMPLE_WIDTH), self.chunk_size)
+
+    def _synthesize_to_buffer(self, text, jitter_buffer, cache=False):
+        """
+        Synthesis audio into jitter buffer, buffer is closed when synthesis is finished
+
+        :param string text: Text to synthesize
+        :param JitterBuffer jitter_buffer: Buffer playback reads from
+        :param boolean cache: If need cash it, synthesis is not stopped when playback is aborted
+        :return: All received audio data
+        :rtype: bytes
+        """
+        received = bytearray()
+        try:
+            for chunk in self._synthesize_chunks(text, self.chunk_size):
+                if jitter_buffer.aborted and not cache:
+                    break
+                jitter_buffer.put(chunk)
+                received.extend(chunk)
+        finally:
+            jitter_buffer.close()
+        return bytes(received)
+
+    def _play_stream(self, text, cache=False):
+        """
+        Plays speech while synthesis is running, tees received audio into cache if `cache`
+
+        :param string text: Text to play
+        :param boolean cache: If need cash it
+        :rtype: None
+        """
+        jitter_buffer = self._jitter_buffer()
+        received = list()
+        errors = list()
+
+        def synthesize():
+            try:
+                received.append(self._synthesize_to_buffer(text, jitter_buffer, cache))
+            except Exception as e:
+                errors.append(e)
+
+        synthesis_thread = threading.Thread(target=synthesize, daemon=True)
+        synthesis_thread.start()
+
+        logging.info("PLAYS TEXT STREAM '{}'".format(text))
+        self.pixels.speak()
+        try:
+            self.play_audio_stream_function(jitter_buffer, sample_rate=self.sample_rate, chunk_size=self.chunk_size)
+        finally:
+            jitter_buffer.abort()
+            self.pixels.off()
+
+        synthesis_thread.join()
+        if errors:
+            raise errors[0]
+        if jitter_buffer.underruns:
+            logging.debug("Synthesis stream had {} underruns".format(jitter_buffer.underruns))
+        if cache:
+            self.store.append(text, received[0], pinned=True)
+
+    async def _play_stream_async(self, text, cache=False):
+        """
+        Asyncio equivalent of `._play_stream()`
+
+        :param string text: Text to play
+        :param boolean cache: If need cash it
+        :return: True if playback was interrupted
+        :rtype: bool
+        """
+        loop = asyncio.get_running_loop()
+        jitter_buffer = self._jitter_buffer()
+        synthesis = loop.run_in_executor(None, self._synthesize_to_buffer, text, jitter_buffer, cache)
+
+        logging.info("PLAYS TEXT STREAM '{}'".format(text))
+        self.pixels.speak()
+        try:
+            if self.audio_output is not None:
+                interrupted = await self.audio_output.play_stream_async(jitter_buffer, sample_rate=self.sample_rate)
+            else:
+                interrupted = await loop.run_in_executor(None, functools.partial(
+                    self.play_audio_stream_function, jitter_buffer,
+                    sample_rate=self.sample_rate, chunk_size=self.chunk_size))
+        finally:
+            jitter_buffer.abort()
+            self.pixels.off()
+
+        received = await synthesis
+        if cache:
+            self.store.append(text, received, pinned=True)
+        return bool(interrupted)
+
+    async def _play_audio_async(self, audio_data):
+        """
+        Play audio with `audio_output`, or with `play_audio_function` in executor
+
+        :param bytes | memoryview audio_data: PCM data
+        :return: True if playback was interrupted
+        :rtype: bool
+        """
+        if self.audio_output is not None:
+            return await self.audio_output.play_async(audio_data, sample_rate=self.sample_rate)
+
+        return bool(await asyncio.get_running_loop().run_in_executor(None, functools.partial(
+            self.play_audio_function, audio_data, sample_rate=self.sample_rate, chunk_size=self.chunk_size)))
+
+    def segments(self, text):
+        """
+        Segments text is played and cached by, texts longer than `pipeline_min_length` are split into sentences
+
+        :param string text: Text to play
+        :rtype: list[str]
+        """
+        if len(text) > self.pipeline_min_length and len(segments := split_sentences(text)) > 1:
+            return segments
+        return [text]
+
+    def _play_segments(self, segments, cache=False):
+        """
+        Plays segments one by one, next segment is synthesized while previous is playing.
+        Every segment is cached independently, pinned if `cache`.
+
+        :param list[str] segments: Segments of text to play
+        :param boolean cache: If need to pin segments in cache
+        :rtype: None
+        """
+        ready = queue.Queue(maxsize=1)
+        stop = threading.Event()
+
+        def synthesize():
+            try:
+                for segment in segments:
+                    if stop.is_set():
+                        return
+                    ready.put((segment, self._segment_audio(segment, cache)))
+            except Exception as e:
+                ready.put(e)
+            finally:
+                ready.put(None)
+
+        synthesis_thread = threading.Thread(target=synthesize, daemon=True)
+        synthesis_thread.start()
+
+        try:
+            while (item := ready.get()) is not None:
+                if isinstance(item, Exception):
+                    raise item
+                segment, audio_data = item
+                logging.info("PLAYS TEXT SEGMENT '{}'".format(segment))
+                self.pixels.speak()
+                if self.play_audio_function(audio_data, sample_rate=self.sample_rate, chunk_size=self.chunk_size):
+                    logging.info("Playback interrupted")
+                    break
+        finally:
+            stop.set()
+            self.pixels.off()
+            while synthesis_thread.is_alive():
+                try:
+                    ready.get(timeout=0.1)
+                except queue.Empty:
+                    pass
+
+    def _segment_audio(self, segment, cache=False):
+        """
+        Audio of segment from cache, or synthesized and cached
+
+        :param string segment: Segment of text
+        :param boolean cache: If need to pin segment in cache
+        :rtype: memoryview
+        """
+        if (audio_data := self.store.get(segment)) is None:
+            return self.store.append(segment, self._synthesize_data(segment), pinned=cache)
+        if cache:
+            self.store.pin(segment)
+        return audio_data
+
+    async def _play_segments_async(self, segments, cache=False):
+        """
+        Asyncio equivalent of `._play_segments()`
+
+        :param list[str] segments: Segments of text to play
+        :param boolean cache: If need to pin segments in cache
+        :return: True if playback was interrupted
+        :rtype: bool
+        """
+        loop = asyncio.get_running_loop()
+        next_audio = loop.run_in_executor(None, self._segment_audio, segments[0], cache)
+        try:
+            for i, segment in enumerate(segments):
+                audio_data = await next_audio
+                if i + 1 < len(segments):
+                    next_audio = loop.run_in_executor(None, self._segment_audio, segments[i + 1], cache)
+
+                logging.info("PLAYS TEXT SEGMENT '{}'".format(segment))
+                self.pixels.speak()
+                if await self._play_audio_async(audio_data):
+                    logging.info("Playback interrupted")
+                    return True
+        finally:
+            self.pixels.off()
+        return False
+
+    def _text_pieces(self, text, pinned):
+        """
+        Template fragment as pieces, punctuation without words is not worth synthesizing, pause is used instead
+
+        :param string text: Literal fragment of template
+        :param boolean pinned: If fragment must be pinned in cache
+        :return: List of `(text, pinned)` to synthesize or float seconds of pause
+        :rtype: list[tuple[str, bool] | float]
+        """
+        pieces = list()
+        punctuation, text = re.match(r'^([\W_]*)(.*)$', text.strip(), re.DOTALL).groups()
+        if punctuation.strip():
+            pieces.append(self.TEMPLATE_PAUSES.get(punctuation.strip()[-1], 0.0))
+        if text:
+            pieces.append((text, pinned))
+        return pieces
+
+    def _template_pieces(self, template, args, kwargs):
+        """
+        Split formatted template into pieces
+
+        :param string template: Template in `str.format()` syntax
+        :param tuple args: Positional values of template fields
+        :param dict kwargs: Keyword values of template fields
+        :return: List of `(text, pinned)` to synthesize or float seconds of pause
+        :rtype: list[tuple[str, bool] | float]
+        """
+        pieces = list()
+        formatter = string.Formatter()
+
+        auto_index = 0
+        for literal, field_name, format_spec, conversion in formatter.parse(template):
+            pieces.extend(self._text_pieces(literal, True))
+            if field_name is not None:
+                if field_name == '':
+                    field_name = str(auto_index)
+                    auto_index += 1
+                value, _ = formatter.get_field(field_name, args, kwargs)
+                value = formatter.format_field(formatter.convert_field(value, conversion), format_spec).strip()
+                # Values are synthesized as is, leading sign like in `-5` is not punctuation
+                if value:
+                    pieces.append((value, False))
+        return pieces
+
+    def template_fragments(self, template):
+        """
+        Constant fragments of template, that `.play_template()` takes from cache
+
+        :param string template: Template in `str.format()` syntax
+        :rtype: list[str]
+        """
+        return [
+            piece[0] for literal, _, _, _ in string.Formatter().parse(template)
+            for piece in self._text_pieces(literal, True) if not isinstance(piece, float)
+        ]
+
+    def play_template(self, template, *args, **kwargs):
+        """
+        Plays text formatted from template. Constant fragments of template are cached and pinned,
+        only values are synthesized, which are cached too, and audio is spliced together.
+
+        :param string template: Template in `str.format()` syntax, e.g. `'Произнесите значение {}'`
+        :param args: Positional values of template fields
+        :param kwargs: Keyword values of template fields
+        :rtype: None
+        """
+        self.pixels.think()
+        audio_data = self._template_audio(template, args, kwargs)
+
+        logging.info("PLAYS TEXT '{}'".format(template.format(*args, **kwargs)))
+        self.pixels.speak()
+        self.play_audio_function(audio_data, sample_rate=self.sample_rate, chunk_size=self.chunk_size)
+        self.pixels.off()
+
+    def _template_audio(self, template, args, kwargs):
+        """
+        Audio of formatted template spliced from cached fragments and synthesized values
+
+        :param string template: Template in `str.format()` syntax
+        :param tuple args: Positional values of template fields
+        :param dict kwargs: Keyword values of template fields
+        :rtype: bytes
+        """
+        audio_pieces = list()
+        for piece in self._template_pieces(template, args, kwargs):
+            if isinstance(piece, float):
+                audio_pieces.append(piece)
+                continue
+            text, pinned = piece
+            if (audio_data := self.store.get(text)) is None:
+                audio_data = self.store.append(text, self._synthesize_data(text), pinned=pinned)
+            audio_pieces.append(audio_data)
+        return splice_audio(audio_pieces, self.sample_rate)
+
+    def _prefetch_worker(self):
+        """Background thread synthesizes phrases from prefetch queue one by one."""
+
+        while True:
+            text, pinned = self._prefetch_queue.get()
+            try:
+                if text not in self.store:
+                    logging.debug("Prefetching phrase '{}'".format(text))
+                    self.store.append(text, self._synthesize_data(text), pinned=pinned)
+            except Exception as e:
+                logging.warning("Failed to prefetch phrase '{}': {}".format(text, e))
+            finally:
+                with self._prefetch_lock:
+                    self._prefetch_pending.discard(text)
+
+    def _prefetch_pieces(self, pieces):
+        """Put `(text, pinned)` pieces which are not cached yet into prefetch queue.
+
+        :param list[tuple[str, bool]] pieces: Texts to synthesize
+        :rtype: None
+        """
+        if self.speech_synthesis is None:
+            return
+
+        with self._prefetch_lock:
+            for text, pinned in pieces:
+                if text in self._prefetch_pending or text in self.store:
+                    continue
+                self._prefetch_pending.add(text)
+                self._prefetch_queue.put((text, pinned))
+
+            if self._prefetch_thread is None and self._prefetch_pending:
+                self._prefetch_thread = threading.Thread(target=self._prefetch_worker, daemon=True)
+                self._prefetch_thread.start()
+
+    def prefetch(self, texts, pinned=True):
+        """
+        Synthesize phrases that may be played soon in background, so they play from cache.
+        Long texts are prefetched by segments, the same way `.play()` splits them.
+
+        :param list[str] texts: Phrases to synthesize
+        :param boolean pinned: If phrases must never be evicted from cache, default `True`
+        :rtype: None
+        """
+        self._prefetch_pieces([(segment, pinned) for text in texts for segment in self.segments(text)])
+
+    def prefetch_template(self, template, *args, **kwargs):
+        """
+        Synthesize fragments of template that may be played soon with `.play_template()` in background
+
+        :param string template: Template in `str.format()` syntax
+        :param args: Positional values of template fields
+        :param kwargs: Keyword values of template fields
+        :rtype: None
+        """
+        self._prefetch_pieces([i for i in self._template_pieces(template, args, kwargs) if not isinstance(i, float)])
+
     def reset_cash(self):
-        """Clear all data stored in file."""
+        """Clear all data stored in phrase store."""
 
-        self.data = {}
-        self._store_data()
+        self.store.clear()
 
     def play(self, text, cache=False):
         """
@@ -257,14 +912,20 @@ class PlaySpeech:
         :rtype: None
         """
         self.pixels.think()
+        if len(segments := self.segments(text)) > 1:
+            return self._play_segments(segments, cache)
+
         if cache:
-            if text in self.data:
+            if (audio_data := self.store.get(text)) is not None:
                 logging.debug("Cashed data found, playing it")
-                audio_data = self.data[text]
+            elif self.play_audio_stream_function is not None:
+                logging.debug("Cashed data was not found, streaming, text: '{text}'".format(text=text))
+                return self._play_stream(text, cache=True)
             else:
-                logging.debug("Cashed data was not found, synthesizing, "
-                              "text: '{text}', keywords: '{data_keys}'".format(text=text, data_keys=self.data.keys()))
+                logging.debug("Cashed data was not found, synthesizing, text: '{text}'".format(text=text))
                 audio_data = self.cash_only(text)
+        elif self.play_audio_stream_function is not None:
+            return self._play_stream(text)
         else:
             audio_data = self._synthesize_data(text)
 
@@ -273,21 +934,58 @@ class PlaySpeech:
         self.play_audio_function(audio_data, sample_rate=self.sample_rate, chunk_size=self.chunk_size)
         self.pixels.off()
 
-    def cash_only(self, text):
+    async def play_async(self, text, cache=False):
+        """
+        Asyncio equivalent of `.play()`, synthesis runs in executor and event loop is not blocked
+        while audio is playing. Cancelling awaiting task stops playback.
+
+        :param string text: Text to play
+        :param boolean cache: If need cash it
+        :return: True if playback was interrupted
+        :rtype: bool
+        """
+        self.pixels.think()
+        if len(segments := self.segments(text)) > 1:
+            return await self._play_segments_async(segments, cache)
+
+        if cache and (audio_data := self.store.get(text)) is not None:
+            logging.debug("Cashed data found, playing it")
+        elif self.play_audio_stream_function is not None:
+            return await self._play_stream_async(text, cache)
+        else:
+            audio_data = await asyncio.get_running_loop().run_in_executor(
+                None, self.cash_only if cache else self._synthesize_data, text)
+
+        logging.info("PLAYS TEXT '{}'".format(text))
+        self.pixels.speak()
+        try:
+            return await self._play_audio_async(audio_data)
+        finally:
+            self.pixels.off()
+
+    def cash_only(self, text, pinned=True):
         """
         Generate and store phrases without play it.
 
         :param string text: Text to synthesize
-        :return: Bytes audio data
-        :rtype: bytes
+        :param boolean pinned: If phrase must never be evicted from cache, default `True`
+        :return: Audio data view
+        :rtype: memoryview
         """
         if not isinstance(text, str):
             raise ValueError("`text` must be str, but got {}".format(type(text)))
 
-        if text in self.data:
-            return
+        if text in self.store:
+            # Stored audio is kept, only pin flag is updated
+            return self.store.pin(text) if pinned else self.store.get(text)
 
-        audio_data = self._synthesize_data(text)
-        self.data[text] = audio_data
-        self._store_data()
-        return audio_data
+        return self.store.append(text, self._synthesize_data(text), pinned=pinned)
+
+    def cache_stats(self):
+        """
+        Hit/miss/bytes statistics of cached phrases
+
+        :rtype: dict
+        """
+
+        return self.store.stats()
@@ -0,0 +1,177 @@
+"""
+Lightweight voice activity detection on energy and zero crossing rate of 16 bit PCM audio,
+used to end recognition stream locally when utterance is over.
+"""
+
+import logging
+
+import numpy as np
+
+
+class ListenProfile:
+    """Timeouts of one listening turn"""
+
+    def __init__(self, leading_silence=5.0, trailing_silence=1.0, max_duration=15.0):
+        """
+        :param float leading_silence: Seconds to wait for speech start, capture is aborted after, default `5.0`
+        :param float trailing_silence: Seconds of silence after speech that end utterance, default `1.0`
+        :param float max_duration: Maximum duration of capture in seconds, default `15.0`
+        :return: __init__ should return None
+        :rtype: None
+        """
+
+        self.leading_silence = leading_silence
+        self.trailing_silence = trailing_silence
+        self.max_duration = max_duration
+
+    def __repr__(self):
+        return "ListenProfile(leading_silence={}, trailing_silence={}, max_duration={})".format(
+            self.leading_silence, self.trailing_silence, self.max_duration)
+
+
+LISTEN_PROFILES = {
+    'default': ListenProfile(leading_silence=5.0, trailing_silence=1.0, max_duration=15.0),
+    'yes_no': ListenProfile(leading_silence=4.0, trailing_silence=0.35, max_duration=4.0),
+    'value': ListenProfile(leading_silence=5.0, trailing_silence=0.7, max_duration=8.0),
+    'message': ListenProfile(leading_silence=6.0, trailing_silence=1.5, max_duration=30.0),
+}
+"""Profiles by name, dialog input functions choose one with `dialogs.listen_profile` decorator"""
+
+
+class VoiceActivityDetector:
+    """Classifies frames of 16 bit PCM audio as speech or silence.
+
+    Frame is speech if its RMS energy is above adaptive threshold and zero crossing rate is not too high,
+    which filters hiss and clicks. Noise floor is updated with every silent frame, so threshold follows room noise.
+    """
+
+    SAMPLE_WIDTH = 2
+
+    def __init__(self, sample_rate, frame_seconds=0.02, energy_ratio=3.0, min_energy=300.0, max_zcr=0.4):
+        """
+        :param integer sample_rate: The sampling frequency of audio
+        :param float frame_seconds: Duration of analysed frame, default `0.02`
+        :param float energy_ratio: Ratio of frame energy to noise floor to be speech, default `3.0`
+        :param float min_energy: Minimum RMS of speech frame, default `300.0`
+        :param float max_zcr: Maximum zero crossing rate of speech frame, loud frames ignore it, default `0.4`
+        :return: __init__ should return None
+        :rtype: None
+        """
+
+        self.sample_rate = sample_rate
+        self.frame_size = int(sample_rate * frame_seconds)
+        self.frame_seconds = self.frame_size / sample_rate
+        self.energy_ratio = energy_ratio
+        self.min_energy = min_energy
+        self.max_zcr = max_zcr
+
+        self.noise_floor = min_energy / energy_ratio
+        self._remainder = np.zeros(0, dtype=np.int16)
+
+    def frames(self, audio_data):
+        """
+        Classify whole frames of audio, incomplete last frame is kept for the next call
+
+        :param bytes | memoryview audio_data: PCM data
+        :return: Array of booleans, `True` for speech frames
+        :rtype: numpy.ndarray
+        """
+
+        samples = np.frombuffer(audio_data, dtype=np.int16)
+        if self._remainder.size:
+            samples = np.concatenate([self._remainder, samples])
+        count = samples.size // self.frame_size
+        self._remainder = samples[count * self.frame_size:].copy()
+        if count == 0:
+            return np.zeros(0, dtype=bool)
+
+        frames = samples[:count * self.frame_size].reshape(count, self.frame_size).astype(np.float32)
+        energy = np.sqrt(np.mean(frames ** 2, axis=1))
+        zcr = np.mean(np.signbit(frames[:, 1:]) != np.signbit(frames[:, :-1]), axis=1)
+
+        speech = np.zeros(count, dtype=bool)
+        for i in range(count):
+            threshold = max(self.min_energy, self.noise_floor * self.energy_ratio)
+            speech[i] = energy[i] > threshold and (zcr[i] < self.max_zcr or energy[i] > 2 * threshold)
+            if not speech[i]:
+                self.noise_floor = 0.95 * self.noise_floor + 0.05 * energy[i]
+        return speech
+
+
+class Endpointer:
+    """Finds start and end of utterance in captured audio"""
+
+    def __init__(self, detector, profile, speech_frames=3):
+        """
+        :param VoiceActivityDetector detector: Detector for captured audio
+        :param ListenProfile profile: Timeouts of listening turn
+        :param integer speech_frames: Consecutive speech frames that start utterance, default `3`
+        :return: __init__ should return None
+        :rtype: None
+        """
+
+        self.detector = detector
+        self.profile = profile
+        self.speech_frames = speech_frames
+
+        self.speech_started = False
+        self.no_speech = False
+        self.duration = 0.0
+        self._speech_run = 0
+        self._silence = 0.0
+
+    def process(self, audio_data):
+        """
+        Process captured audio
+
+        :param bytes | memoryview audio_data: PCM data
+        :return: True if capture should go on, False if utterance ended or no speech started in time
+        :rtype: bool
+        """
+
+        for is_speech in self.detector.frames(audio_data):
+            self.duration += self.detector.frame_seconds
+            if is_speech:
+                self._speech_run += 1
+                self._silence = 0.0
+                if self._speech_run >= self.speech_frames:
+                    self.speech_started = True
+            else:
+                self._speech_run = 0
+                self._silence += self.detector.frame_seconds
+
+            if self.speech_started and self._silence >= self.profile.trailing_silence:
+                return False
+            if not self.speech_started and self.duration >= self.profile.leading_silence:
+                self.no_speech = True
+                return False
+            if self.duration >= self.profile.max_duration:
+                return False
+        return True
+
+
+def vad_audio_chunks(audio_chunks, sample_rate, profile, detector=None):
+    """
+    Pass captured audio through until utterance ends, source iterator is closed after
+
+    :param Iterator[bytes] audio_chunks: Iterator yields PCM data
+    :param integer sample_rate: The sampling frequency of audio
+    :param ListenProfile profile: Timeouts of listening turn
+    :param VoiceActivityDetector | None detector: Detector, created if `None`
+    :return: Yields PCM data
+    :rtype: Iterator[bytes]
+    """
+
+    endpointer = Endpointer(detector or VoiceActivityDetector(sample_rate), profile)
+    try:
+        for chunk in audio_chunks:
+            yield chunk
+            if not endpointer.process(chunk):
+                if endpointer.no_speech:
+                    logging.info("No speech in {:.1f} seconds, stopping capture".format(endpointer.duration))
+                else:
+                    logging.debug("End of utterance after {:.2f} seconds".format(endpointer.duration))
+                return
+    finally:
+        if hasattr(audio_chunks, 'close'):
+            audio_chunks.close()
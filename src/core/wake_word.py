@@ -0,0 +1,131 @@
+"""
+Wake word detection in dedicated thread, Porcupine handle is created once and reads shared capture hub
+continuously, so no audio is lost between activations and event loop is never blocked.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+
+try:
+    import pvporcupine
+except ImportError:
+    logging.warning("pvporcupine is not available, required -d mode")
+
+
+class WakeWordDetector:
+    """Runs Porcupine over captured audio in background thread and wakes up awaiting coroutines."""
+
+    def __init__(self, capture_hub, keyword='computer', sensitivity=0.6):
+        """
+        :param core.capture.CaptureHub capture_hub: Capture hub audio is read from
+        :param string keyword: Porcupine builtin keyword, default `computer`
+        :param float sensitivity: Porcupine sensitivity, default `0.6`
+        :return: __init__ should return None
+        :rtype: None
+        """
+
+        self.capture_hub = capture_hub
+        self.keyword = keyword
+        self.sensitivity = sensitivity
+
+        self.detections = 0
+        """Number of detected wake words"""
+
+        self._porcupine = None
+        self._subscription = None
+        self._thread = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._waiters = []
+
+    @property
+    def overruns(self):
+        """Number of times detector was too slow and lost audio
+
+        :rtype: int
+        """
+        return self._subscription.overruns if self._subscription is not None else 0
+
+    def start(self):
+        """Create Porcupine and start detector thread, does nothing if it is already running."""
+
+        if self._thread is not None and self._thread.is_alive():
+            return
+        if self._porcupine is None:
+            self._porcupine = pvporcupine.create(keywords=[self.keyword], sensitivities=[self.sensitivity])
+        self._stop.clear()
+        self.capture_hub.start()
+        self._subscription = self.capture_hub.subscribe(self._porcupine.sample_rate, self._porcupine.frame_length)
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        logging.info("Listening wake up word '{}'...".format(self.keyword))
+
+    def close(self):
+        """Stop detector thread and delete Porcupine."""
+
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self._porcupine is not None:
+            self._porcupine.delete()
+            self._porcupine = None
+
+    def _run(self):
+        """Detector thread processes every captured frame."""
+
+        try:
+            for pcm in self._subscription:
+                if self._stop.is_set():
+                    break
+                if self._porcupine.process(pcm) >= 0:
+                    self.detections += 1
+                    logging.info("Wake up word detected, lost audio {} times".format(self._subscription.overruns))
+                    self._notify(time.monotonic())
+        except Exception as e:
+            logging.exception("Wake word detector failed: {}".format(e))
+            self._notify(e)
+        finally:
+            self._subscription.close()
+
+    def _notify(self, result):
+        """Resolve futures of all awaiting coroutines, called from detector thread.
+
+        :param float | Exception result: Detection timestamp or error raised in awaiting coroutines
+        """
+
+        with self._lock:
+            waiters, self._waiters = self._waiters, []
+        for loop, future in waiters:
+            loop.call_soon_threadsafe(self._set_result, future, result)
+
+    @staticmethod
+    def _set_result(future, result):
+        if future.done():
+            return
+        if isinstance(result, Exception):
+            future.set_exception(result)
+        else:
+            future.set_result(result)
+
+    async def wait(self):
+        """
+        Await next wake word, detector is started if it is not running
+
+        :return: `time.monotonic()` when wake word was detected
+        :rtype: float
+        """
+
+        self.start()
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        with self._lock:
+            self._waiters.append((loop, future))
+        try:
+            return await future
+        finally:
+            with self._lock:
+                if (loop, future) in self._waiters:
+                    self._waiters.remove((loop, future))
@@ -4,5 +4,5 @@ Dialogs provides engine for dialog management
 `DialogEngine` is class provides dialog management
 """
 
-from dialogs.dialog import Dialog, DialogEngine
+from dialogs.dialog import Dialog, DialogEngine, listen_profile, next_phrases
 from dialogs.dialogList import dialogs_list
@@ -1,20 +1,16 @@
+import asyncio
+import concurrent.futures
 import datetime
 import locale
 import logging
 import random
 import sys
-import time
 
-import pymorphy2
-import requests
 from bs4 import BeautifulSoup
 
-try:
-    import RPi.GPIO as GPIO
-except ImportError:
-    logging.warning("RPi.GPIO is not available, button is disabled")
-
-from dialogs import Dialog
+from core import morph
+from core.button import ButtonService
+from dialogs import Dialog, listen_profile, next_phrases
 from init_gates.config_gate import save_config
 
 try:
@@ -40,6 +36,7 @@ class TimeDialog(Dialog):
     current_input_function = first
     name = 'Время'
     keywords = ['время', 'который']
+    examples = ['который час', 'сколько времени']
 
 
 class SetVolumeDialog(Dialog):
@@ -51,6 +48,12 @@ class SetVolumeDialog(Dialog):
         self.current_input_function = self.second
         self.need_permanent_answer = True
 
+    @next_phrases(
+        "Необходимо указать числовое значение.",
+        "Необходимо значение в промежутке от 1 до 300.",
+        "Громкость установлена.",
+    )
+    @listen_profile('value')
     def second(self, text):
         if not (value := self.to_integer(text)):
             self.objectStorage.play_speech.play(
@@ -72,6 +75,7 @@ class SetVolumeDialog(Dialog):
     current_input_function = first
     name = 'Громкость'
     keywords = ['громкость']
+    examples = ['сделай тише', 'сделай громче']
 
 
 class HelpDialog(Dialog):
@@ -90,24 +94,11 @@ class HelpDialog(Dialog):
     current_input_function = first
     name = 'Помощь'
     keywords = ['умеешь']
+    examples = ['что ты можешь', 'помощь']
 
 
 class ResetDialog(Dialog):
-    last_time_pressed = None
-    count_presses = 0
-    button_pin = 17
-    time_delay = 1.1
-
-    def callback(self, _):
-        current_time = int(time.time())
-        if self.last_time_pressed is None:
-            self.count_presses = 1
-            self.last_time_pressed = current_time
-        elif (current_time - self.last_time_pressed) < self.time_delay:
-            self.count_presses += 1
-            self.last_time_pressed = current_time
-        else:
-            self.count_presses = 0
+    confirm_timeout = 15
 
     def reset_speaker(self):
         self.objectStorage.play_speech.play("Восстанавливаю заводские настройки.", cache=True)
@@ -121,19 +112,18 @@ class ResetDialog(Dialog):
         self.objectStorage.play_speech.play(
             "Для поддтверждения сброса колонки нажмите трижды на кнопку или один раз для отмены.", cache=True
         )
-        GPIO.setmode(GPIO.BCM)
-        GPIO.setup(self.button_pin, GPIO.IN, GPIO.PUD_UP)
-        GPIO.add_event_detect(self.button_pin, GPIO.FALLING, callback=self.callback, bouncetime=250)
-        while True:
-            if self.count_presses >= 3:
+        gesture = asyncio.run_coroutine_threadsafe(
+            self.objectStorage.button.wait({ButtonService.SHORT, ButtonService.TRIPLE}),
+            self.objectStorage.event_loop
+        )
+        try:
+            if gesture.result(self.confirm_timeout)[0] == ButtonService.TRIPLE:
                 return self.reset_speaker()
-            if self.last_time_pressed and self.count_presses == 1 and \
-                    (int(time.time()) - self.last_time_pressed) > self.time_delay:
-                GPIO.remove_event_detect(self.button_pin)
-                self.objectStorage.play_speech.play(
-                    "Отменено.", cache=True
-                )
-                return
+        except concurrent.futures.TimeoutError:
+            gesture.cancel()
+        self.objectStorage.play_speech.play(
+            "Отменено.", cache=True
+        )
 
     current_input_function = first
     name = 'Сброс до заводских настроек'
@@ -141,9 +131,8 @@ class ResetDialog(Dialog):
 
 
 class AnekDialog(Dialog):
-    @staticmethod
-    def get_anek():
-        answer = requests.get('https://baneks.ru/random')
+    def get_anek(self):
+        answer = self.objectStorage.http.get('https://baneks.ru/random')
         if not answer.ok:
             logging.error("Error load anek connection, {}, {}".format(answer.status_code, answer.text[:100]))
             return
@@ -159,6 +148,7 @@ class AnekDialog(Dialog):
     current_input_function = first
     name = "Анекдот"
     keywords = ["анек"]
+    examples = ['расскажи анекдот', 'пошути']
 
 
 class WeatherDialog(Dialog):
@@ -166,20 +156,18 @@ class WeatherDialog(Dialog):
         payload = {
             'q': self.objectStorage.city, 'appid': self.objectStorage.weather_token, 'lang': 'RU', 'units': 'metric'
         }
-        answer = requests.get('https://api.openweathermap.org/data/2.5/weather', params=payload)
+        answer = self.objectStorage.http.get('https://api.openweathermap.org/data/2.5/weather', params=payload)
         if answer.ok:
             return answer.json()
 
     def generate_phrase(self):
         if not (weather_data := self.get_weather_data()):
             return
-        morph = pymorphy2.MorphAnalyzer()
-
-        city = morph.parse(weather_data.get('name'))[0].inflect({'loct'}).word
+        city = morph.inflect(weather_data.get('name'), 'loct')
         int_degrees = int(weather_data.get('main', {}).get('temp'))
-        degrees = morph.parse('градус')[0].make_agree_with_number(int_degrees).word
+        degrees = morph.agree_with_number('градус', int_degrees)
         int_degrees_max = int(weather_data.get('main', {}).get('temp_max'))
-        degrees_max = morph.parse('градус')[0].make_agree_with_number(int_degrees_max).word
+        degrees_max = morph.agree_with_number('градус', int_degrees_max)
         description = weather_data.get('weather')[0].get('description')
 
         return "В {city} сейчас {description}, {int_degrees} ".format(
@@ -197,6 +185,7 @@ class WeatherDialog(Dialog):
     current_input_function = first
     name = "Погода"
     keywords = ['погод']
+    examples = ['сколько градусов на улице']
 
 
 class HowAreYouDialog(Dialog):
@@ -238,3 +227,4 @@ class HowAreYouDialog(Dialog):
     current_input_function = first
     name = "Как дела"
     keywords = [('как', 'дела'), ('как', 'ты')]
+    examples = ['как у тебя дела']
@@ -2,10 +2,44 @@ import asyncio
 import functools
 import json
 import logging
+import threading
 import time
-from collections import deque
 
-import requests
+from dialogs.intent_classifier import IntentClassifier
+from dialogs.keyword_index import KeywordIndex
+from dialogs.scheduler import DialogScheduler
+
+
+def next_phrases(*phrases):
+    """Decorator for dialog input function, declares phrases that function may play.
+    They are synthesized in background while user is answering, so the answer plays from cache.
+
+    :param string phrases: Phrases played with `cache=True`
+    :return: Decorator
+    :rtype: function
+    """
+
+    def decorator(f):
+        f.next_phrases = phrases
+        return f
+
+    return decorator
+
+
+def listen_profile(profile):
+    """Decorator for dialog input function, declares how answer is listened, e.g. short yes/no answer
+    is ended soon after speech ends.
+
+    :param string profile: Name of profile from `core.vad.LISTEN_PROFILES`
+    :return: Decorator
+    :rtype: function
+    """
+
+    def decorator(f):
+        f.listen_profile = profile
+        return f
+
+    return decorator
 
 
 class Dialog:
@@ -16,14 +50,22 @@ class Dialog:
         name (string)                Name for logging
         keywords (list[str])         List of strings that are keywords to start dialog by keyword
         need_permanent_answer (bool) If true sound processor listen will permanently activate after one dialog func
+        examples (list[str])         Example phrases that start dialog, used to choose it if no keyword matched
         stop_words (list[str])       List of strings with stop words for dialog
+        default_listen_profile (str) Listen profile for input functions without `listen_profile` decorator
+        priority (int)               Priority of dialog in queue, the higher is started earlier
+        queue_timeout (int | float)  Seconds dialog should wait in queue at most, orders dialogs of same priority
     """
 
     current_input_function = None
     name = 'default'
     keywords = []
+    examples = []
     need_permanent_answer = False
     stop_words = ['хватит', 'стоп']
+    default_listen_profile = 'default'
+    priority = 0
+    queue_timeout = 600
 
     def __init__(self, object_storage):
         """
@@ -33,11 +75,14 @@ class Dialog:
             raise TypeError("Name must be string")
         if not isinstance(self.keywords, list):
             raise TypeError("Keywords must be a list")
+        if not isinstance(self.examples, list):
+            raise TypeError("Examples must be a list")
         if not isinstance(self.stop_words, list):
             raise TypeError("stop_words must be a list")
         self.stop_words = [i.lower() for i in self.stop_words]
 
         self.objectStorage = object_storage
+        self._held_submissions = []
 
     def process_input(self, text: str):
         """Processes input text with current dialog or stops dialog"""
@@ -68,17 +113,22 @@ class Dialog:
     def __str__(self):
         return self.name
 
-    def fetch_data(self, request_type, *args, **kwargs):
-        """Represents request to server and handles errors
+    def fetch_data(self, request_type, url, **kwargs):
+        """Represents request to server and handles errors, GET answers of cached endpoints may be from cache
 
-        :param string request_type: Must be `requests` method, like `get` or `post`
+        :param string request_type: Must be HTTP method, like `get` or `post`
+        :param string url: Full URL
         :return: Answer json as python object or empty list if invalid json and None if request failed
         :rtype: dict | list | None
         """
-        if not hasattr(requests, request_type):
-            raise ValueError("`request_type` must be `requests` method, like `get` or `post`")
+        if request_type not in self.objectStorage.http.METHODS:
+            raise ValueError("`request_type` must be HTTP method, like `get` or `post`")
 
-        answer = getattr(requests, request_type)(*args, **kwargs)
+        if request_type == 'get':
+            answer = self.objectStorage.response_cache.get(url, **kwargs)
+        else:
+            answer = self.objectStorage.http.request(request_type, url, **kwargs)
+            self.objectStorage.response_cache.invalidate_url(url)
         if answer.ok:
             try:
                 return answer.json()
@@ -91,6 +141,57 @@ class Dialog:
                 "Error in requests, status code: '{}', answer: '{}'".format(
                     answer.status_code, answer.text[:100]))
 
+    def submit_data(self, request_type, url, data, batch_field=None):
+        """Store submission to server in outbox, it is sent in background and retried while server is unreachable.
+        Submissions with `batch_field` and all following submissions of dialog are held until dialog is done,
+        so its values are sent as one request followed by status updates.
+
+        :param string request_type: Must be HTTP method, like `post` or `patch`
+        :param string url: Full URL
+        :param dict data: Json body
+        :param string | None batch_field: Name of list in body that may be joined with other submissions to
+            the same URL, default `None`
+        :return: Idempotency key of submission
+        :rtype: string
+        """
+        if request_type not in self.objectStorage.http.METHODS or request_type == 'get':
+            raise ValueError("`request_type` must be HTTP method that changes data, like `post` or `patch`")
+
+        hold = batch_field is not None or bool(self._held_submissions)
+        key = self.objectStorage.outbox.submit(
+            request_type, url, data, batch_field,
+            hold=self.objectStorage.config.get('submission_window', 60) if hold else 0.0
+        )
+        if hold:
+            self._held_submissions.append(key)
+        self.objectStorage.response_cache.invalidate_url(url)
+        return key
+
+    def release_submissions(self):
+        """Send submissions held by `submit_data()`, called when dialog is done."""
+
+        if self._held_submissions:
+            self.objectStorage.outbox.release(self._held_submissions)
+            self._held_submissions = []
+
+    def hint_next_phrases(self, *phrases):
+        """Declare phrases that next dialog step may play, for phrases known only at runtime
+
+        :param string phrases: Phrases played with `cache=True`
+        :rtype: None
+        """
+
+        self.objectStorage.play_speech.prefetch(phrases)
+
+    def hint_next_template(self, template, *args, **kwargs):
+        """Declare template that next dialog step may play with `play_template()`
+
+        :param string template: Template in `str.format()` syntax
+        :rtype: None
+        """
+
+        self.objectStorage.play_speech.prefetch_template(template, *args, **kwargs)
+
     @staticmethod
     def to_integer(text):
         """
@@ -183,19 +284,43 @@ class DialogEngine:
         logging.info("Creating DialogEngine, with %d dialogs", len(dialogs))
         self.objectStorage = object_storage
         self.dialogs = dialogs
-        self.dialogQueue = deque()
+        self.scheduler = DialogScheduler()
         self.currentDialog = None
         self.time_delay = 50
         self.cur_dialog_time = None
-        self.execute_dialog_task = self.objectStorage.event_loop.create_task(self._check_if_task_is_out())
+        self.keyword_index = KeywordIndex(self._dialogs_keywords_list)
+        self.intent_classifier = IntentClassifier(
+            self._dialogs_keywords_list + [
+                (example.strip().lower(), dialog) for dialog in self.dialogs for example in dialog.examples
+            ],
+            threshold=self.objectStorage.config.get('intent_threshold', 0.7),
+            margin=self.objectStorage.config.get('intent_margin', 0.1)
+        )
+        self._lock = threading.RLock()
+        self._wake = asyncio.Event()
+        self.execute_dialog_task = self.objectStorage.event_loop.create_task(self._run_scheduler())
 
-    async def _check_if_task_is_out(self):
-        """Execute next dialog every 60 seconds"""
+    async def _run_scheduler(self):
+        """Start queued dialog as soon as current dialog is done or expired"""
 
         while True:
-            logging.debug("Check if dialog is done.")
-            self._execute_next_dialog()
-            await asyncio.sleep(60)
+            self._wake.clear()
+            if self.scheduler and self._is_current_dialog_none():
+                await self.objectStorage.event_loop.run_in_executor(None, self._execute_next_dialog)
+                continue
+
+            timeout = None
+            if self.scheduler and self.cur_dialog_time is not None:
+                timeout = max(0.0, self.cur_dialog_time + self.time_delay - time.time())
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    def _wake_scheduler(self):
+        """Make scheduler check queue, can be called from any thread"""
+
+        self.objectStorage.event_loop.call_soon_threadsafe(self._wake.set)
 
     @functools.cached_property
     def _dialogs_keywords_list(self):
@@ -220,12 +345,13 @@ class DialogEngine:
         return dialogs_list
 
     def _execute_next_dialog(self):
-        if self._is_current_dialog_none() and self.dialogQueue:
-            logging.debug("Trying to get dialog from queue")
-            self.currentDialog, text = self.dialogQueue.popleft()
-            logging.debug("Got dialog from queue")
-            self.cur_dialog_time = time.time()
-            self.process_input(text)
+        with self._lock:
+            if self._is_current_dialog_none() and self.scheduler:
+                self.currentDialog, text = self.scheduler.pop()
+                logging.debug("Got dialog {} from queue, queue stats {}".format(
+                    self.currentDialog, self.scheduler.stats()))
+                self.cur_dialog_time = time.time()
+                self.process_input(text)
 
     def _is_current_dialog_none(self):
         """if current dialog None or timed out with `self.time_delay` return True
@@ -237,28 +363,29 @@ class DialogEngine:
             return True
         else:
             if (time.time() - self.cur_dialog_time) > self.time_delay:
+                self.currentDialog.release_submissions()
                 self.currentDialog = None
                 return True
             else:
                 return False
 
     def add_dialog_to_queue(self, dialog, text=''):
-        """If there is current dialog, inputted dialog will be executed later, else immediately
+        """Put dialog into queue, it is started as soon as there is no current dialog
 
+        :param Dialog dialog: Dialog instance, its `priority` and `queue_timeout` define its place in queue
+        :param string text: Input text for the first dialog function
         :rtype: None
         """
 
-        if self._is_current_dialog_none():
-            self.cur_dialog_time = time.time()
-            self.currentDialog = dialog
-            self.process_input(text)
-        else:
-            logging.debug("Putting dialog {} into queue".format(dialog))
-            self.dialogQueue.append((dialog, text))
-            logging.debug("Put dialog {} into queue".format(dialog))
-            self._execute_next_dialog()
+        logging.debug("Putting dialog {} into queue".format(dialog))
+        self.scheduler.push(dialog, text, dialog.priority, time.time() + dialog.queue_timeout)
+        self._wake_scheduler()
 
     def process_input(self, text: str):
+        with self._lock:
+            return self._process_input(text)
+
+    def _process_input(self, text):
         logging.debug("Processing input in DialogEngine")
 
         if self._is_current_dialog_none():
@@ -278,13 +405,37 @@ class DialogEngine:
             self.currentDialog, self.currentDialog.is_done))
 
         if self.currentDialog.is_done:
+            self.currentDialog.release_submissions()
             self.currentDialog = None
         else:
             self.cur_dialog_time = time.time()
+            self._prefetch_next_phrases(self.currentDialog)
             if self.currentDialog.need_permanent_answer:
                 return True
 
-        self._execute_next_dialog()
+        self._wake_scheduler()
+
+    @property
+    def listen_profile(self):
+        """Name of listen profile for the next user input
+
+        :rtype: str
+        """
+
+        if self.currentDialog is None or self.currentDialog.current_input_function is None:
+            return 'default'
+        return getattr(
+            self.currentDialog.current_input_function, 'listen_profile', self.currentDialog.default_listen_profile)
+
+    def _prefetch_next_phrases(self, dialog):
+        """Synthesize phrases declared with `next_phrases` by next input function of dialog
+
+        :param Dialog dialog: Dialog instance waiting for input
+        :rtype: None
+        """
+
+        if phrases := getattr(dialog.current_input_function, 'next_phrases', None):
+            self.objectStorage.play_speech.prefetch(phrases)
 
     def _get_dialog_instance(self, dialog, keyword, text):
         """
@@ -325,12 +476,12 @@ class DialogEngine:
             logging.warning('Got empty text in `DialogEngine._chose_dialog_processor()`')
             return
 
-        def k_in_text(k: str) -> bool:
-            return k in text
+        if match := self.keyword_index.match(text):
+            keyword, dialog = match
+            return self._get_dialog_instance(dialog, keyword, text)
 
-        for keyword, dialog in self._dialogs_keywords_list:
-            if ' ' in keyword:
-                if all(map(k_in_text, keyword.split())):
-                    return self._get_dialog_instance(dialog, keyword, text)
-            elif keyword in text:
-                return self._get_dialog_instance(dialog, keyword, text)
+        if match := self.intent_classifier.classify(text):
+            phrase, dialog, score = match
+            logging.info("No keyword in '{}', chose dialog {} by similarity {:.2f} to '{}'".format(
+                text, dialog, score, phrase))
+            return self._get_dialog_instance(dialog, phrase, text)
@@ -0,0 +1,108 @@
+"""
+Fuzzy intent classifier, fallback for texts where no keyword matches exactly, e.g. because of recognition error.
+Words are compared by character n-grams, all phrases are scored at once with matrix products.
+"""
+
+import numpy as np
+
+
+def char_ngrams(word, n=2):
+    """
+    Character n-grams of word, padded with space at start, so n-grams of word start differ
+
+    :param string word: Lowercase word
+    :param integer n: Length of n-gram, default `2`
+    :rtype: set[str]
+    """
+
+    padded = ' ' + word
+    return {padded[i:i + n] for i in range(max(1, len(padded) - n + 1))}
+
+
+class IntentClassifier:
+    """Scores text against keyword and example phrases.
+
+    Every phrase word is compared with every text word by share of its n-grams found in text word, so
+    keyword stems match inflected words. Phrase score is mean of the best scores of its words. Match is accepted if
+    score is above `threshold` and better than score of any other value by `margin`, so ambiguous texts are not
+    classified. Phrase does not compete with phrases whose words are its subset.
+    """
+
+    def __init__(self, phrases, n=2, threshold=0.7, margin=0.1):
+        """
+        :param list[tuple[str, Any]] phrases: Phrases and their values, e.g. keyword stems separated by space
+        :param integer n: Length of n-gram, default `2`
+        :param float threshold: Minimal score of accepted match from 0 to 1, default `0.7`
+        :param float margin: Minimal difference with score of the best other value, default `0.1`
+        :return: __init__ should return None
+        :rtype: None
+        """
+
+        self.n = n
+        self.threshold = threshold
+        self.margin = margin
+        self.phrases = phrases
+
+        self._phrase_words = [frozenset(phrase.split()) for phrase, _ in phrases]
+        words = sorted(set().union(*self._phrase_words))
+        word_index = {word: i for i, word in enumerate(words)}
+        word_grams = [char_ngrams(word, n) for word in words]
+        self.vocabulary = {gram: i for i, gram in enumerate(sorted(set().union(*word_grams)))}
+
+        self._word_matrix = np.zeros((len(words), len(self.vocabulary)), dtype=np.float32)
+        for row, grams in enumerate(word_grams):
+            self._word_matrix[row, [self.vocabulary[gram] for gram in grams]] = 1
+        self._word_sizes = self._word_matrix.sum(axis=1)
+
+        self._phrase_matrix = np.zeros((len(phrases), len(words)), dtype=np.float32)
+        for row, phrase_words in enumerate(self._phrase_words):
+            self._phrase_matrix[row, [word_index[word] for word in phrase_words]] = 1 / max(len(phrase_words), 1)
+
+        values = []
+        for _, value in phrases:
+            if value not in values:
+                values.append(value)
+        self._value_index = np.array([values.index(value) for _, value in phrases], dtype=np.intp)
+
+    def scores(self, text):
+        """
+        Score of every phrase
+
+        :param string text: Lowercase text
+        :return: Scores from 0 to 1 in order of phrases
+        :rtype: numpy.ndarray
+        """
+
+        text_words = text.split()
+        if not text_words or not self.phrases:
+            return np.zeros(len(self.phrases), dtype=np.float32)
+
+        text_matrix = np.zeros((len(text_words), len(self.vocabulary)), dtype=np.float32)
+        for row, word in enumerate(text_words):
+            grams = [self.vocabulary[gram] for gram in char_ngrams(word, self.n) if gram in self.vocabulary]
+            text_matrix[row, grams] = 1
+
+        word_scores = (self._word_matrix @ text_matrix.T).max(axis=1) / self._word_sizes
+        return self._phrase_matrix @ word_scores
+
+    def classify(self, text):
+        """
+        Best matching phrase if it is confident
+
+        :param string text: Lowercase text
+        :return: Phrase, its value and score, or None if no phrase is confident
+        :rtype: tuple[str, Any, float] | None
+        """
+
+        scores = self.scores(text)
+        if not scores.size:
+            return
+        best = int(np.argmax(scores))
+        if scores[best] < self.threshold:
+            return
+
+        for other in np.flatnonzero(self._value_index != self._value_index[best]):
+            if scores[best] - scores[other] < self.margin and not self._phrase_words[other] < self._phrase_words[best]:
+                return
+        phrase, value = self.phrases[best]
+        return phrase, value, float(scores[best])
@@ -0,0 +1,101 @@
+"""
+Keyword index for choosing dialog by recognized text. All keyword stems of all dialogs are compiled into one
+Aho–Corasick automaton, so text is scanned once regardless of number of keywords.
+"""
+
+from collections import deque
+
+
+class KeywordIndex:
+    """Aho–Corasick automaton over keyword stems, chooses the best matching keyword phrase.
+
+    Keyword phrase matches if all of its stems occur in text. Candidates are compared by number of stems,
+    then by stems found at word start, then by number of covered characters, and list order breaks ties.
+    So a short stem found inside another word, like 'нов' in 'снова', loses to more specific matches.
+    """
+
+    def __init__(self, keywords):
+        """
+        :param list[tuple[str, Any]] keywords: Keyword phrases, stems are separated with space, and their values
+        :return: __init__ should return None
+        :rtype: None
+        """
+
+        self.keywords = [(keyword.split(), value) for keyword, value in keywords]
+
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [[]]
+        self._keywords_by_stem = {}
+        for order, (stems, _) in enumerate(self.keywords):
+            for stem in stems:
+                self._add(stem)
+                self._keywords_by_stem.setdefault(stem, set()).add(order)
+        self._build_fail_links()
+
+    def _add(self, stem):
+        node = 0
+        for char in stem:
+            if char not in self._goto[node]:
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+                self._goto[node][char] = len(self._goto) - 1
+            node = self._goto[node][char]
+        if stem not in self._output[node]:
+            self._output[node].append(stem)
+
+    def _build_fail_links(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fail = self._fail[node]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(char, 0)
+                self._output[child] = self._output[child] + self._output[self._fail[child]]
+
+    def search(self, text):
+        """
+        Find all occurrences of stems in one pass
+
+        :param string text: Lowercase text
+        :return: Stems and positions of their first characters
+        :rtype: Iterator[tuple[str, int]]
+        """
+
+        goto, fail, output = self._goto, self._fail, self._output
+        node = 0
+        for i, char in enumerate(text):
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            if output[node]:
+                for stem in output[node]:
+                    yield stem, i - len(stem) + 1
+
+    def match(self, text):
+        """
+        Best matching keyword phrase
+
+        :param string text: Lowercase text
+        :return: Keyword phrase with stems separated by space and its value, or None if nothing matches
+        :rtype: tuple[str, Any] | None
+        """
+
+        found = {}
+        for stem, start in self.search(text):
+            at_word_start = start == 0 or not text[start - 1].isalnum()
+            found[stem] = found.get(stem, False) or at_word_start
+
+        best, best_score = None, None
+        for order in set().union(*(self._keywords_by_stem[stem] for stem in found)):
+            stems, value = self.keywords[order]
+            if not all(stem in found for stem in stems):
+                continue
+            score = (len(stems), sum(found[stem] for stem in stems), sum(len(stem) for stem in stems), -order)
+            if best_score is None or score > best_score:
+                best, best_score = (' '.join(stems), value), score
+        return best
@@ -1,7 +1,6 @@
-import json
 import logging
 
-from dialogs import Dialog
+from dialogs import Dialog, listen_profile, next_phrases
 
 categories = [
     [['пульс', 'средеч'], {
@@ -282,6 +281,11 @@ class AddValueDialog(Dialog):
 
         self.need_permanent_answer = True
 
+    @next_phrases(
+        "Произнесите значение",
+        "Категория нераспознана, пожалуйста, назовите категорию еще раз",
+        "Пожалуйста, произнесите значение систолическое (верхнего) артериального давления в покое.",
+    )
     def second(self, text):
         self.category = None
 
@@ -305,6 +309,12 @@ class AddValueDialog(Dialog):
         self.current_input_function = self.process_pressure_second
         self.need_permanent_answer = True
 
+    @next_phrases(
+        "Значение не распознано, пожалуйста, произнесите его еще раз",
+        "Значение успешно отправлено.",
+        "Пожалуйста, произнесите значение, диастолического (нижнего) артериальное давления.",
+    )
+    @listen_profile('value')
     def process_pressure_second(self, text):
         value = self.to_integer(text)
         if value is None:
@@ -315,15 +325,17 @@ class AddValueDialog(Dialog):
             self.need_permanent_answer = True
             return
 
-        if self.fetch_data(
-                'post',
-                self.objectStorage.host_http + 'measurement/push/',
-                json={
-                    'token': self.objectStorage.token,
-                    'values': [{'category_name': 'systolic_pressure', 'value': value}]
-                }):
-            self.objectStorage.play_speech.play(
-                "Значение успешно отправлено.", cache=True)
+        self.submit_data(
+            'post',
+            self.objectStorage.host_http + 'measurement/push/',
+            {
+                'token': self.objectStorage.token,
+                'values': [{'category_name': 'systolic_pressure', 'value': value}]
+            },
+            batch_field='values'
+        )
+        self.objectStorage.play_speech.play(
+            "Значение успешно отправлено.", cache=True)
 
         self.objectStorage.play_speech.play(
             "Пожалуйста, произнесите значение, диастолического (нижнего) артериальное давления.", cache=True
@@ -331,6 +343,8 @@ class AddValueDialog(Dialog):
         self.current_input_function = self.process_pressure_third
         self.need_permanent_answer = True
 
+    @next_phrases("Значение не распознано, пожалуйста, произнесите его еще раз", "Значение успешно отправлено.")
+    @listen_profile('value')
     def process_pressure_third(self, text):
         value = self.to_integer(text)
         if value is None:
@@ -341,16 +355,20 @@ class AddValueDialog(Dialog):
             self.need_permanent_answer = True
             return
 
-        if self.fetch_data(
-                'post',
-                self.objectStorage.host_http + 'measurement/push/',
-                json={
-                    'token': self.objectStorage.token,
-                    'values': [{'category_name': 'diastolic_pressure', 'value': value}]
-                }):
-            self.objectStorage.play_speech.play(
-                "Значение успешно отправлено.", cache=True)
+        self.submit_data(
+            'post',
+            self.objectStorage.host_http + 'measurement/push/',
+            {
+                'token': self.objectStorage.token,
+                'values': [{'category_name': 'diastolic_pressure', 'value': value}]
+            },
+            batch_field='values'
+        )
+        self.objectStorage.play_speech.play(
+            "Значение успешно отправлено.", cache=True)
 
+    @next_phrases("Значение не распознано, пожалуйста, произнесите его еще раз")
+    @listen_profile('value')
     def third(self, text):
         type_m = self.category.get('request_type', '') \
                  + self.category.get('value_type', '')
@@ -379,49 +397,53 @@ class AddValueDialog(Dialog):
             self.need_permanent_answer = True
             return
 
-        self.objectStorage.play_speech.play("Вы ввели - " + str(value) + ". Отправить значение?")
+        self.objectStorage.play_speech.play_template("Вы ввели - {}. Отправить значение?", value)
         self.value = value
         self.current_input_function = self.fourth
         self.need_permanent_answer = True
 
+    @next_phrases("Значение успешно отправлено.", "Произнесите значение еще раз.")
+    @listen_profile('yes_no')
     def fourth(self, text):
         if self.is_positive(text):
-            if self.fetch_data(
-                    'post',
-                    self.objectStorage.host_http + 'measurement/push/',
-                    json={
-                        'token': self.objectStorage.token,
-                        'values': [{
-                            'category_name': self.category.get('name', '') + self.category.get('category', ''),
-                            'value': self.value
-                        }]
-                    }):
-                self.objectStorage.play_speech.play(
-                    "Значение успешно отправлено.", cache=True)
+            self.submit_data(
+                'post',
+                self.objectStorage.host_http + 'measurement/push/',
+                {
+                    'token': self.objectStorage.token,
+                    'values': [{
+                        'category_name': self.category.get('name', '') + self.category.get('category', ''),
+                        'value': self.value
+                    }]
+                },
+                batch_field='values'
+            )
+            self.objectStorage.play_speech.play(
+                "Значение успешно отправлено.", cache=True)
 
             if hasattr(self, 'data') and len(self.data['fields']) > 0:
                 return self.yes_no('да')
             if hasattr(self, 'ws'):
-                self.objectStorage.event_loop.create_task(
-                    self.ws.send(json.dumps({
-                        'token': self.objectStorage.token,
-                        'request_type': 'is_done',
-                        'measurement_id': self.data['id'],
-                    })))
+                self.send_ws_data({
+                    'token': self.objectStorage.token,
+                    'request_type': 'is_done',
+                    'measurement_id': self.data['id'],
+                })
         elif self.is_negative(text):
             self.objectStorage.play_speech.play("Произнесите значение еще раз.", cache=True)
             self.value = None
             self.current_input_function = self.third
             self.need_permanent_answer = True
         else:
-            self.objectStorage.play_speech.play(
-                "Извините, я вас не очень понял. Записать значение {}?".format(str(self.value)), cache=True)
+            self.objectStorage.play_speech.play_template(
+                "Извините, я вас не очень понял. Записать значение {}?", self.value)
             self.current_input_function = self.fourth
             self.need_permanent_answer = True
 
     current_input_function = first
     name = 'Отправить значение измерения'
     keywords = ['измерени']
+    examples = ['записать значение измерения']
 
 
 class CommitFormsDialog(Dialog):
@@ -446,10 +468,10 @@ class CommitFormsDialog(Dialog):
 
     def first_t(self, _):
         if self.current is not None:
-            self.fetch_data(
+            self.submit_data(
                 'patch',
                 self.objectStorage.host_http + 'measurement/',
-                json={
+                {
                     'token': self.objectStorage.token,
                     'request_type': 'is_done',
                     'measurement_id': self.current['id']
@@ -464,25 +486,32 @@ class CommitFormsDialog(Dialog):
             self.objectStorage.play_speech.play(measurement_description + " Вы готовы произнести ответ сейчас?")
 
             if not self.current.get('is_sent'):
-                self.fetch_data(
+                self.submit_data(
                     'patch',
                     self.objectStorage.host_http + 'measurement/',
-                    json={
+                    {
                         'token': self.objectStorage.token,
                         'request_type': 'is_sent',
                         'measurement_id': self.current['id']
                     })
+            if self.current.get('fields'):
+                self.hint_next_template("Произнесите значение {}", self.current['fields'][0].get('text'))
             self.current_input_function = self.yes_no
             self.need_permanent_answer = True
         else:
             self.objectStorage.play_speech.play(
                 "Спасибо за заполнение опросника", cache=True)
 
+    @next_phrases(
+        "Введите значение позже с помощию команды 'запистать значение'",
+        "Извините, я вас не очень понял",
+    )
+    @listen_profile('yes_no')
     def yes_no(self, text):
         if self.is_positive(text):
             self.category = self.current['fields'].pop(0)
-            self.objectStorage.play_speech.play(
-                "Произнесите значение {}".format(self.category.get('text')))
+            self.objectStorage.play_speech.play_template(
+                "Произнесите значение {}", self.category.get('text'))
             self.current_input_function = self.third
             self.need_permanent_answer = True
             return
@@ -498,6 +527,12 @@ class CommitFormsDialog(Dialog):
             self.need_permanent_answer = True
             return
 
+    @next_phrases(
+        "Значение не распознано, пожалуйста, произнесите его еще раз",
+        "Значение успешно отправлено.",
+        "Спасибо за заполнение опросника",
+    )
+    @listen_profile('value')
     def third(self, text):
         type_m = self.category.get('request_type', '') \
                  + self.category.get('value_type', '')
@@ -522,18 +557,20 @@ class CommitFormsDialog(Dialog):
                 " произнесите его еще раз", cache=True)
             return
 
-        if self.fetch_data(
-                'post',
-                self.objectStorage.host_http + 'measurement/push/',
-                json={
-                    'token': self.objectStorage.token,
-                    'values': [{
-                        'category_name': self.category.get('name', '') + self.category.get('category', ''),
-                        'value': value
-                    }]
-                }):
-            self.objectStorage.play_speech.play(
-                "Значение успешно отправлено.", cache=True)
+        self.submit_data(
+            'post',
+            self.objectStorage.host_http + 'measurement/push/',
+            {
+                'token': self.objectStorage.token,
+                'values': [{
+                    'category_name': self.category.get('name', '') + self.category.get('category', ''),
+                    'value': value
+                }]
+            },
+            batch_field='values'
+        )
+        self.objectStorage.play_speech.play(
+            "Значение успешно отправлено.", cache=True)
 
         if len(self.current['fields']) > 0:
             return self.yes_no('да')
@@ -543,3 +580,4 @@ class CommitFormsDialog(Dialog):
     current_input_function = first
     name = 'Заполнить незаполненные опросники'
     keywords = ['заполни', 'опросник']
+    examples = ['заполнить опросники']
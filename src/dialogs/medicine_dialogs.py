@@ -1,4 +1,4 @@
-from dialogs import Dialog
+from dialogs import Dialog, listen_profile, next_phrases
 
 
 class CheckMedicinesDialog(Dialog):
@@ -23,9 +23,9 @@ class CheckMedicinesDialog(Dialog):
     def first_t(self, _):
         if self.data:
             self.current = self.data.pop(0)
-            self.objectStorage.play_speech.play(
-                "Вам необходимо принять препарат {}. {}. ".format(self.current['title'], self.current['rules']) +
-                "Подтвердите, вы приняли препарат?"
+            self.objectStorage.play_speech.play_template(
+                "Вам необходимо принять препарат {}. {}. Подтвердите, вы приняли препарат?",
+                self.current['title'], self.current['rules']
             )
             if not self.current['is_sent']:
                 self.commit_medicine_status('is_sent')
@@ -37,21 +37,28 @@ class CheckMedicinesDialog(Dialog):
             )
 
     def commit_medicine_status(self, request_type: str):
-        self.fetch_data(
+        self.submit_data(
             'patch',
             self.objectStorage.host_http + 'medicine/',
-            json={
+            {
                 'token': self.objectStorage.token,
                 'request_type': request_type,
                 'measurement_id': self.current.get('id')
             })
 
+    @next_phrases(
+        "Отлично!",
+        "Спасибо за заполнение уведомление о выпитых препаратах.",
+        "Подтвердите прием позже с помощью комманды 'какие лекарства необходимо принять'.",
+        "Извините, я вас не очень понял.",
+    )
+    @listen_profile('yes_no')
     def yes_no(self, text):
         if self.is_positive(text):
-            self.fetch_data(
+            self.submit_data(
                 'post',
                 self.objectStorage.host_http + 'medicine/commit/',
-                json={
+                {
                     "token": self.objectStorage.token,
                     "medicine": self.current.get('title')
                 }
@@ -71,6 +78,7 @@ class CheckMedicinesDialog(Dialog):
     current_input_function = first
     name = 'Неприятные лекарства'
     keywords = [('лекарств', 'принят', 'необходимо'), ('препарат', 'принят')]
+    examples = ['какие лекарства мне нужно принять']
 
 
 class CommitMedicineDialog(Dialog):
@@ -79,7 +87,7 @@ class CommitMedicineDialog(Dialog):
     def first(self, text):
         if text != '':
             self.medicine = text
-            self.objectStorage.play_speech.play("Вы приняли лекарство {}, верно?".format(text))
+            self.objectStorage.play_speech.play_template("Вы приняли лекарство {}, верно?", text)
             self.current_input_function = self.yes_no
             self.need_permanent_answer = True
         else:
@@ -89,15 +97,18 @@ class CommitMedicineDialog(Dialog):
 
     def second(self, text):
         value = text
-        if self.fetch_data(
-                'post',
-                self.objectStorage.host_http + 'medicine/commit/',
-                json={
-                    "token": self.objectStorage.token,
-                    "medicine": value
-                }):
-            self.objectStorage.play_speech.play("Отлично, лекарство {} отмечено.".format(value))
+        self.submit_data(
+            'post',
+            self.objectStorage.host_http + 'medicine/commit/',
+            {
+                "token": self.objectStorage.token,
+                "medicine": value
+            }
+        )
+        self.objectStorage.play_speech.play_template("Отлично, лекарство {} отмечено.", value)
 
+    @next_phrases("Какое лекарство вы приняли?")
+    @listen_profile('yes_no')
     def yes_no(self, text):
         if self.is_positive(text):
             return self.second(self.medicine)
@@ -111,3 +122,4 @@ class CommitMedicineDialog(Dialog):
     current_input_function = first
     name = 'Подтверждение лекарства'
     keywords = [('подтверд', 'лекарств'), ('принят', 'лекарств')]
+    examples = ['подтверди прием']
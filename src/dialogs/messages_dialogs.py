@@ -1,7 +1,7 @@
-import pymorphy2
 from dateutil import parser
 
-from dialogs import Dialog
+from core import morph
+from dialogs import Dialog, listen_profile, next_phrases
 
 
 class SendMessageDialog(Dialog):
@@ -13,6 +13,7 @@ class SendMessageDialog(Dialog):
         self.current_input_function = self.get_message
         self.need_permanent_answer = True
 
+    @listen_profile('message')
     def get_message(self, text):
         self.objectStorage.play_speech.play(
             "Вы написали: " + text + ". Отправить сообщение?")
@@ -20,23 +21,28 @@ class SendMessageDialog(Dialog):
         self.message = text.title()
         self.need_permanent_answer = True
 
+    @next_phrases("Сообщение успешно отправлено!", "Хотите продиктовать сообщение повторно?")
+    @listen_profile('yes_no')
     def submit(self, text):
         if self.is_positive(text):
-            if self.fetch_data(
-                    'post',
-                    self.objectStorage.host_http + "message/send/",
-                    json={
-                        'token': self.objectStorage.token,
-                        'message': self.message,
-                    }):
-                self.objectStorage.play_speech.play(
-                    "Сообщение успешно отправлено!", cache=True)
+            self.submit_data(
+                'post',
+                self.objectStorage.host_http + "message/send/",
+                {
+                    'token': self.objectStorage.token,
+                    'message': self.message,
+                }
+            )
+            self.objectStorage.play_speech.play(
+                "Сообщение успешно отправлено!", cache=True)
         else:
             self.objectStorage.play_speech.play(
                 "Хотите продиктовать сообщение повторно?", cache=True)
             self.current_input_function = self.repeat
             self.need_permanent_answer = True
 
+    @next_phrases("Какое сообщение вы хотите отправить?", "Извините, я вас не очень понял.")
+    @listen_profile('yes_no')
     def repeat(self, text):
         if self.is_positive(text):
             return self.first(text)
@@ -48,6 +54,7 @@ class SendMessageDialog(Dialog):
     current_input_function = first
     name = 'Отправить Сообщение'
     keywords = [('отправ', 'сообщение'), 'сообщение']
+    examples = ['отправь сообщение врачу', 'напиши врачу']
 
 
 class NewMessagesDialog(Dialog):
@@ -65,14 +72,10 @@ class NewMessagesDialog(Dialog):
                 "Новых сообщений нет.", cache=True)
             return
 
-        morph = pymorphy2.MorphAnalyzer()
-
         for i in answer:
             date = parser.parse(i.get('date'))
             date_str = date.astimezone().strftime('%-d %B, %H:%M')
-            week_day = morph.parse(
-                date.astimezone().strftime('%A')
-            )[0].inflect({'accs'}).word
+            week_day = morph.inflect(date.astimezone().strftime('%A'), 'accs')
 
             text = "{sender} - в {week_day}, {date_str} - написал: - {text}".format(
                 sender=i.get('sender'), week_day=week_day, date_str=date_str, text=i.get('text')
@@ -82,3 +85,4 @@ class NewMessagesDialog(Dialog):
     current_input_function = first
     name = 'Непрочитанные сообщения'
     keywords = ['непрочитан', 'нов']
+    examples = ['расскажи о непрочитанных сообщениях', 'прочитай сообщения']
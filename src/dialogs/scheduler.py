@@ -0,0 +1,88 @@
+"""
+Queue of dialogs waiting for the current dialog to finish, e.g. notifications from events.
+"""
+
+import heapq
+import itertools
+import threading
+import time
+
+PRIORITY_MESSAGE = 1
+PRIORITY_MEASUREMENT = 2
+PRIORITY_MEDICINE = 3
+
+
+class DialogScheduler:
+    """Pending dialogs ordered by priority, then by deadline, then by order of adding.
+
+    Deadline is the time until dialog should be started, missed deadlines are counted, but dialog is still started.
+    Dialogs are pushed from event loop and popped from executor threads, so all methods are thread-safe.
+    """
+
+    def __init__(self):
+        self._heap = []
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+
+        self.started = 0
+        """Number of dialogs taken from queue"""
+        self.missed_deadlines = 0
+        """Number of dialogs taken from queue after their deadline"""
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def __len__(self):
+        with self._lock:
+            return len(self._heap)
+
+    def push(self, dialog, text='', priority=0, deadline=None):
+        """
+        Add dialog to queue
+
+        :param dialogs.dialog.Dialog dialog: Dialog instance
+        :param string text: Input text for the first dialog function
+        :param integer priority: The higher is started earlier, default `0`
+        :param float | None deadline: `time.time()` until dialog should be started, default `None` - no deadline
+        :rtype: None
+        """
+
+        with self._lock:
+            heapq.heappush(self._heap, (
+                -priority, deadline if deadline is not None else float('inf'), next(self._counter),
+                time.time(), dialog, text
+            ))
+
+    def pop(self):
+        """
+        Take the most important dialog
+
+        :return: Dialog instance and its input text
+        :rtype: tuple[dialogs.dialog.Dialog, str]
+        """
+
+        with self._lock:
+            _, deadline, _, added, dialog, text = heapq.heappop(self._heap)
+            now = time.time()
+            self.started += 1
+            self.total_wait += now - added
+            self.max_wait = max(self.max_wait, now - added)
+            if now > deadline:
+                self.missed_deadlines += 1
+            return dialog, text
+
+    def stats(self):
+        """
+        Queue metrics
+
+        :return: Queue depth, number of started dialogs and missed deadlines, mean and max wait time in seconds
+        :rtype: dict
+        """
+
+        with self._lock:
+            return {
+                'depth': len(self._heap),
+                'started': self.started,
+                'missed_deadlines': self.missed_deadlines,
+                'mean_wait': self.total_wait / self.started if self.started else 0.0,
+                'max_wait': self.max_wait,
+            }
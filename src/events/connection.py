@@ -0,0 +1,318 @@
+"""
+Websocket connection shared by event channels. Channels are multiplexed over one websocket in frames like
+`{"channel": "medicines/", "id": 42, "data": {...}}`, messages to server of all channels go through one send queue.
+Without multiplexing connection carries one channel and frames are channel data as is, with id in `event_id` key.
+
+Id of the last received event of channel is persisted and sent on reconnect as `last_event_id`, so server
+replays only events missed while connection was lost.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import random
+import time
+from collections import deque
+
+import websockets
+
+
+class EventCursor:
+    """Ids of the last received events of channels, stored in json file.
+
+    File is not written on every event, but at most once in `save_interval` seconds, on reconnect and on close.
+    After crash server replays a few events again, they are dropped as duplicates if they are still remembered.
+    """
+
+    def __init__(self, filename, remember=100, save_interval=5.0):
+        """
+        :param string filename: Path to json file
+        :param integer remember: Number of recent ids per channel kept to drop replayed duplicates, default `100`
+        :param float save_interval: Minimum seconds between writes of file on new events, default `5.0`
+        :return: __init__ should return None
+        :rtype: None
+        """
+
+        self.filename = filename
+        self.last = dict()
+        try:
+            with open(filename) as f:
+                self.last = json.load(f)
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            logging.warning("Failed to load websocket cursor '{}': {}".format(filename, e))
+
+        self._recent = {path: deque([event_id], maxlen=remember) for path, event_id in self.last.items()}
+        self._remember = remember
+        self.save_interval = save_interval
+        self._dirty = False
+        self._saved_at = 0.0
+
+    def get(self, path):
+        """
+        Id of the last received event of channel
+
+        :param string path: Channel path
+        :rtype: int | str | None
+        """
+
+        return self.last.get(path)
+
+    def seen(self, path, event_id):
+        """
+        Store event id as the last one of channel
+
+        :param string path: Channel path
+        :param int | str event_id: Event id
+        :return: False if event was already received
+        :rtype: bool
+        """
+
+        recent = self._recent.setdefault(path, deque(maxlen=self._remember))
+        if event_id in recent:
+            return False
+        recent.append(event_id)
+        self.last[path] = event_id
+        self._dirty = True
+        if time.monotonic() - self._saved_at >= self.save_interval:
+            self.save()
+        return True
+
+    def save(self):
+        """Write ids to file if they changed, through temporary file, so crash can not leave it half written."""
+
+        if not self._dirty:
+            return
+        tmp = self.filename + '.tmp'
+        try:
+            with open(tmp, 'w') as f:
+                json.dump(self.last, f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, self.filename)
+        except OSError as e:
+            logging.warning("Failed to save websocket cursor '{}': {}".format(self.filename, e))
+            return
+        self._dirty = False
+        self._saved_at = time.monotonic()
+
+
+class Channel:
+    """Channel of event in connection, can be used as websocket by event dialogs"""
+
+    def __init__(self, connection, path, init_data, on_message):
+        """
+        :param WebSocketConnection connection: Connection carrying channel
+        :param string path: Websocket path of channel without domain, like `medicines/`
+        :param dict | list init_data: Json serializable python object sent to channel after connect
+        :param function on_message: Async function that handles message with one parameter `message`
+        :return: __init__ should return None
+        :rtype: None
+        """
+
+        self.connection = connection
+        self.path = path
+        self.init_data = init_data
+        self.on_message = on_message
+
+    async def send(self, message):
+        """Put message into send queue of connection, it is sent as soon as connection is open
+
+        :param string message: Json string
+        :rtype: None
+        """
+
+        self.connection.put(self, message)
+
+    def __str__(self):
+        return self.path
+
+
+class WebSocketConnection:
+    """Websocket that carries one or more event channels and reconnects while it is running.
+
+    Reconnect delay grows exponentially with failures in a row and is random between `min_delay` and the
+    grown delay, so devices of fleet do not reconnect in lockstep after server outage. Connection without
+    pong answer on ping is considered lost.
+    """
+
+    def __init__(self, url, multiplexed=True, min_delay=1.0, max_delay=300.0, stable_after=30.0,
+                 ping_interval=20.0, ping_timeout=20.0, cursor=None):
+        """
+        :param string url: Full websocket URL
+        :param boolean multiplexed: If frames are wrapped with channel path, default `True`
+        :param float min_delay: Minimum seconds before reconnect, default `1.0`
+        :param float max_delay: Maximum seconds before reconnect, default `300.0`
+        :param float stable_after: Seconds connection must stay open to reset failures count, default `30.0`
+        :param float | None ping_interval: Seconds between pings, `None` disables pings, default `20.0`
+        :param float | None ping_timeout: Seconds to wait for pong before connection is lost, default `20.0`
+        :param EventCursor | None cursor: Store of the last received event ids, default `None`
+        :return: __init__ should return None
+        :rtype: None
+        """
+
+        self.url = url
+        self.multiplexed = multiplexed
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.stable_after = stable_after
+        self.ping_interval = ping_interval
+        self.ping_timeout = ping_timeout
+        self.cursor = cursor
+
+        self.channels = dict()
+        self.ws = None
+        self.stop = False
+
+        self.failures = 0
+        """Number of failed or short connections in a row"""
+        self.reconnects = 0
+
+        self._queue = deque()
+        self._queued = asyncio.Event()
+        self._stopped = asyncio.Event()
+
+    def add_channel(self, path, init_data, on_message):
+        """
+        Register channel, it is subscribed on every connect
+
+        :param string path: Websocket path of channel without domain, like `medicines/`
+        :param dict | list init_data: Json serializable python object sent to channel after connect
+        :param function on_message: Async function that handles message with one parameter `message`
+        :rtype: Channel
+        """
+
+        if not self.multiplexed and self.channels:
+            raise ValueError("Not multiplexed connection carries only one channel")
+
+        channel = self.channels[path] = Channel(self, path, init_data, on_message)
+        return channel
+
+    def put(self, channel, message):
+        """Put message of channel into send queue
+
+        :param Channel channel: Channel of message
+        :param string message: Json string
+        :rtype: None
+        """
+
+        self._queue.append(self._frame(channel, message))
+        self._queued.set()
+
+    def _frame(self, channel, message):
+        if not self.multiplexed:
+            return message
+        return json.dumps({'channel': channel.path, 'data': json.loads(message)})
+
+    async def _send_queue(self, ws):
+        """Send queued frames, frame is removed from queue only after it is sent."""
+
+        while True:
+            while self._queue:
+                await ws.send(self._queue[0])
+                self._queue.popleft()
+            self._queued.clear()
+            await self._queued.wait()
+
+    async def _dispatch(self, frame):
+        """Route received frame to its channel."""
+
+        try:
+            message = json.loads(frame)
+        except json.decoder.JSONDecodeError:
+            logging.error("Error decoding message '%s'", frame)
+            return
+
+        if not self.multiplexed:
+            channel = next(iter(self.channels.values()))
+            event_id = message.get('event_id') if isinstance(message, dict) else None
+        elif not isinstance(message, dict) or (channel := self.channels.get(message.get('channel'))) is None:
+            logging.warning("Websocket message of unknown channel '%s'", frame)
+            return
+        else:
+            event_id = message.get('id')
+            message = message.get('data')
+
+        if event_id is not None and self.cursor is not None and not self.cursor.seen(channel.path, event_id):
+            logging.debug("Dropped replayed event {} of channel '{}'".format(event_id, channel))
+            return
+
+        if message:
+            await channel.on_message(message)
+
+    def _init_frame(self, channel):
+        """Subscription frame of channel with id of the last received event."""
+
+        data = channel.init_data
+        if self.cursor is not None and (event_id := self.cursor.get(channel.path)) is not None and \
+                isinstance(data, dict):
+            data = dict(data, last_event_id=event_id)
+        return self._frame(channel, json.dumps(data))
+
+    async def _connect(self):
+        """Connect, subscribe channels, then send queue and receive messages until connection is closed."""
+
+        async with websockets.connect(
+                self.url, ping_interval=self.ping_interval, ping_timeout=self.ping_timeout) as self.ws:
+            logging.info("Connected websocket '{}' with channels {}".format(
+                self.url, ', '.join(self.channels)))
+            for channel in self.channels.values():
+                await self.ws.send(self._init_frame(channel))
+
+            send_task = asyncio.get_running_loop().create_task(self._send_queue(self.ws))
+            try:
+                async for frame in self.ws:
+                    await self._dispatch(frame)
+            finally:
+                send_task.cancel()
+                await asyncio.gather(send_task, return_exceptions=True)
+
+    def reconnect_delay(self):
+        """
+        Random delay before the next reconnect, upper bound doubles with every failure
+
+        :rtype: float
+        """
+
+        upper = min(self.max_delay, self.min_delay * 2 ** self.failures)
+        return random.uniform(self.min_delay, max(self.min_delay, upper))
+
+    async def run(self):
+        """Keep connection open until `close()`"""
+
+        while not self.stop:
+            connected_at = time.monotonic()
+            try:
+                await self._connect()
+            except (OSError, asyncio.TimeoutError, websockets.exceptions.WebSocketException) as e:
+                logging.warning("Websocket '{}' disconnected: {}".format(self.url, e))
+            except Exception as e:
+                logging.exception("Error in websocket '{}': {}".format(self.url, e))
+            self.ws = None
+            if self.cursor is not None:
+                self.cursor.save()
+            if self.stop:
+                break
+
+            if time.monotonic() - connected_at >= self.stable_after:
+                self.failures = 0
+            delay = self.reconnect_delay()
+            self.failures += 1
+            self.reconnects += 1
+            logging.info("Reconnecting websocket '{}' in {:.1f} seconds".format(self.url, delay))
+            try:
+                await asyncio.wait_for(self._stopped.wait(), delay)
+            except asyncio.TimeoutError:
+                pass
+
+    async def close(self):
+        """Close connection and stop reconnecting."""
+
+        self.stop = True
+        self._stopped.set()
+        if self.ws is not None:
+            await self.ws.close()
+        if self.cursor is not None:
+            self.cursor.save()
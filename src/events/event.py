@@ -4,7 +4,8 @@ import logging
 from collections import deque
 import websockets
 
-from dialogs.dialog import Dialog
+from dialogs.dialog import Dialog, listen_profile, next_phrases
+from events.connection import EventCursor, WebSocketConnection
 
 
 class EventDialog(Dialog):
@@ -31,17 +32,18 @@ class EventDialog(Dialog):
         self.call_later_on_end = False
 
     def send_ws_data(self, data):
-        """Send data with websocket
+        """Send data with websocket, can be called from dialog running in executor thread
 
         :param dict | list data: Json serializable python object
         :return: Nothing
         :rtype: None
         """
 
-        self.objectStorage.event_loop.create_task(
+        asyncio.run_coroutine_threadsafe(
             self.ws.send(
                 json.dumps(data)
-            )
+            ),
+            self.objectStorage.event_loop
         )
 
     def call_dialog_later(self, delay, dialog):
@@ -57,6 +59,8 @@ class EventDialog(Dialog):
             delay * 60, self.dialog_engine_instance.add_dialog_to_queue, dialog
         )
 
+    @next_phrases("Извините, я вас не очень понял.")
+    @listen_profile('yes_no')
     def call_later_yes_no(self, text):
         """Dialog engine function handles yes/no/null input and calls `.call_dialog_later()` if yes
         with number of minutes delay in `.self.call_later_delay` (int or float)
@@ -89,7 +93,7 @@ class EventDialog(Dialog):
         if self.is_positive(text):
             dialog = self.__class__(self.objectStorage, self.data, self.ws, self.dialog_engine_instance)
             self.call_dialog_later(self.call_later_delay, dialog)
-            self.objectStorage.play_speech.play("Напомню через {} минут.".format(self.call_later_delay))
+            self.objectStorage.play_speech.play_template("Напомню через {} минут.", self.call_later_delay)
             self.call_later_delay = False
         elif self.is_negative(text):
             self.objectStorage.play_speech.play(self.call_later_yes_no_fail_text, cache=True)
@@ -114,6 +118,10 @@ class Event:
     """Provides attributes and methods for event using in event engine."""
 
     name = 'Base Event'
+    cache_endpoints = []
+    """Endpoints which cached responses are changed by event messages"""
+    channel = None
+    """Websocket path of event channel, like `medicines/`, channels are connected by events engine"""
 
     def __init__(self, object_storage):
         """
@@ -142,6 +150,8 @@ class Event:
         """
 
         logging.debug("Default websocket message handler handled '{}'".format(message))
+        if self.cache_endpoints:
+            self.object_storage.response_cache.invalidate(*self.cache_endpoints, refresh=True)
         self.data.append(message)
         self.event_happened = True
 
@@ -150,6 +160,15 @@ class Event:
 
         self.stop = True
 
+    def init_data(self):
+        """Data sent to event channel after connect
+
+        :return: Json serializable python object
+        :rtype: dict | list
+        """
+
+        return {"token": self.object_storage.token}
+
     async def web_socket_connect(self, url, data_json, on_message=None):
         """Creates websocket, stores it in `Event.ws` and sends data `data_json` (async)
 
@@ -181,7 +200,11 @@ class Event:
         raise NotImplementedError("You must provide `.loop_item()` method if using default `.run()`.")
 
     async def run(self):
-        """Default async run method for asyncio_loop running `.loop_item()`"""
+        """Default async run method for asyncio_loop running `.loop_item()`, events with `channel` are run by
+        events engine connection"""
+
+        if self.channel is not None:
+            return
 
         logging.debug("Running EventDialog '{}'".format(self.name))
 
@@ -189,6 +212,8 @@ class Event:
 
         while True:
             if loop_item_task.done():
+                if not loop_item_task.cancelled() and (e := loop_item_task.exception()) is not None:
+                    logging.error("Error in loop item of event '{}': {}".format(self.name, e))
                 loop_item_task = self.object_storage.event_loop.create_task(self.loop_item())
 
             if self.stop:
@@ -268,6 +293,8 @@ class EventsEngine:
 
         self.stop = False
         self.running_events = list()  # list of Events [`Event instance`]
+        self.connections = list()
+        self._connection_tasks = list()
 
         logging.info("Creating events engine with %d events", len(events_dialog_list))
 
@@ -290,6 +317,37 @@ class EventsEngine:
 
         for event in self.events_dialog_list:
             await self._put_event_to_running(event)
+        self._connect_channels()
+
+    def _connect_channels(self):
+        """Put channels of events into websocket per channel or, if `ws_multiplex` is enabled in config, into one
+        multiplexed websocket, server must serve `ws_multiplex_path` for it."""
+
+        host_ws = self.object_storage.host_ws
+        config = self.object_storage.config
+        multiplex_path = config.get('ws_multiplex_path', 'events/')
+        cursor = EventCursor(self.object_storage.ws_cursor_filename)
+        options = dict(
+            max_delay=config.get('ws_reconnect_max_delay', 300),
+            ping_interval=config.get('ws_ping_interval', 20),
+            ping_timeout=config.get('ws_ping_timeout', 20),
+            cursor=cursor
+        )
+
+        connection = None
+        for event in self.running_events:
+            if event.channel is None:
+                continue
+            if not config.get('ws_multiplex', False):
+                connection = WebSocketConnection(host_ws + event.channel, multiplexed=False, **options)
+                self.connections.append(connection)
+            elif connection is None:
+                connection = WebSocketConnection(host_ws + multiplex_path, **options)
+                self.connections.append(connection)
+            event.ws = connection.add_channel(event.channel, event.init_data(), event.on_message)
+
+        for connection in self.connections:
+            self._connection_tasks.append(self.object_storage.event_loop.create_task(connection.run()))
 
     async def _run_item(self):
         """Async method to run single item of running events iteration"""
@@ -304,7 +362,9 @@ class EventsEngine:
     async def _stop_events(self):
         """Run kill() on all events."""
 
-        tasks = list()
+        tasks = list(self._connection_tasks)
+        for connection in self.connections:
+            await connection.close()
         for event in self.running_events:
             await event.kill()
             tasks.append(event.run_task)
@@ -1,6 +1,8 @@
 from abc import ABC
 
 from dialogs.measurments_dialogs import AddValueDialog
+from dialogs import listen_profile, next_phrases
+from dialogs.scheduler import PRIORITY_MEASUREMENT
 from events.event import Event, EventDialog
 
 
@@ -19,16 +21,20 @@ class MeasurementNotificationDialog(AddValueDialog, EventDialog):
             'request_type': 'is_sent',
             'measurement_id': self.data['id'],
         })
+        if self.data.get('fields'):
+            self.hint_next_template("Произнесите значение {}", self.data['fields'][0].get('text'))
         self.current_input_function = self.yes_no
         self.call_later_delay = 15
         self.call_later_on_end = True
 
+    @next_phrases("Хотите отложить напоминание на 15 минут?")
+    @listen_profile('yes_no')
     def yes_no(self, text):
         if self.is_positive(text):
             self.call_later_on_end = False
             self.category = self.data['fields'].pop(0)
-            self.objectStorage.play_speech.play(
-                "Произнесите значение {}".format(self.category.get('text')))
+            self.objectStorage.play_speech.play_template(
+                "Произнесите значение {}", self.category.get('text'))
             self.current_input_function = self.third
             self.need_permanent_answer = True
             return
@@ -36,6 +42,8 @@ class MeasurementNotificationDialog(AddValueDialog, EventDialog):
             self.objectStorage.play_speech.play("Хотите отложить напоминание на 15 минут?", cache=True)
             self.call_later_delay = 15
             self.call_later_yes_no_fail_text = "Введите значение позже с помощию команды 'заполнить опросники'."
+            self.hint_next_phrases(self.call_later_yes_no_fail_text)
+            self.hint_next_template("Напомню через {} минут.", self.call_later_delay)
             self.current_input_function = self.call_later_yes_no
             self.need_permanent_answer = True
         else:
@@ -50,19 +58,19 @@ class MeasurementNotificationDialog(AddValueDialog, EventDialog):
             self.need_permanent_answer = True
 
     current_input_function = first
+    priority = PRIORITY_MEASUREMENT
 
 
 class MeasurementNotificationEvent(Event, ABC):
     name = "Уведомление об измерении"
+    cache_endpoints = ['measurement/']
+    channel = 'measurements/'
 
-    async def loop_item(self):
-        await self.web_socket_connect(
-            'measurements/',
-            {
-                "token": self.object_storage.token,
-                "request_type": "init"
-            },
-        )
+    def init_data(self):
+        return {
+            "token": self.object_storage.token,
+            "request_type": "init"
+        }
 
     async def return_dialog(self, dialog_engine_instance):
         self.dialog_class = MeasurementNotificationDialog
@@ -1,17 +1,18 @@
 from abc import ABC
 
+from dialogs import listen_profile, next_phrases
+from dialogs.scheduler import PRIORITY_MEDICINE
 from events.event import Event, EventDialog
 
 
 class MedicineNotificationDialog(EventDialog):
     def first(self, _):
-        self.objectStorage.play_speech.play(
-            "Вам необходимо принять препарат {title} {dose}. {rules} ".format(
-                title=self.data.get('title'),
-                dose=self.data.get('dose') if self.data.get('dose') else '',
-                rules=self.data.get('rules') if self.data.get('rules') else ''
-            ) +
-            "Подтвердите, вы приняли препарат?  Перед ответом нажмите на кнопку."
+        self.objectStorage.play_speech.play_template(
+            "Вам необходимо принять препарат {title} {dose}. {rules} "
+            "Подтвердите, вы приняли препарат?  Перед ответом нажмите на кнопку.",
+            title=self.data.get('title'),
+            dose=self.data.get('dose') if self.data.get('dose') else '',
+            rules=self.data.get('rules') if self.data.get('rules') else ''
         )
         self.send_ws_data({
             'token': self.objectStorage.token,
@@ -22,6 +23,8 @@ class MedicineNotificationDialog(EventDialog):
         self.call_later_delay = 15
         self.call_later_on_end = True
 
+    @next_phrases("Отлично!", "Хотите отложить напоминание на 15 минут?", "Извините, я вас не очень понял.")
+    @listen_profile('yes_no')
     def second_yes_no(self, text):
         if self.is_positive(text):
             self.call_later_on_end = False
@@ -41,6 +44,8 @@ class MedicineNotificationDialog(EventDialog):
             self.call_later_delay = 15
             self.call_later_yes_no_fail_text = "Подтвердите прием позже с помощью комманды 'какие лекарства " \
                                                "необходимо принять' "
+            self.hint_next_phrases(self.call_later_yes_no_fail_text)
+            self.hint_next_template("Напомню через {} минут.", self.call_later_delay)
             self.current_input_function = self.call_later_yes_no
             self.need_permanent_answer = True
         else:
@@ -48,19 +53,19 @@ class MedicineNotificationDialog(EventDialog):
 
     current_input_function = first
     name = 'Уведомление о принятии лекарства'
+    priority = PRIORITY_MEDICINE
 
 
 class MedicineNotificationEvent(Event, ABC):
     name = "Уведомление о лекарствах"
+    cache_endpoints = ['medicine/']
+    channel = 'medicines/'
 
-    async def loop_item(self):
-        await self.web_socket_connect(
-            'medicines/',
-            {
-                "token": self.object_storage.token,
-                "request_type": "init"
-            },
-        )
+    def init_data(self):
+        return {
+            "token": self.object_storage.token,
+            "request_type": "init"
+        }
 
     async def return_dialog(self, dialog_engine_instance):
         self.dialog_class = MedicineNotificationDialog
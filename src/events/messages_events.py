@@ -1,5 +1,7 @@
 from abc import ABC
 
+from dialogs import listen_profile, next_phrases
+from dialogs.scheduler import PRIORITY_MESSAGE
 from events.event import Event, EventDialog
 
 
@@ -21,6 +23,12 @@ class MessageNotificationDialog(EventDialog):
         self.call_later_delay = 15
         self.call_later_on_end = True
 
+    @next_phrases(
+        "Отлично!",
+        "Сообщение не помечено как прочитанное",
+        "Извините, я вас не очень понял. Пометить сообщение как прочитанное?",
+    )
+    @listen_profile('yes_no')
     def second(self, text):
         if self.is_positive(text):
             self.call_later_on_end = False
@@ -43,16 +51,13 @@ class MessageNotificationDialog(EventDialog):
 
     current_input_function = first
     name = 'Уведомление о новом сообщении'
+    priority = PRIORITY_MESSAGE
 
 
 class MessageNotificationEvent(Event, ABC):
     name = 'Уведомление о новом сообщении'
-
-    async def loop_item(self):
-        await self.web_socket_connect(
-            'incomingmessage/',
-            {"token": self.object_storage.token},
-        )
+    cache_endpoints = ['message/']
+    channel = 'incomingmessage/'
 
     async def return_dialog(self, dialog_engine_instance):
         self.dialog_class = MessageNotificationDialog
@@ -1,8 +1,6 @@
 import json
 import logging
 
-import requests
-
 from init_gates.config_gate import save_config
 from init_gates.connection_gate import get_ggwave_input
 
@@ -17,7 +15,7 @@ def init(object_storage):
     """
     object_storage.pixels.think()
 
-    answer = requests.get(
+    answer = object_storage.http.get(
         object_storage.host_http + 'speaker/init/', json={'code': object_storage.auth_code}
     )
     answer.raise_for_status()
@@ -44,7 +42,7 @@ def update_server_data(object_storage):
     :rtype: init_gates.ObjectStorage
     """
 
-    answer = requests.get(object_storage.host_http + 'speaker/', json={'token': object_storage.token})
+    answer = object_storage.http.get(object_storage.host_http + 'speaker/', json={'token': object_storage.token})
     if answer.status_code == 404:
         logging.error("Token invalid, got 404, resetting token...")
         object_storage.reset_token()
@@ -62,7 +60,7 @@ def update_server_data(object_storage):
 
     if update_speaker_data_body:
         update_speaker_data_body['token'] = object_storage.token
-        answer = requests.put(object_storage.host_http + 'speaker/', json=update_speaker_data_body)
+        answer = object_storage.http.put(object_storage.host_http + 'speaker/', json=update_speaker_data_body)
         if not answer.ok:
             logging.error("Error updating speaker data: status code `{}`, text `{}`".format(
                 answer.status_code, answer.text[:100]
@@ -86,7 +84,7 @@ def auth_gate(object_storage):
             object_storage.play_speech.play(
                 "Устройство не настроено. Cгенерируйте и воспроизведите аудиокод в мобильном приложении.", cache=True
             )
-            data = json.loads(get_ggwave_input())
+            data = json.loads(get_ggwave_input(object_storage.capture_hub))
             object_storage.auth_code = data.get('code')
 
         logging.info("Token does not exist, authentication")
@@ -12,12 +12,14 @@ from speechkit import Session
 from speechkit.auth import generate_jwt
 
 from core import pixels, sound_processor
-from core.speech import (
-    PlaySpeech,
-    ListenRecognizeSpeech,
-    raspberry_simple_audio_play_audio_function,
-    default_play_audio_function
-)
+from core.audio_output import AudioOutput
+from core.button import ButtonService
+from core.capture import CaptureHub
+from core.speech import PlaySpeech, ListenRecognizeSpeech
+from core.wake_word import WakeWordDetector
+from network.http_client import HttpClient
+from network.outbox import Outbox
+from network.response_cache import ResponseCache
 
 
 class ObjectStorage:
@@ -32,9 +34,13 @@ class ObjectStorage:
         :param string CONFIG_FILENAME: Path to config file, default `~/.speaker/config.json`
         :param boolean development: If development mode, default `False`
         :param boolean debug_mode: Debug mode status, default `None`
-        :param string cash_filename: File path of cash file, default get from config
+        :param string cash_dirname: Directory of phrase store, default `~/.speaker/speech_cash`
         :param string version: Version of script like `major.minor.fix`, default `null`
         :param int chunk_size: chunk size for audio playing, default 4000
+        :param int button_pin: GPIO pin of button, default 17
+        :param float http_timeout: Default timeout of HTTP requests in seconds, default 15
+        :param string outbox_filename: Database of not sent submissions, default `~/.speaker/outbox.sqlite3`
+        :param string ws_cursor_filename: Ids of the last received events, default `~/.speaker/ws_cursor.json`
 
         :return: __init__ should return None
         :rtype: None
@@ -47,7 +53,9 @@ class ObjectStorage:
         self.config_filename = kwargs.get('CONFIG_FILENAME', os.path.join(Path.home(), '.speaker/config.json'))
         self.development = kwargs.get('development', False)
         self.debug_mode = kwargs.get('debug_mode')
-        self.cash_filename = kwargs.get('cash_filename', os.path.join(Path.home(), '.speaker/speech.cash'))
+        self.cash_dirname = kwargs.get('cash_dirname', os.path.join(Path.home(), '.speaker/speech_cash'))
+        self.outbox_filename = kwargs.get('outbox_filename', os.path.join(Path.home(), '.speaker/outbox.sqlite3'))
+        self.ws_cursor_filename = kwargs.get('ws_cursor_filename', os.path.join(Path.home(), '.speaker/ws_cursor.json'))
         self.version = kwargs.get('version', 'null')
         self.serial_no = get_serial_no()
         self.chunk_size = kwargs.get('chunk_size', 4000)
@@ -55,29 +63,55 @@ class ObjectStorage:
         self.mixer_card_index = kwargs.get('mixer_card_index', 1)
 
         self.event_loop = asyncio.get_event_loop()
+        self.http = HttpClient(timeout=(5, kwargs.get('http_timeout', 15)))
+        self.response_cache = ResponseCache(
+            self.http, self.config.get('response_cache_ttls', {'message/': 30, 'medicine/': 120, 'measurement/': 120})
+        )
+        os.makedirs(os.path.dirname(self.outbox_filename), exist_ok=True)
+        self.outbox = Outbox(self.http, self.outbox_filename, on_sent=self.response_cache.invalidate_url)
         # self.event_loop.set_exception_handler(self.handle_exception)
 
         self.pixels = pixels.Pixels(self.development)
+        self.audio_output = AudioOutput(chunk_size=self.chunk_size)
+        self.button = None if self.development else ButtonService(kwargs.get('button_pin', 17))
+        if self.button is not None:
+            self.button.add_press_callback(self.audio_output.barge_in)
+            self.button.start()
+        self.capture_hub = CaptureHub()
         try:
             self.session = Session.from_jwt(self.speechkit_jwt_token())
         except requests.exceptions.ConnectionError:
             self.session = None
 
-        self.play_speech = PlaySpeech(self.session, self.cash_filename, self.pixels, chunk_size=self.chunk_size)
+        self.play_speech = PlaySpeech(
+            self.session, self.cash_dirname, self.pixels, self.audio_output.play, chunk_size=self.chunk_size,
+            cache_max_bytes=self.config.get('speech_cache_max_bytes'),
+            cache_policy=self.config.get('speech_cache_policy', 'lru'),
+            play_audio_stream_function=self.audio_output.play_stream if self.session else None,
+            audio_output=self.audio_output,
+            http_client=self.http
+        )
 
         if self.session:
-            self.listen_recognize_speech = ListenRecognizeSpeech(self.session, self.pixels, chunk_size=self.chunk_size)
+            self.listen_recognize_speech = ListenRecognizeSpeech(
+                self.session, self.pixels, chunk_size=self.chunk_size, capture_hub=self.capture_hub
+            )
 
         self.auth_code = None
         """Stores code if first authentication."""
 
     def init_speechkit(self):
         self.session = Session.from_jwt(self.speechkit_jwt_token())
-        play_audio_function = default_play_audio_function if self.development else \
-            raspberry_simple_audio_play_audio_function
         self.play_speech = PlaySpeech(
-            self.session, self.cash_filename, self.pixels, play_audio_function, chunk_size=self.chunk_size)
-        self.listen_recognize_speech = ListenRecognizeSpeech(self.session, self.pixels, chunk_size=self.chunk_size)
+            self.session, self.cash_dirname, self.pixels, self.audio_output.play, chunk_size=self.chunk_size,
+            cache_max_bytes=self.config.get('speech_cache_max_bytes'),
+            cache_policy=self.config.get('speech_cache_policy', 'lru'),
+            play_audio_stream_function=self.audio_output.play_stream,
+            audio_output=self.audio_output,
+            http_client=self.http
+        )
+        self.listen_recognize_speech = ListenRecognizeSpeech(
+            self.session, self.pixels, chunk_size=self.chunk_size, capture_hub=self.capture_hub)
 
     def save_config(self):
         """Save config property to json file."""
@@ -93,7 +127,7 @@ class ObjectStorage:
             logging.warning("Token don't exist")
             return
 
-        requests.delete(self.host_http + 'speaker/', json={'token': self.token}).raise_for_status()
+        self.http.delete(self.host_http + 'speaker/', json={'token': self.token}).raise_for_status()
 
         self.config['token'] = None
         if 'token' in self.__dict__:
@@ -108,7 +142,7 @@ class ObjectStorage:
         _ = context.get('exception')
 
         if self.development:
-            answer = requests.post(self.host_http + 'exception/', json={
+            answer = self.http.post(self.host_http + 'exception/', json={
                 'token': self.token,
                 'traceback': str(context) + '\n\nException:\n' + str(
                     context.get('exception')) + '\nTraceback:\n' + traceback.format_exc()
@@ -122,9 +156,8 @@ class ObjectStorage:
         logging.error("Handling exception... {}".format(context))
         loop.stop()
 
-    @staticmethod
-    def _get_location_data():
-        answer = requests.get('https://ipinfo.io/json')
+    def _get_location_data(self):
+        answer = self.http.get('https://ipinfo.io/json')
         if answer.ok:
             return answer.json()
         else:
@@ -148,6 +181,16 @@ class ObjectStorage:
             private_key
         )
 
+    @functools.cached_property
+    def wake_word_detector(self):
+        """
+        Wake word detector, created on first use
+
+        :rtype: core.wake_word.WakeWordDetector
+        """
+        return WakeWordDetector(
+            self.capture_hub, self.config.get('wake_word', 'computer'), self.config.get('wake_word_sensitivity', 0.6))
+
     @functools.cached_property
     def host(self):
         """
@@ -248,7 +291,9 @@ def get_settings():
         'speechkit_private_key_filename': config['SPEECHKIT']['PRIVATE_KEY_FILENAME'],
         'host': config['SERVER']['HOST'],
         'version': config['GLOBAL']['VERSION'],
-        'weather_token': config['WEATHER']['TOKEN']
+        'weather_token': config['WEATHER']['TOKEN'],
+        'speech_cache_max_bytes': config.getint('CACHE', 'MAX_BYTES', fallback=64 * 1024 * 1024),
+        'speech_cache_policy': config.get('CACHE', 'POLICY', fallback='lru'),
     }
 
 
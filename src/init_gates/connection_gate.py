@@ -3,7 +3,7 @@ import logging
 import time
 
 import ggwave
-import pyaudio
+import numpy as np
 
 from network import Network, check_connection_ping
 
@@ -17,22 +17,21 @@ class BasePhrases:
     network_unavailable = "Пока что сеть недоступна, продолжается попытка подключения."
 
 
-def get_ggwave_input():
+def get_ggwave_input(capture_hub):
     """Listen audio and decode it to string if audio encoding got
 
+    :param core.capture.CaptureHub capture_hub: Shared microphone capture
     :return: Decoded string
     :rtype: string
     """
 
-    p = pyaudio.PyAudio()
-    stream = p.open(format=pyaudio.paFloat32, channels=1,
-                    rate=48000, input=True, frames_per_buffer=1024)
+    capture_hub.start()
+    frames = capture_hub.subscribe(48000, 1024, dtype=np.float32)
     instance = ggwave.init()
 
     try:
-        while True:
-            data = stream.read(1024, exception_on_overflow=False)
-            res = ggwave.decode(instance, data)
+        for data in frames:
+            res = ggwave.decode(instance, data.tobytes())
             if res is not None:
                 logging.debug("ggwave instance: {}".format(instance))
                 try:
@@ -43,9 +42,7 @@ def get_ggwave_input():
                     pass
     finally:
         ggwave.free(instance)
-        stream.stop_stream()
-        stream.close()
-        p.terminate()
+        frames.close()
 
     return data_str
 
@@ -63,7 +60,7 @@ def wireless_network_init(object_storage, first=False):
 
     object_storage.pixels.think()
 
-    data = json.loads(get_ggwave_input())
+    data = json.loads(get_ggwave_input(object_storage.capture_hub))
     network = Network(data.get('ssid'))
 
     if not network.available:
@@ -7,6 +7,12 @@ Connection to network with this instruction:
 Network - Adding, deleting and connecting wireless network
 check_connection_ping - Check connection with request to server
 check_connection_get_request - Check connection with ping to server
+HttpClient - Shared keep-alive HTTP client
+ResponseCache - Cache of server GET responses
+Outbox - Durable queue of submissions to server
 """
 
+from network.http_client import HttpClient
+from network.outbox import Outbox
+from network.response_cache import ResponseCache
 from network.network import Network, check_connection_ping, check_connection_get_request
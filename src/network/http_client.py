@@ -0,0 +1,104 @@
+"""
+Shared HTTP client, one `requests.Session` keeps connections alive between calls, so requests to the same host
+do not repeat TCP and TLS handshakes.
+"""
+
+import logging
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+class HttpClient:
+    """Pooled keep-alive HTTP client with default timeout and latency statistics per host.
+
+    Methods have the same signatures as `requests` module functions, so client can replace it.
+    """
+
+    METHODS = ('get', 'post', 'put', 'patch', 'delete', 'head', 'options')
+
+    def __init__(self, timeout=(5, 15), max_connections_per_host=4, max_hosts=8):
+        """
+        :param float | tuple[float, float] timeout: Default connect and read timeout in seconds, default `(5, 15)`
+        :param integer max_connections_per_host: Maximum of kept connections to one host, requests over limit
+            wait for free connection, default `4`
+        :param integer max_hosts: Number of hosts pools are kept for, default `8`
+        :return: __init__ should return None
+        :rtype: None
+        """
+
+        self.timeout = timeout
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=max_hosts, pool_maxsize=max_connections_per_host, pool_block=True)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def request(self, method, url, **kwargs):
+        """
+        Make request with pooled connection
+
+        :param string method: HTTP method, like `get` or `post`
+        :param string url: Full URL
+        :param kwargs: `requests.request()` arguments, `timeout` is default if not given
+        :rtype: requests.Response
+        """
+
+        kwargs.setdefault('timeout', self.timeout)
+        start = time.monotonic()
+        error = True
+        try:
+            response = self.session.request(method.upper(), url, **kwargs)
+            error = False
+            return response
+        finally:
+            elapsed = time.monotonic() - start
+            self._record(urlsplit(url).netloc, elapsed, error)
+            logging.debug("HTTP {} {} took {:.0f} ms".format(method.upper(), url, elapsed * 1000))
+
+    def _record(self, host, elapsed, error):
+        with self._lock:
+            stats = self._stats.setdefault(host, {'count': 0, 'errors': 0, 'total': 0.0, 'max': 0.0})
+            stats['count'] += 1
+            stats['errors'] += error
+            stats['total'] += elapsed
+            stats['max'] = max(stats['max'], elapsed)
+
+    def stats(self):
+        """
+        Latency statistics
+
+        :return: Number of requests, errors, mean and max latency in seconds by host
+        :rtype: dict[str, dict]
+        """
+
+        with self._lock:
+            return {host: {
+                'count': s['count'], 'errors': s['errors'], 'mean': s['total'] / s['count'], 'max': s['max']
+            } for host, s in self._stats.items()}
+
+    def get(self, url, **kwargs):
+        return self.request('get', url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request('post', url, **kwargs)
+
+    def put(self, url, **kwargs):
+        return self.request('put', url, **kwargs)
+
+    def patch(self, url, **kwargs):
+        return self.request('patch', url, **kwargs)
+
+    def delete(self, url, **kwargs):
+        return self.request('delete', url, **kwargs)
+
+    def close(self):
+        """Close all kept connections."""
+
+        self.session.close()
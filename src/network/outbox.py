@@ -0,0 +1,241 @@
+"""
+Durable outbox of submissions to server. Requests are written to SQLite database in WAL mode and sent by
+background thread, so dialogs do not wait for network and nothing is lost while server is unreachable.
+"""
+
+import hashlib
+import json
+import logging
+import random
+import sqlite3
+import threading
+import time
+import uuid
+
+import requests
+
+
+class Outbox:
+    """Queue of requests in SQLite, sent in order of submission with retries.
+
+    Every request has idempotency key sent in `Idempotency-Key` header, so server can drop repeated request
+    if answer was lost. Requests with the same URL, `batch_field` and other fields are sent as one request with
+    joined list of `batch_field`, in place of the first of them. Submission may be held for a while, so values
+    of one dialog are sent together and its status updates are pipelined right after them, other submissions
+    are sent meanwhile.
+    If server is unreachable or answers with any other error, e.g. expired token, sending is retried with
+    exponential backoff and jitter. Only requests rejected as invalid, with status in `REJECTED_STATUS_CODES`,
+    are dropped, as retries do not help.
+    """
+
+    REJECTED_STATUS_CODES = (400, 409, 422)
+
+    def __init__(self, http, filename, batch_size=20, min_backoff=1.0, max_backoff=300.0, on_sent=None):
+        """
+        :param network.HttpClient http: Client requests are made with
+        :param string filename: Path to database file
+        :param integer batch_size: Maximum number of submissions joined into one request, default `20`
+        :param float min_backoff: Delay in seconds after the first failure, default `1.0`
+        :param float max_backoff: Maximum delay in seconds between attempts, default `300.0`
+        :param function | None on_sent: Function called with URL after request is sent, default `None`
+        :return: __init__ should return None
+        :rtype: None
+        """
+
+        self.http = http
+        self.batch_size = batch_size
+        self.min_backoff = min_backoff
+        self.max_backoff = max_backoff
+        self.on_sent = on_sent
+
+        self.failures = 0
+        """Number of failed attempts in a row"""
+        self.sent = 0
+        self.dropped = 0
+
+        self._db = sqlite3.connect(filename, check_same_thread=False, isolation_level=None)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute('PRAGMA synchronous=NORMAL')
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS outbox ('
+            'id INTEGER PRIMARY KEY AUTOINCREMENT, key TEXT UNIQUE NOT NULL, method TEXT NOT NULL, '
+            'url TEXT NOT NULL, body TEXT NOT NULL, batch_field TEXT, created REAL NOT NULL, batch_key TEXT, '
+            'hold_until REAL NOT NULL DEFAULT 0)'
+        )
+        columns = {row[1] for row in self._db.execute('PRAGMA table_info(outbox)')}
+        if 'batch_key' not in columns:
+            self._db.execute('ALTER TABLE outbox ADD COLUMN batch_key TEXT')
+        if 'hold_until' not in columns:
+            self._db.execute('ALTER TABLE outbox ADD COLUMN hold_until REAL NOT NULL DEFAULT 0')
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._next_attempt = 0.0
+
+    def __len__(self):
+        with self._lock:
+            return self._db.execute('SELECT COUNT(*) FROM outbox').fetchone()[0]
+
+    def submit(self, method, url, data, batch_field=None, hold=0.0):
+        """
+        Store request, it is sent in background
+
+        :param string method: HTTP method, like `post` or `patch`
+        :param string url: Full URL
+        :param dict data: Json body
+        :param string | None batch_field: Name of list in body that may be joined with list of other
+            requests to the same URL, default `None`
+        :param float hold: Seconds this submission waits for more submissions before it is sent, until it is
+            released with `release()`, default `0.0`
+        :return: Idempotency key of request
+        :rtype: string
+        """
+
+        key = uuid.uuid4().hex
+        with self._lock:
+            self._db.execute(
+                'INSERT INTO outbox (key, method, url, body, batch_field, created, hold_until) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (key, method, url, json.dumps(data), batch_field, time.time(), time.time() + hold if hold > 0 else 0)
+            )
+        logging.debug("Submitted {} {} into outbox".format(method.upper(), url))
+        self.start()
+        self._wake.set()
+        return key
+
+    def start(self):
+        """Start flusher thread, does nothing if it is already running."""
+
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    def release(self, keys):
+        """Send held submissions now
+
+        :param list[str] keys: Idempotency keys of submissions
+        :rtype: None
+        """
+
+        with self._lock:
+            self._db.executemany('UPDATE outbox SET hold_until = 0 WHERE key = ?', [(key,) for key in keys])
+        self._wake.set()
+
+    def close(self):
+        """Stop flusher thread and close database, not sent requests are kept."""
+
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        with self._lock:
+            self._db.close()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.clear()
+            delay = self._next_attempt - time.monotonic()
+            if delay > 0:
+                self._wake.wait(delay)
+                continue
+            try:
+                if self.flush():
+                    continue
+                with self._lock:
+                    hold_until = self._db.execute('SELECT MIN(hold_until) FROM outbox').fetchone()[0]
+            except Exception as e:
+                logging.exception("Error in outbox flusher: {}".format(e))
+                self._failed("{}".format(e))
+                continue
+            self._wake.wait(max(0.0, hold_until - time.time()) if hold_until else None)
+
+    def _pending(self):
+        """Submissions that are not held."""
+
+        with self._lock:
+            return self._db.execute(
+                'SELECT id, key, method, url, body, batch_field, batch_key FROM outbox '
+                'WHERE hold_until <= ? ORDER BY id LIMIT ?',
+                (time.time(), self.batch_size)
+            ).fetchall()
+
+    def _batch(self, rows):
+        """
+        Join the first row with later rows of the same request, they are moved before rows between them.
+        Batch is stored on the first attempt, so retries send the same rows with the same idempotency key.
+
+        :return: Ids of joined rows, method, URL, body and idempotency key
+        :rtype: tuple[list[int], str, str, dict, str]
+        """
+
+        _, key, method, url, body, batch_field, batch_key = rows[0]
+        body = json.loads(body)
+        ids, keys = [rows[0][0]], [key]
+        if batch_field is None:
+            return ids, method, url, body, key
+
+        common = {k: v for k, v in body.items() if k != batch_field}
+        for row_id, row_key, row_method, row_url, row_body, row_batch_field, row_batch_key in rows[1:]:
+            if batch_key is not None:
+                if row_batch_key != batch_key:
+                    continue
+            elif row_batch_key is not None or (row_method, row_url, row_batch_field) != (method, url, batch_field):
+                continue
+            row_body = json.loads(row_body)
+            if batch_key is None and {k: v for k, v in row_body.items() if k != batch_field} != common:
+                continue
+            body[batch_field] = body[batch_field] + row_body[batch_field]
+            ids.append(row_id)
+            keys.append(row_key)
+
+        if batch_key is not None:
+            return ids, method, url, body, batch_key
+        if len(keys) > 1:
+            key = hashlib.sha1(''.join(keys).encode()).hexdigest()
+            with self._lock:
+                self._db.executemany('UPDATE outbox SET batch_key = ? WHERE id = ?', [(key, i) for i in ids])
+        return ids, method, url, body, key
+
+    def flush(self):
+        """
+        Send stored requests that are not held, until none is left or request fails
+
+        :return: True if request failed and there are requests left
+        :rtype: bool
+        """
+
+        while rows := self._pending():
+            ids, method, url, body, key = self._batch(rows)
+            try:
+                answer = self.http.request(method, url, json=body, headers={'Idempotency-Key': key})
+            except requests.RequestException as e:
+                self._failed("{}".format(e))
+                return True
+
+            if answer.ok:
+                self.sent += len(ids)
+            elif answer.status_code in self.REJECTED_STATUS_CODES:
+                self.dropped += len(ids)
+                logging.error("Server rejected {} {}, status code: '{}', answer: '{}'".format(
+                    method.upper(), url, answer.status_code, answer.text))
+            else:
+                self._failed("status code {}".format(answer.status_code))
+                return True
+
+            with self._lock:
+                self._db.executemany('DELETE FROM outbox WHERE id = ?', [(i,) for i in ids])
+            self.failures = 0
+            if self.on_sent is not None:
+                self.on_sent(url)
+        return False
+
+    def _failed(self, reason):
+        """Schedule next attempt with exponential backoff and jitter."""
+
+        self.failures += 1
+        delay = min(self.max_backoff, self.min_backoff * 2 ** (self.failures - 1)) * random.uniform(0.5, 1.0)
+        self._next_attempt = time.monotonic() + delay
+        logging.warning("Failed to send outbox, {}, retrying in {:.1f} seconds".format(reason, delay))
@@ -0,0 +1,147 @@
+"""
+Cache of server GET responses with time to live per endpoint. Stale responses are revalidated with ETag, and
+entries are invalidated by writes to the same endpoint and by websocket events that tell data has changed.
+"""
+
+import json
+import logging
+import threading
+import time
+from urllib.parse import urlsplit
+
+
+class ResponseCache:
+    """Caches GET responses of endpoints with TTL, other requests go to server directly.
+
+    Cached `requests.Response` is returned as is, its `.json()` decodes body again on every call,
+    so callers can modify returned data.
+    """
+
+    def __init__(self, http, ttls):
+        """
+        :param network.HttpClient http: Client requests are made with
+        :param dict[str, int | float] ttls: Time to live in seconds by endpoint, end of URL path like `message/`
+        :return: __init__ should return None
+        :rtype: None
+        """
+
+        self.http = http
+        self.ttls = ttls
+
+        self.hits = 0
+        self.misses = 0
+        self.revalidated = 0
+        """Number of stale responses confirmed by server with `304 Not Modified`"""
+
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def _ttl(self, url):
+        path = urlsplit(url).path
+        for endpoint, ttl in self.ttls.items():
+            if path.endswith(endpoint):
+                return ttl
+
+    def is_cached(self, url):
+        """
+        :param string url: Full URL
+        :return: True if GET responses of URL are cached
+        :rtype: bool
+        """
+        return self._ttl(url) is not None
+
+    @staticmethod
+    def _key(url, kwargs):
+        return url, json.dumps(kwargs.get('json'), sort_keys=True), json.dumps(kwargs.get('params'), sort_keys=True)
+
+    def get(self, url, **kwargs):
+        """
+        Cached GET request
+
+        :param string url: Full URL
+        :param kwargs: `requests.request()` arguments
+        :rtype: requests.Response
+        """
+
+        ttl = self._ttl(url)
+        if ttl is None:
+            return self.http.get(url, **kwargs)
+
+        key = self._key(url, kwargs)
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is not None and time.monotonic() - entry['time'] < ttl:
+            self.hits += 1
+            return entry['response']
+        return self._fetch(key, url, kwargs, entry)
+
+    def _fetch(self, key, url, kwargs, entry):
+        """Request server, with `If-None-Match` if stale entry has ETag."""
+
+        self.misses += 1
+        request_kwargs = dict(kwargs)
+        if entry is not None and entry['etag']:
+            request_kwargs['headers'] = dict(kwargs.get('headers') or {}, **{'If-None-Match': entry['etag']})
+
+        response = self.http.get(url, **request_kwargs)
+        if response.status_code == 304 and entry is not None:
+            self.revalidated += 1
+            response = entry['response']
+        elif not response.ok:
+            return response
+
+        with self._lock:
+            self._entries[key] = {
+                'response': response, 'etag': response.headers.get('ETag'), 'time': time.monotonic(),
+                'url': url, 'kwargs': kwargs,
+            }
+        return response
+
+    def invalidate_url(self, url):
+        """
+        Mark cached responses stale after write to URL, responses of URL and its parent paths are affected,
+        e.g. POST to `medicine/commit/` invalidates `medicine/`
+
+        :param string url: Full URL
+        :rtype: None
+        """
+
+        path = urlsplit(url).path
+        with self._lock:
+            for entry in self._entries.values():
+                if path.startswith(urlsplit(entry['url']).path):
+                    entry['time'] = float('-inf')
+
+    def invalidate(self, *endpoints, refresh=False):
+        """
+        Mark cached responses of endpoints stale, they are revalidated on next request
+
+        :param string endpoints: Ends of URL paths like `message/`
+        :param bool refresh: Revalidate stale responses in background thread, so next request is answered
+            from cache, default `False`
+        :rtype: None
+        """
+
+        with self._lock:
+            stale = [
+                (key, entry) for key, entry in self._entries.items()
+                if any(urlsplit(entry['url']).path.endswith(endpoint) for endpoint in endpoints)
+            ]
+            for _, entry in stale:
+                entry['time'] = float('-inf')
+
+        if refresh and stale:
+            threading.Thread(target=self._refresh, args=(stale,), daemon=True).start()
+
+    def _refresh(self, stale):
+        for key, entry in stale:
+            try:
+                self._fetch(key, entry['url'], entry['kwargs'], entry)
+            except Exception as e:
+                logging.warning("Failed to refresh cached response of '{}': {}".format(entry['url'], e))
+
+    def clear(self):
+        """Remove all cached responses."""
+
+        with self._lock:
+            self._entries.clear()
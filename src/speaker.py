@@ -12,6 +12,7 @@ __credits__ = 'TelePat LLC'
 
 import argparse
 import asyncio
+import json
 import logging
 import sys
 import sentry_sdk
@@ -27,6 +28,8 @@ parser.add_argument('-d', '--development',
 parser.add_argument('-s', '--store_cash',
                     help="Store cash sound for network connection",
                     action='store_true')
+parser.add_argument('--cache_stats', help="Print speech cache statistics and exit",
+                    action='store_true')
 parser.add_argument('-symd', '--systemd',
                     help="Option for running as systemd service",
                     action='store_true')
@@ -81,6 +84,8 @@ try:
     from dialogs import DialogEngine, dialogs_list
     from events import EventsEngine, events_list
     from core import SoundProcessor
+    from core import morph
+    from core.phrases_manifest import store_manifest_phrases, warm_up_cache
 except ImportError as e:
     logging.error("Error with importing modules {}".format(e))
     raise e
@@ -105,6 +110,12 @@ objectStorage = config_gate(
 if args.store_cash:
     logging.info("Store cash active")
     cash_phrases(objectStorage.play_speech)
+    store_manifest_phrases(objectStorage.play_speech)
+    objectStorage.play_speech.store.save_stats()
+    sys.exit()
+
+if args.cache_stats:
+    print(json.dumps(objectStorage.play_speech.cache_stats(), ensure_ascii=False, indent=2))
     sys.exit()
 
 if not args.development:
@@ -152,12 +163,25 @@ async def main():
     if args.systemd:
         notify(Notification.STATUS, "Loaded all processes, running...")
 
+    objectStorage.outbox.start()
     objectStorage.pixels.wakeup()
     return (sound_processor_task, events_engine_task), (sound_processor_instance, events_engine_instance)
 
 
 async def shutdown(tasks_to_stop: list, objects_to_kill: list) -> None:
     objectStorage.pixels.off()
+    objectStorage.play_speech.store.save_stats()
+    objectStorage.audio_output.close()
+    if objectStorage.button is not None:
+        objectStorage.button.close()
+    if 'wake_word_detector' in objectStorage.__dict__:
+        objectStorage.wake_word_detector.close()
+    objectStorage.capture_hub.close()
+    logging.info("Outbox: {} sent, {} dropped, {} not sent".format(
+        objectStorage.outbox.sent, objectStorage.outbox.dropped, len(objectStorage.outbox)))
+    objectStorage.outbox.close()
+    logging.info("HTTP latency statistics: {}".format(objectStorage.http.stats()))
+    objectStorage.http.close()
     for obj in objects_to_kill:
         await obj.kill()
     await asyncio.gather(*tasks_to_stop)
@@ -170,6 +194,9 @@ async def shutdown(tasks_to_stop: list, objects_to_kill: list) -> None:
 
 tasks, objects = objectStorage.event_loop.run_until_complete(main())
 logging.info("Loaded all processes, running...")
+warm_up_task = objectStorage.event_loop.create_task(warm_up_cache(objectStorage.play_speech))
+if objectStorage.config.get('preload_morph', True):
+    morph.load_in_background()
 
 if not args.development:
     objectStorage.play_speech.play("Я готов. Для того, чтобы задать вопрос нажмите на кнопку.")
@@ -179,6 +206,7 @@ try:
 except KeyboardInterrupt:
     logging.info("Stopping...")
 finally:
+    warm_up_task.cancel()
     objectStorage.event_loop.run_until_complete(shutdown(tasks, objects))
     objectStorage.event_loop.close()
     sys.exit()
@@ -0,0 +1,86 @@
+"""
+Benchmark of dialog choosing accuracy and latency, exact keyword index alone and with fuzzy
+`dialogs.intent_classifier.IntentClassifier` fallback with different thresholds, over recognized phrases
+with recognition errors. Run from `src`:
+
+    python -m tests.bench_intent_classifier
+"""
+
+import timeit
+
+from dialogs import dialogs_list
+from dialogs.intent_classifier import IntentClassifier
+from dialogs.keyword_index import KeywordIndex
+from tests.bench_keyword_index import keywords_list
+
+LABELED_PHRASES = [
+    ('который час', 'TimeDialog'),
+    ('скока сейчас времья', 'TimeDialog'),
+    ('сделай грамкость потише', 'SetVolumeDialog'),
+    ('сделай тише', 'SetVolumeDialog'),
+    ('что ты умеш', 'HelpDialog'),
+    ('раскажи онекдот', 'AnekDialog'),
+    ('какая сегодня погда', 'WeatherDialog'),
+    ('сколько градусов на улице', 'WeatherDialog'),
+    ('прочитай непрочитаные сообщения', 'NewMessagesDialog'),
+    ('прочитай сообщения', 'NewMessagesDialog'),
+    ('отправь сообщение врачу', 'SendMessageDialog'),
+    ('отправь сообщенье врачу', 'SendMessageDialog'),
+    ('напиши врачу', 'SendMessageDialog'),
+    ('записать значение измерения', 'AddValueDialog'),
+    ('записать значение измерениа', 'AddValueDialog'),
+    ('заполнить опросники', 'CommitFormsDialog'),
+    ('заполнить апросники', 'CommitFormsDialog'),
+    ('какие лекарства необходимо принять', 'CheckMedicinesDialog'),
+    ('какие лекарсва необходимо принять', 'CheckMedicinesDialog'),
+    ('подтверди прием лекарства', 'CommitMedicineDialog'),
+    ('подтверди лекарсво', 'CommitMedicineDialog'),
+    ('как дила', 'HowAreYouDialog'),
+    ('как у тебя дела', 'HowAreYouDialog'),
+    ('включи музыку', None),
+    ('спасибо', None),
+    ('поставь будильник на семь', None),
+]
+
+
+def main():
+    keywords = keywords_list(dialogs_list)
+    examples = [(example.lower(), dialog) for dialog in dialogs_list for example in dialog.examples]
+    index = KeywordIndex(keywords)
+
+    def evaluate(name_of_run, choose):
+        correct = wrong = rejected = 0
+        for phrase, expected in LABELED_PHRASES:
+            dialog = choose(phrase)
+            name = dialog.__name__ if dialog is not None else None
+            if name == expected:
+                correct += 1
+            elif name is None:
+                rejected += 1
+            else:
+                wrong += 1
+        number = 200
+        seconds = timeit.timeit(lambda: [choose(phrase) for phrase, _ in LABELED_PHRASES], number=number)
+        print("{:<22} correct {:>2}, wrong {:>2}, rejected {:>2}, {:>7.1f} us per phrase".format(
+            name_of_run, correct, wrong, rejected, seconds / number / len(LABELED_PHRASES) * 1e6))
+
+    def keyword_only(phrase):
+        match = index.match(phrase)
+        return match[1] if match else None
+
+    evaluate('keywords', keyword_only)
+
+    for threshold in (0.5, 0.6, 0.7, 0.8):
+        classifier = IntentClassifier(keywords + examples, threshold=threshold)
+
+        def with_fallback(phrase):
+            if match := index.match(phrase):
+                return match[1]
+            if match := classifier.classify(phrase):
+                return match[1]
+
+        evaluate('fuzzy threshold {}'.format(threshold), with_fallback)
+
+
+if __name__ == '__main__':
+    main()
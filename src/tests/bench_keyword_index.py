@@ -0,0 +1,83 @@
+"""
+Microbenchmark of dialog choosing, linear keyword scan compared with `dialogs.keyword_index.KeywordIndex`
+over recognized phrases, run from `src`:
+
+    python -m tests.bench_keyword_index
+"""
+
+import timeit
+
+from dialogs import dialogs_list
+from dialogs.keyword_index import KeywordIndex
+
+PHRASES = [
+    'который час',
+    'сколько сейчас время',
+    'сделай громкость потише',
+    'поставь громкость на пять',
+    'что ты умеешь',
+    'сброс до заводских настроек',
+    'расскажи анекдот',
+    'какая сегодня погода',
+    'какая погода будет завтра',
+    'есть новые сообщения',
+    'прочитай непрочитанные сообщения',
+    'отправь сообщение врачу',
+    'отправить новое сообщение',
+    'снова отправь сообщение',
+    'добавь измерение давления',
+    'хочу отправить измерения',
+    'заполни опросник',
+    'заполнить незаполненные опросники',
+    'какие лекарства необходимо принять',
+    'какой препарат нужно принять',
+    'подтверди прием лекарства',
+    'я принял лекарство',
+    'как дела',
+    'как ты себя чувствуешь',
+    'ну как ты',
+    'основное давление сто двадцать на восемьдесят',
+    'спасибо',
+    'включи музыку',
+]
+
+
+def keywords_list(dialogs):
+    """Keyword phrases of dialogs in the same format as `DialogEngine`."""
+
+    return [
+        (keyword.strip().lower() if isinstance(keyword, str) else ' '.join(k.strip().lower() for k in keyword), dialog)
+        for dialog in dialogs for keyword in dialog.keywords
+    ]
+
+
+def linear_match(keywords, text):
+    """Previous dialog choosing, the first keyword in list order that occurs in text."""
+
+    for keyword, dialog in keywords:
+        if all(k in text for k in keyword.split()):
+            return keyword, dialog
+
+
+def main():
+    keywords = keywords_list(dialogs_list)
+    index = KeywordIndex(keywords)
+
+    for phrase in PHRASES:
+        old, new = [
+            match[1].__name__ if match else None for match in (linear_match(keywords, phrase), index.match(phrase))
+        ]
+        if old != new:
+            print("'{}': {} -> {}".format(phrase, old, new))
+
+    number = 2000
+    for name, match in (('linear', lambda t: linear_match(keywords, t)), ('index', index.match)):
+        seconds = timeit.timeit(lambda: [match(phrase) for phrase in PHRASES], number=number)
+        print("{}: {:.2f} us per phrase".format(name, seconds / number / len(PHRASES) * 1e6))
+
+    build = timeit.timeit(lambda: KeywordIndex(keywords), number=100) / 100
+    print("index build: {:.2f} ms".format(build * 1000))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+"""
+Microbenchmark of trigger to listen latency of `core.sound_processor.SoundProcessor`, time from input function
+returning to recognition start. Input, recognition and dialog engine are synthetic, run from `src`:
+
+    python -m tests.bench_sound_processor
+"""
+
+import asyncio
+import statistics
+import time
+import types
+
+from core.sound_processor import SoundProcessor
+
+TURNS = 200
+
+
+class SyntheticStorage:
+    def __init__(self, turns):
+        self.event_loop = asyncio.get_running_loop()
+        self.capture_hub = types.SimpleNamespace(start=lambda: None)
+        self.listen_recognize_speech = types.SimpleNamespace(listen_async=self.listen_async)
+        self.turns = turns
+        self.triggered = None
+        self.latencies = []
+        self.done = asyncio.Event()
+
+    async def input_function(self, _):
+        await asyncio.sleep(0.001)
+        self.triggered = time.monotonic()
+        return self.triggered
+
+    async def listen_async(self, profile, trigger_time=None):
+        self.latencies.append(time.monotonic() - self.triggered)
+        if len(self.latencies) >= self.turns:
+            self.done.set()
+        return 'текст'
+
+
+async def main():
+    storage = SyntheticStorage(TURNS)
+    storage.inputFunction = storage.input_function
+    dialog_engine = types.SimpleNamespace(listen_profile='default', process_input=lambda text: None)
+    processor = SoundProcessor(storage, dialog_engine)
+
+    task = asyncio.create_task(processor.run())
+    start = time.monotonic()
+    await storage.done.wait()
+    elapsed = time.monotonic() - start
+    await processor.kill()
+    await task
+
+    latencies = sorted(storage.latencies)
+    print("{} turns in {:.3f} s".format(len(latencies), elapsed))
+    print("trigger to listen latency: median {:.3f} ms, p99 {:.3f} ms, max {:.3f} ms".format(
+        statistics.median(latencies) * 1000, latencies[int(len(latencies) * 0.99)] * 1000, latencies[-1] * 1000))
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
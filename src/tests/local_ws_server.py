@@ -0,0 +1,61 @@
+"""
+Local websocket stand-in of speaker API events endpoint for tests, speaks multiplexed protocol of
+`events.connection`: frames are `{"channel": path, "id": event_id, "data": data}`, the first frame of channel subscribes it.
+"""
+
+import json
+
+import websockets
+
+
+class LocalEventServer:
+    """Websocket server on localhost with random port, records subscriptions and messages from clients"""
+
+    def __init__(self):
+        self.subscriptions = list()
+        """Subscription frames as tuples of channel and data"""
+        self.received = list()
+        """Frames sent by clients after subscription as tuples of channel and data"""
+        self.connections = 0
+
+        self.url = None
+        self._server = None
+        self._clients = dict()
+
+    async def start(self):
+        self._server = await websockets.serve(self._handler, 'localhost', 0)
+        self.url = 'ws://localhost:{}/'.format(self._server.sockets[0].getsockname()[1])
+
+    async def _handler(self, ws):
+        self.connections += 1
+        channels = self._clients[ws] = set()
+        try:
+            async for frame in ws:
+                message = json.loads(frame)
+                if message['channel'] in channels:
+                    self.received.append((message['channel'], message['data']))
+                else:
+                    channels.add(message['channel'])
+                    self.subscriptions.append((message['channel'], message['data']))
+        finally:
+            del self._clients[ws]
+
+    async def publish(self, channel, data, event_id=None):
+        """Send data to clients subscribed to channel"""
+
+        frame = {'channel': channel, 'data': data}
+        if event_id is not None:
+            frame['id'] = event_id
+        for ws, channels in list(self._clients.items()):
+            if channel in channels:
+                await ws.send(json.dumps(frame))
+
+    async def drop_clients(self):
+        """Close connections of all clients, like when network is lost"""
+
+        for ws in list(self._clients):
+            await ws.close()
+
+    async def close(self):
+        self._server.close()
+        await self._server.wait_closed()
@@ -0,0 +1,46 @@
+import asyncio
+import unittest
+
+from core.button import ButtonService
+
+
+class TestButtonService(unittest.TestCase):
+    def setUp(self):
+        self.button = ButtonService(debounce=0.03, long_press=0.8, multi_press_gap=0.05)
+
+    def gesture(self, edges, gestures):
+        async def run():
+            wait = asyncio.ensure_future(self.button.wait(gestures))
+            await asyncio.sleep(0)
+            for pressed, now in edges:
+                self.button._handle(pressed, now)
+            return await asyncio.wait_for(wait, 1)
+
+        return asyncio.run(run())
+
+    def test_press_is_immediate(self):
+        self.assertEqual(self.gesture([(True, 1.0)], {ButtonService.PRESS}), (ButtonService.PRESS, 1.0))
+
+    def test_short(self):
+        gesture = self.gesture([(True, 1.0), (False, 1.1)], {ButtonService.SHORT, ButtonService.DOUBLE})
+        self.assertEqual(gesture, (ButtonService.SHORT, 1.0))
+
+    def test_long(self):
+        gesture = self.gesture([(True, 1.0), (False, 2.0)], {ButtonService.SHORT, ButtonService.LONG})
+        self.assertEqual(gesture, (ButtonService.LONG, 1.0))
+
+    def test_triple_with_bounces(self):
+        edges = [
+            (True, 1.0), (False, 1.01), (False, 1.1), (True, 1.15), (True, 1.16), (False, 1.2), (True, 1.25), (False, 1.3)
+        ]
+        gesture = self.gesture(edges, {ButtonService.SHORT, ButtonService.DOUBLE, ButtonService.TRIPLE})
+        self.assertEqual(gesture, (ButtonService.TRIPLE, 1.0))
+
+    def test_consumed_press(self):
+        self.button.add_press_callback(lambda: True)
+        with self.assertRaises(asyncio.TimeoutError):
+            self.gesture([(True, 1.0), (False, 1.1)], {ButtonService.PRESS, ButtonService.SHORT})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+import time
+import unittest
+from unittest import mock
+
+import numpy as np
+
+from core.capture import CaptureHub, RingBuffer
+
+
+class TestRingBuffer(unittest.TestCase):
+    def setUp(self):
+        self.ring = RingBuffer(10)
+
+    def test_read_written(self):
+        self.ring.write(np.arange(4, dtype=np.int16))
+        samples, start = self.ring.read(1, 10)
+        self.assertEqual(start, 1)
+        self.assertEqual(samples.tolist(), [1, 2, 3])
+
+    def test_wrap_around(self):
+        self.ring.write(np.arange(8, dtype=np.int16))
+        self.ring.write(np.arange(8, 14, dtype=np.int16))
+        self.assertEqual(self.ring.position, 14)
+        samples, start = self.ring.read(6, 5)
+        self.assertEqual(start, 6)
+        self.assertEqual(samples.tolist(), [6, 7, 8, 9, 10])
+
+    def test_overwritten_samples_are_skipped(self):
+        self.ring.write(np.arange(25, dtype=np.int16))
+        samples, start = self.ring.read(3, 4)
+        self.assertEqual(start, 15)
+        self.assertEqual(samples.tolist(), [15, 16, 17, 18])
+
+    def test_read_returns_copy(self):
+        self.ring.write(np.arange(5, dtype=np.int16))
+        samples, _ = self.ring.read(0, 5)
+        self.ring.write(np.full(10, 7, dtype=np.int16))
+        self.assertEqual(samples.tolist(), [0, 1, 2, 3, 4])
+
+
+class TestCaptureHubSubscribe(unittest.TestCase):
+    def setUp(self):
+        self.hub = CaptureHub(device_rate=48000, buffer_seconds=2)
+        t = np.arange(48000) / 48000
+        self.hub.ring.write((10000 * np.sin(2 * np.pi * 440 * t)).astype(np.int16))
+        self.hub._last_write_time = time.monotonic()
+
+    def test_native_chunks_are_views(self):
+        chunk = next(self.hub.subscribe(chunk_size=480, since=self.hub._last_write_time - 0.5))
+        self.assertTrue(np.shares_memory(chunk, self.hub.ring._data))
+        self.assertFalse(chunk.flags.writeable)
+
+    def test_resampled(self):
+        chunk = next(self.hub.subscribe(8000, 800, since=self.hub._last_write_time - 0.5))
+        self.assertEqual(chunk.dtype, np.int16)
+        self.assertEqual(chunk.size, 800)
+        t = (np.arange(800) + 4000) / 8000
+        np.testing.assert_allclose(chunk, 10000 * np.sin(2 * np.pi * 440 * t), atol=300)
+
+    def test_float_format(self):
+        chunk = next(self.hub.subscribe(16000, 160, dtype=np.float32, since=self.hub._last_write_time - 0.5))
+        self.assertEqual(chunk.dtype, np.float32)
+        self.assertLessEqual(np.abs(chunk).max(), 10000 / 32768 + 0.01)
+
+    def test_slow_subscriber_overrun(self):
+        frames = self.hub.subscribe(chunk_size=480, since=self.hub._last_write_time - 0.5)
+        next(frames)
+        self.hub.ring.write(np.zeros(96000, dtype=np.int16))
+        next(frames)
+        self.assertEqual(frames.overruns, 1)
+        self.assertEqual(self.hub.overruns, 1)
+        frames.close()
+
+
+class TestCaptureHubFailure(unittest.TestCase):
+    def test_subscriber_raises_if_device_fails(self):
+        hub = CaptureHub(buffer_seconds=1)
+        with mock.patch('core.capture.pyaudio.PyAudio') as audio:
+            audio.return_value.open.side_effect = OSError("Invalid input device")
+            hub.start()
+            frames = hub.subscribe(16000, 160)
+            started = time.monotonic()
+            with self.assertRaises(RuntimeError):
+                next(frames)
+        self.assertLess(time.monotonic() - started, 1)
+        self.assertIsInstance(hub.error, OSError)
+        hub.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
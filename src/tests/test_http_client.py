@@ -0,0 +1,52 @@
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from network.http_client import HttpClient
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    ports = set()
+
+    def do_GET(self):
+        Handler.ports.add(self.client_address[1])
+        body = b'{"ok": true}'
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestHttpClient(unittest.TestCase):
+    def setUp(self):
+        Handler.ports = set()
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = 'http://127.0.0.1:{}/'.format(self.server.server_port)
+        self.client = HttpClient()
+
+    def tearDown(self):
+        self.client.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_connection_is_reused(self):
+        for _ in range(3):
+            self.assertEqual(self.client.get(self.url).json(), {'ok': True})
+        self.assertEqual(len(Handler.ports), 1)
+
+    def test_stats(self):
+        self.client.get(self.url)
+        stats = self.client.stats()['127.0.0.1:{}'.format(self.server.server_port)]
+        self.assertEqual(stats['count'], 1)
+        self.assertEqual(stats['errors'], 0)
+        self.assertGreater(stats['mean'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
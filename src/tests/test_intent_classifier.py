@@ -0,0 +1,33 @@
+import unittest
+
+from dialogs.intent_classifier import IntentClassifier
+
+
+class TestIntentClassifier(unittest.TestCase):
+    def setUp(self):
+        self.classifier = IntentClassifier([
+            ('лекарств принят необходимо', 'check_medicines'),
+            ('принят лекарств', 'commit_medicine'),
+            ('подтверд лекарств', 'commit_medicine'),
+            ('погод', 'weather'),
+            ('сообщение', 'send_message'),
+            ('как дела', 'how_are_you'),
+            ('как ты', 'how_are_you'),
+            ('который час', 'time'),
+        ])
+
+    def test_recognition_error(self):
+        phrase, value, score = self.classifier.classify('подтверди лекарсво')
+        self.assertEqual(value, 'commit_medicine')
+        self.assertGreater(score, 0.8)
+
+    def test_more_specific_phrase_wins(self):
+        self.assertEqual(self.classifier.classify('какие лекарсва необходимо принять')[1], 'check_medicines')
+
+    def test_unrelated_text(self):
+        self.assertIsNone(self.classifier.classify('включи музыку'))
+        self.assertIsNone(self.classifier.classify(''))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,35 @@
+import unittest
+
+from dialogs.keyword_index import KeywordIndex
+
+
+class TestKeywordIndex(unittest.TestCase):
+    def setUp(self):
+        self.index = KeywordIndex([
+            ('непрочитан', 'new_messages'),
+            ('нов', 'new_messages'),
+            ('отправ сообщение', 'send_message'),
+            ('сообщение', 'send_message'),
+            ('лекарств принят необходимо', 'check_medicines'),
+            ('принят лекарств', 'commit_medicine'),
+            ('как дела', 'how_are_you'),
+        ])
+
+    def test_search_overlapping(self):
+        self.assertEqual(sorted(self.index.search('непрочитанные новые')), [('непрочитан', 0), ('нов', 14)])
+
+    def test_no_match(self):
+        self.assertIsNone(self.index.match('который час'))
+
+    def test_multi_stem_wins(self):
+        self.assertEqual(self.index.match('отправь новое сообщение'), ('отправ сообщение', 'send_message'))
+        self.assertEqual(
+            self.index.match('какие лекарства необходимо принять'), ('лекарств принят необходимо', 'check_medicines'))
+
+    def test_word_start_wins(self):
+        self.assertEqual(self.index.match('снова прочитай сообщение'), ('сообщение', 'send_message'))
+        self.assertEqual(self.index.match('есть новые сообщения'), ('нов', 'new_messages'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+import asyncio
+import threading
+import unittest
+from unittest import IsolatedAsyncioTestCase, mock
+
+import grpc
+
+from core.speech import ListenRecognizeSpeech
+
+
+class CancelledError(grpc.RpcError):
+    def code(self):
+        return grpc.StatusCode.CANCELLED
+
+
+class BlockingCall:
+    """Streaming call that answers only when it is cancelled, like server still waiting for audio"""
+
+    def __init__(self):
+        self.started = threading.Event()
+        self.cancelled = threading.Event()
+        self.finished = threading.Event()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        self.started.set()
+        try:
+            self.cancelled.wait()
+            raise CancelledError()
+        finally:
+            self.finished.set()
+
+    def cancel(self):
+        self.cancelled.set()
+
+
+class TestListenAsync(IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.listen = ListenRecognizeSpeech.__new__(ListenRecognizeSpeech)
+        self.listen.pixels = mock.Mock()
+        self.listen.timeout = 15
+        self.call = BlockingCall()
+        self.listen._streaming_call = lambda *args: self.call
+
+    async def test_cancel_stops_worker_thread(self):
+        task = asyncio.get_running_loop().create_task(self.listen.listen_async())
+        await asyncio.get_running_loop().run_in_executor(None, self.call.started.wait, 5)
+        task.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await task
+        self.assertTrue(self.call.finished.wait(1))
+
+    async def test_timeout_stops_worker_thread(self):
+        self.listen.timeout = 0.05
+        self.assertIsNone(await self.listen.listen_async())
+        self.assertTrue(self.call.finished.wait(1))
+
+
+if __name__ == '__main__':
+    unittest.main()
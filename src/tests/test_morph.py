@@ -0,0 +1,23 @@
+import unittest
+
+from core import morph
+
+
+class TestMorph(unittest.TestCase):
+    def test_analyzer_is_shared(self):
+        self.assertIs(morph.get_analyzer(), morph.get_analyzer())
+
+    def test_agree_with_number(self):
+        self.assertEqual(morph.agree_with_number('градус', 1), 'градус')
+        self.assertEqual(morph.agree_with_number('градус', 3), 'градуса')
+        self.assertEqual(morph.agree_with_number('градус', 25), 'градусов')
+
+    def test_inflect_is_memoized(self):
+        morph.inflect.cache_clear()
+        self.assertEqual(morph.inflect('Москва', 'loct'), 'москве')
+        morph.inflect('Москва', 'loct')
+        self.assertEqual(morph.cache_info()['inflect'].hits, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,158 @@
+import os
+import tempfile
+import time
+import unittest
+
+import requests
+
+from network.outbox import Outbox
+
+URL = 'https://example.com/speaker/api/v1/measurement/push/'
+MESSAGE_URL = 'https://example.com/speaker/api/v1/message/send/'
+
+
+class RecordingClient:
+    def __init__(self):
+        self.requests = []
+        self.status_codes = []
+
+    def request(self, method, url, **kwargs):
+        status_code = self.status_codes.pop(0) if self.status_codes else 200
+        if status_code is None:
+            raise requests.ConnectionError("Network is unreachable")
+        self.requests.append((method, url, kwargs['json'], kwargs['headers']['Idempotency-Key']))
+        response = requests.Response()
+        response.status_code = status_code
+        response._content = b''
+        return response
+
+
+def push(value, token='t'):
+    return {'token': token, 'values': [{'category_name': 'pulse', 'value': value}]}
+
+
+class TestOutbox(unittest.TestCase):
+    def setUp(self):
+        self.dirname = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.dirname.name, 'outbox.sqlite3')
+        self.client = RecordingClient()
+        self.outbox = Outbox(self.client, self.filename)
+        self.outbox.start = lambda: None
+
+    def tearDown(self):
+        self.outbox.close()
+        self.dirname.cleanup()
+
+    def test_consecutive_submissions_are_batched(self):
+        self.outbox.submit('post', URL, push(60), batch_field='values')
+        self.outbox.submit('post', URL, push(61), batch_field='values')
+        self.outbox.submit('post', URL, push(62, token='other'), batch_field='values')
+
+        self.assertFalse(self.outbox.flush())
+        self.assertEqual([r[2]['values'] for r in self.client.requests], [
+            [{'category_name': 'pulse', 'value': 60}, {'category_name': 'pulse', 'value': 61}],
+            [{'category_name': 'pulse', 'value': 62}],
+        ])
+        self.assertEqual(len(self.outbox), 0)
+
+    def test_values_are_joined_over_status_updates(self):
+        self.outbox.submit('post', URL, push(60), batch_field='values')
+        self.outbox.submit('patch', URL, {'token': 't', 'request_type': 'is_done'})
+        self.outbox.submit('post', URL, push(61), batch_field='values')
+
+        self.outbox.flush()
+        self.assertEqual([(r[0], len(r[2].get('values', []))) for r in self.client.requests], [
+            ('post', 2), ('patch', 0)
+        ])
+
+    def test_hold_delays_only_held_submissions(self):
+        key = self.outbox.submit('post', URL, push(60), batch_field='values', hold=60)
+        self.outbox.submit('post', MESSAGE_URL, {'token': 't', 'message': 'hi'})
+        self.assertFalse(self.outbox.flush())
+        self.assertEqual([r[1] for r in self.client.requests], [MESSAGE_URL])
+
+        self.outbox.release([key])
+        self.assertFalse(self.outbox.flush())
+        self.assertEqual([r[1] for r in self.client.requests], [MESSAGE_URL, URL])
+
+    def test_failed_submission_is_kept_with_same_key(self):
+        key = self.outbox.submit('post', URL, push(60))
+        self.client.status_codes = [None, 503]
+
+        self.assertTrue(self.outbox.flush())
+        self.assertEqual(self.outbox.failures, 1)
+        self.outbox.close()
+
+        self.outbox = Outbox(self.client, self.filename)
+        self.outbox.start = lambda: None
+        self.assertTrue(self.outbox.flush())
+        self.assertFalse(self.outbox.flush())
+        self.assertEqual([r[3] for r in self.client.requests], [key, key])
+        self.assertEqual(self.outbox.sent, 1)
+
+    def test_retried_batch_keeps_key_and_rows(self):
+        self.outbox.submit('post', URL, push(60), batch_field='values')
+        self.outbox.submit('post', URL, push(61), batch_field='values')
+        self.client.status_codes = [503]
+        self.assertTrue(self.outbox.flush())
+
+        self.outbox.submit('post', URL, push(62), batch_field='values')
+        self.assertFalse(self.outbox.flush())
+        first, retry, new = self.client.requests
+        self.assertEqual(retry[3], first[3])
+        self.assertEqual(retry[2], first[2])
+        self.assertEqual(new[2]['values'], [{'category_name': 'pulse', 'value': 62}])
+        self.assertNotEqual(new[3], first[3])
+
+    def test_rejected_submission_is_dropped(self):
+        self.outbox.submit('patch', URL, push(60))
+        self.client.status_codes = [400]
+
+        self.assertFalse(self.outbox.flush())
+        self.assertEqual(self.outbox.dropped, 1)
+        self.assertEqual(len(self.outbox), 0)
+
+    def test_auth_error_is_retried(self):
+        self.outbox.submit('post', URL, push(60))
+        self.client.status_codes = [401, 403]
+
+        self.assertTrue(self.outbox.flush())
+        self.assertTrue(self.outbox.flush())
+        self.assertFalse(self.outbox.flush())
+        self.assertEqual(self.outbox.dropped, 0)
+        self.assertEqual(self.outbox.sent, 1)
+
+    def test_flusher_survives_unexpected_error(self):
+        request = self.client.request
+        attempts = []
+
+        def failing_request(method, url, **kwargs):
+            attempts.append(url)
+            if len(attempts) == 1:
+                raise ValueError("Broken response")
+            return request(method, url, **kwargs)
+
+        self.client.request = failing_request
+        outbox = Outbox(self.client, os.path.join(self.dirname.name, 'thread.sqlite3'), min_backoff=0.01)
+        outbox.submit('post', URL, push(60))
+        try:
+            for _ in range(500):
+                if outbox.sent:
+                    break
+                time.sleep(0.01)
+            self.assertEqual(outbox.sent, 1)
+            self.assertEqual(len(attempts), 2)
+            self.assertTrue(outbox._thread.is_alive())
+        finally:
+            outbox.close()
+
+    def test_backoff_grows(self):
+        self.outbox._failed("test")
+        first = self.outbox._next_attempt
+        self.outbox._failed("test")
+        self.outbox._failed("test")
+        self.assertGreater(self.outbox._next_attempt - first, self.outbox.min_backoff)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,162 @@
+import os
+import tempfile
+import unittest
+
+from core.phrase_store import PhraseStore
+
+
+class TestPhraseStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.dirname = os.path.join(self.tmp_dir.name, 'speech_cash')
+        self.store = PhraseStore(self.dirname, segment_size=16)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_append_and_get(self):
+        self.store.append('привет', b'\x01\x02' * 4)
+        self.assertIn('привет', self.store)
+        self.assertEqual(bytes(self.store.get('привет')), b'\x01\x02' * 4)
+        self.assertIsNone(self.store.get('пока'))
+
+    def test_append_existing_does_not_write(self):
+        self.store.append('привет', b'\x01\x02')
+        self.store.append('привет', b'\x03\x04')
+        self.assertEqual(bytes(self.store.get('привет')), b'\x01\x02')
+
+    def test_segments_rotate(self):
+        for i in range(5):
+            self.store.append(str(i), bytes([i]) * 10)
+        self.assertGreater(len(self.store._segments()), 1)
+        for i in range(5):
+            self.assertEqual(bytes(self.store.get(str(i))), bytes([i]) * 10)
+
+    def test_reload_reads_index_only(self):
+        self.store.append('привет', b'\x01\x02')
+        store = PhraseStore(self.dirname)
+        self.assertEqual(store.keys(), ['привет'])
+        self.assertEqual(store._maps, {})
+        self.assertEqual(bytes(store.get('привет')), b'\x01\x02')
+
+    def test_concurrent_writer_visible(self):
+        other = PhraseStore(self.dirname)
+        other.append('от другого процесса', b'\x05\x06')
+        self.assertEqual(bytes(self.store.get('от другого процесса')), b'\x05\x06')
+
+    def test_partial_index_line_skipped(self):
+        self.store.append('первая', b'\x01\x02')
+        with open(self.store.index_filename, 'ab') as f:
+            f.write(b'{"text": "obor')
+        store = PhraseStore(self.dirname)
+        self.assertEqual(store.keys(), ['первая'])
+        store.append('вторая', b'\x03\x04')
+        self.assertEqual(PhraseStore(self.dirname).keys(), ['первая', 'вторая'])
+
+    def test_clear(self):
+        self.store.append('привет', b'\x01\x02')
+        view = self.store.get('привет')
+        self.store.clear()
+        self.assertEqual(len(self.store), 0)
+        self.assertEqual(bytes(view), b'\x01\x02')
+
+    def test_clear_keeps_segment_numbers_increasing(self):
+        self.store.append('привет', b'\x01\x02')
+        other = PhraseStore(self.dirname)
+        self.assertEqual(bytes(other.get('привет')), b'\x01\x02')
+        segment = other._entries['привет'][0]
+        self.store.clear()
+        self.store.append('пока', b'\x03\x04' * 4)
+        self.assertGreater(self.store._entries['пока'][0], segment)
+        other._maps = {}
+        self.assertIsNone(other._get('привет'))
+
+
+class TestPhraseStoreEviction(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.dirname = os.path.join(self.tmp_dir.name, 'speech_cash')
+        self.store = PhraseStore(self.dirname, segment_size=16, max_bytes=30)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_lru_eviction(self):
+        self.store.append('первая', b'\x01' * 10)
+        self.store.append('вторая', b'\x02' * 10)
+        self.store.append('третья', b'\x03' * 10)
+        self.store.get('первая')
+        self.store.append('четвертая', b'\x04' * 10)
+        self.assertIn('первая', self.store)
+        self.assertNotIn('вторая', self.store)
+        self.assertLessEqual(self.store.total_bytes, 30)
+
+    def test_lfu_eviction(self):
+        store = PhraseStore(os.path.join(self.tmp_dir.name, 'lfu'), max_bytes=30, policy='lfu')
+        store.append('первая', b'\x01' * 10)
+        store.append('вторая', b'\x02' * 10)
+        store.append('третья', b'\x03' * 10)
+        store.get('вторая')
+        store.get('вторая')
+        store.get('третья')
+        store.append('четвертая', b'\x04' * 10)
+        self.assertNotIn('первая', store)
+        self.assertIn('вторая', store)
+
+    def test_lfu_keeps_appended_phrase(self):
+        store = PhraseStore(os.path.join(self.tmp_dir.name, 'lfu'), max_bytes=30, policy='lfu')
+        for text in ('первая', 'вторая', 'третья'):
+            store.append(text, b'\x01' * 10)
+            store.get(text)
+        self.assertEqual(bytes(store.append('новая', b'\x02' * 10)), b'\x02' * 10)
+        self.assertIn('новая', store)
+        self.assertLessEqual(store.total_bytes, 30)
+
+    def test_phrase_larger_than_budget_is_returned(self):
+        self.store.append('первая', b'\x01' * 10)
+        self.assertEqual(bytes(self.store.append('большая', b'\x02' * 40)), b'\x02' * 40)
+        self.assertNotIn('первая', self.store)
+
+    def test_pinned_never_evicted(self):
+        self.store.append('базовая', b'\x01' * 20, pinned=True)
+        self.store.append('вторая', b'\x02' * 10)
+        self.store.append('третья', b'\x03' * 10)
+        self.assertIn('базовая', self.store)
+        self.assertNotIn('вторая', self.store)
+
+    def test_pin_existing(self):
+        self.store.append('фраза', b'\x01' * 10)
+        self.assertEqual(bytes(self.store.pin('фраза')), b'\x01' * 10)
+        self.assertTrue(PhraseStore(self.dirname).stats()['phrases']['фраза']['pinned'])
+        self.assertIsNone(self.store.pin('нет такой'))
+
+    def test_stats_saves_are_debounced(self):
+        self.store.append('фраза', b'\x01' * 10)
+        self.store.save_stats()
+        mtime = os.stat(self.store.stats_filename).st_mtime_ns
+        self.store.append('другая', b'\x02' * 10)
+        self.store.get('фраза')
+        self.assertEqual(os.stat(self.store.stats_filename).st_mtime_ns, mtime)
+
+    def test_compaction_keeps_data(self):
+        for i in range(20):
+            self.store.append(str(i), bytes([i]) * 10)
+        size = sum(os.path.getsize(self.store._segment_filename(i)) for i in self.store._segments())
+        self.assertLessEqual(size, 60)
+        self.assertEqual(bytes(self.store.get('19')), bytes([19]) * 10)
+        self.assertEqual(bytes(PhraseStore(self.dirname).get('18')), bytes([18]) * 10)
+
+    def test_stats(self):
+        self.store.append('фраза', b'\x01' * 10)
+        self.store.get('фраза')
+        self.store.get('нет такой')
+        stats = self.store.stats()
+        self.assertEqual(stats['hits'], 1)
+        self.assertEqual(stats['misses'], 1)
+        self.assertEqual(stats['phrases']['фраза']['bytes'], 10)
+        self.store.save_stats()
+        self.assertEqual(PhraseStore(self.dirname).stats()['phrases']['фраза']['hits'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+import json
+import unittest
+
+import requests
+
+from network.response_cache import ResponseCache
+
+URL = 'https://example.com/speaker/api/v1/medicine/'
+
+
+class CountingClient:
+    def __init__(self):
+        self.requests = []
+        self.data = [{'title': 'aspirin'}]
+
+    def get(self, url, **kwargs):
+        self.requests.append(kwargs.get('headers'))
+        response = requests.Response()
+        response.headers['ETag'] = '"1"'
+        if (kwargs.get('headers') or {}).get('If-None-Match') == '"1"':
+            response.status_code = 304
+        else:
+            response.status_code = 200
+            response._content = json.dumps(self.data).encode()
+        return response
+
+
+class TestResponseCache(unittest.TestCase):
+    def setUp(self):
+        self.client = CountingClient()
+        self.cache = ResponseCache(self.client, {'medicine/': 60})
+
+    def test_hit_returns_fresh_copy(self):
+        self.cache.get(URL, json={'token': 't'}).json().pop()
+        self.assertEqual(self.cache.get(URL, json={'token': 't'}).json(), [{'title': 'aspirin'}])
+        self.assertEqual(len(self.client.requests), 1)
+
+    def test_invalidated_entry_is_revalidated(self):
+        self.cache.get(URL, json={'token': 't'})
+        self.cache.invalidate('medicine/')
+        self.assertEqual(self.cache.get(URL, json={'token': 't'}).json(), [{'title': 'aspirin'}])
+        self.assertEqual(self.client.requests[-1], {'If-None-Match': '"1"'})
+        self.assertEqual(self.cache.revalidated, 1)
+
+    def test_write_invalidates_parent_endpoint(self):
+        self.cache.get(URL)
+        self.cache.invalidate_url(URL + 'commit/')
+        self.cache.get(URL)
+        self.assertEqual(len(self.client.requests), 2)
+
+    def test_not_cached_endpoint(self):
+        self.cache.get('https://example.com/speaker/api/v1/message/')
+        self.cache.get('https://example.com/speaker/api/v1/message/')
+        self.assertEqual(len(self.client.requests), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
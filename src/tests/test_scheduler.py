@@ -0,0 +1,52 @@
+import threading
+import time
+import unittest
+
+from dialogs.scheduler import PRIORITY_MEASUREMENT, PRIORITY_MEDICINE, PRIORITY_MESSAGE, DialogScheduler
+
+
+class TestDialogScheduler(unittest.TestCase):
+    def setUp(self):
+        self.scheduler = DialogScheduler()
+
+    def test_priority_order(self):
+        self.scheduler.push('message', priority=PRIORITY_MESSAGE)
+        self.scheduler.push('medicine', priority=PRIORITY_MEDICINE)
+        self.scheduler.push('measurement', priority=PRIORITY_MEASUREMENT)
+        self.assertEqual([self.scheduler.pop()[0] for _ in range(3)], ['medicine', 'measurement', 'message'])
+
+    def test_deadline_then_fifo_order(self):
+        now = time.time()
+        self.scheduler.push('first', deadline=now + 60)
+        self.scheduler.push('urgent', deadline=now + 10)
+        self.scheduler.push('second', deadline=now + 60)
+        self.assertEqual([self.scheduler.pop()[0] for _ in range(3)], ['urgent', 'first', 'second'])
+
+    def test_stats(self):
+        self.scheduler.push('late', 'text', deadline=time.time() - 1)
+        self.scheduler.push('pending')
+        self.assertEqual(self.scheduler.pop(), ('late', 'text'))
+        stats = self.scheduler.stats()
+        self.assertEqual(stats['depth'], 1)
+        self.assertEqual(stats['started'], 1)
+        self.assertEqual(stats['missed_deadlines'], 1)
+
+    def test_concurrent_push_and_pop(self):
+        popped = []
+
+        def pop():
+            while len(popped) < 2000:
+                if self.scheduler:
+                    popped.append(self.scheduler.pop()[0])
+
+        thread = threading.Thread(target=pop)
+        thread.start()
+        for i in range(2000):
+            self.scheduler.push(i, priority=i % 3)
+        thread.join(10)
+        self.assertEqual(sorted(popped), list(range(2000)))
+        self.assertEqual(self.scheduler.stats()['started'], 2000)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,23 @@
+import unittest
+
+from core.speech import PlaySpeech
+
+
+class TestTemplatePieces(unittest.TestCase):
+    def setUp(self):
+        self.play_speech = PlaySpeech.__new__(PlaySpeech)
+
+    def test_literal_punctuation_is_pause(self):
+        self.assertEqual(self.play_speech._template_pieces("Температура {}. Ветер {}", (5, 3), {}), [
+            ('Температура', True), ('5', False), 0.3, ('Ветер', True), ('3', False)
+        ])
+
+    def test_negative_value_keeps_sign(self):
+        self.assertEqual(self.play_speech._template_pieces("Температура {} градусов", (-5,), {}), [
+            ('Температура', True), ('-5', False), ('градусов', True)
+        ])
+        self.assertIn(('+3', False), self.play_speech._template_pieces("Изменение {:+d}", (3,), {}))
+
+
+if __name__ == '__main__':
+    unittest.main()
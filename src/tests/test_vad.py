@@ -0,0 +1,76 @@
+import unittest
+
+import numpy as np
+
+from core.vad import ListenProfile, VoiceActivityDetector, vad_audio_chunks
+
+SAMPLE_RATE = 8000
+
+
+def tone(seconds, amplitude=5000, frequency=220):
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    return (amplitude * np.sin(2 * np.pi * frequency * t)).astype(np.int16).tobytes()
+
+
+def noise(seconds, amplitude=50):
+    rng = np.random.default_rng(0)
+    return rng.integers(-amplitude, amplitude, int(seconds * SAMPLE_RATE), dtype=np.int16).tobytes()
+
+
+def chunks(audio_data, seconds=0.1):
+    size = int(seconds * SAMPLE_RATE) * 2
+    for i in range(0, len(audio_data), size):
+        yield audio_data[i:i + size]
+
+
+def captured_seconds(audio_data, profile):
+    return sum(len(i) for i in vad_audio_chunks(chunks(audio_data), SAMPLE_RATE, profile)) / 2 / SAMPLE_RATE
+
+
+class TestVoiceActivityDetector(unittest.TestCase):
+    def test_frames(self):
+        detector = VoiceActivityDetector(SAMPLE_RATE)
+        self.assertFalse(detector.frames(noise(0.2)).any())
+        self.assertTrue(detector.frames(tone(0.2)).all())
+
+    def test_partial_frames_are_kept(self):
+        detector = VoiceActivityDetector(SAMPLE_RATE)
+        data = tone(0.05)
+        self.assertEqual(detector.frames(data[:100]).size, 0)
+        self.assertEqual(detector.frames(data[100:]).size, 2)
+
+    def test_high_zero_crossing_rate_is_not_speech(self):
+        detector = VoiceActivityDetector(SAMPLE_RATE)
+        self.assertFalse(detector.frames(tone(0.2, amplitude=500, frequency=3900)).any())
+
+
+class TestVadAudioChunks(unittest.TestCase):
+    def test_trailing_silence_ends_capture(self):
+        profile = ListenProfile(leading_silence=5, trailing_silence=0.3, max_duration=15)
+        seconds = captured_seconds(noise(0.5) + tone(0.5) + noise(5), profile)
+        self.assertLess(seconds, 1.5)
+        self.assertGreaterEqual(seconds, 1.3)
+
+    def test_leading_silence_aborts_capture(self):
+        profile = ListenProfile(leading_silence=1, trailing_silence=0.3, max_duration=15)
+        self.assertAlmostEqual(captured_seconds(noise(5), profile), 1.0)
+
+    def test_max_duration(self):
+        profile = ListenProfile(leading_silence=1, trailing_silence=0.3, max_duration=2)
+        self.assertAlmostEqual(captured_seconds(tone(5), profile), 2.0)
+
+    def test_source_is_closed(self):
+        closed = []
+
+        def source():
+            try:
+                yield from chunks(noise(5))
+            finally:
+                closed.append(True)
+
+        list(vad_audio_chunks(source(), SAMPLE_RATE, ListenProfile(leading_silence=0.5)))
+        self.assertEqual(closed, [True])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,115 @@
+import asyncio
+import json
+import os
+import tempfile
+from unittest import IsolatedAsyncioTestCase, TestCase
+
+from events.connection import EventCursor, WebSocketConnection
+from tests.local_ws_server import LocalEventServer
+
+
+async def wait_for(condition, timeout=5):
+    for _ in range(int(timeout / 0.01)):
+        if condition():
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError("Condition was not met in {} seconds".format(timeout))
+
+
+class TestWebSocketConnection(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.server = LocalEventServer()
+        await self.server.start()
+        self.dirname = tempfile.TemporaryDirectory()
+        self.cursor = EventCursor(os.path.join(self.dirname.name, 'ws_cursor.json'))
+        self.connection = WebSocketConnection(self.server.url, min_delay=0.01, max_delay=0.05, cursor=self.cursor)
+        self.messages = list()
+
+        async def on_message(channel, message):
+            self.messages.append((channel, message))
+
+        self.medicines = self.connection.add_channel(
+            'medicines/', {'token': 't', 'request_type': 'init'}, lambda m: on_message('medicines/', m))
+        self.messages_channel = self.connection.add_channel(
+            'incomingmessage/', {'token': 't'}, lambda m: on_message('incomingmessage/', m))
+        self.task = asyncio.get_running_loop().create_task(self.connection.run())
+
+    async def asyncTearDown(self):
+        await self.connection.close()
+        await self.task
+        await self.server.close()
+        self.dirname.cleanup()
+
+    async def test_channels_share_one_connection(self):
+        await wait_for(lambda: len(self.server.subscriptions) == 2)
+        self.assertEqual(self.server.connections, 1)
+        self.assertEqual(self.server.subscriptions, [
+            ('medicines/', {'token': 't', 'request_type': 'init'}),
+            ('incomingmessage/', {'token': 't'}),
+        ])
+
+    async def test_messages_are_routed_by_channel(self):
+        await wait_for(lambda: len(self.server.subscriptions) == 2)
+        await self.server.publish('incomingmessage/', {'id': 1, 'text': 'hi'})
+        await self.server.publish('medicines/', {'id': 2})
+        await wait_for(lambda: len(self.messages) == 2)
+        self.assertEqual(self.messages, [('incomingmessage/', {'id': 1, 'text': 'hi'}), ('medicines/', {'id': 2})])
+
+    async def test_queued_sends_survive_reconnect(self):
+        await wait_for(lambda: len(self.server.subscriptions) == 2)
+        await self.server.drop_clients()
+        await self.medicines.send(json.dumps({'medicine_id': 2, 'is_done': True}))
+        await self.messages_channel.send(json.dumps({'message_id': 1, 'red_message': True}))
+        await wait_for(lambda: len(self.server.received) == 2)
+        self.assertEqual(self.server.connections, 2)
+        self.assertEqual([channel for channel, _ in self.server.received], ['medicines/', 'incomingmessage/'])
+
+    async def test_reconnect_resumes_from_last_event(self):
+        await wait_for(lambda: len(self.server.subscriptions) == 2)
+        await self.server.publish('medicines/', {'id': 2}, event_id=41)
+        await self.server.publish('medicines/', {'id': 3}, event_id=42)
+        await wait_for(lambda: len(self.messages) == 2)
+        await self.server.drop_clients()
+
+        await wait_for(lambda: len(self.server.subscriptions) == 4)
+        self.assertEqual(self.server.subscriptions[2], (
+            'medicines/', {'token': 't', 'request_type': 'init', 'last_event_id': 42}))
+        self.assertEqual(self.server.subscriptions[3], ('incomingmessage/', {'token': 't'}))
+
+        await self.server.publish('medicines/', {'id': 3}, event_id=42)
+        await self.server.publish('medicines/', {'id': 4}, event_id=43)
+        await wait_for(lambda: len(self.messages) == 3)
+        self.assertEqual(self.messages[-1], ('medicines/', {'id': 4}))
+        await self.connection.close()
+        self.assertEqual(EventCursor(self.cursor.filename).get('medicines/'), 43)
+
+
+class TestReconnectDelay(TestCase):
+    def test_delay_grows_with_failures_and_is_capped(self):
+        connection = WebSocketConnection('ws://localhost/', min_delay=1, max_delay=60)
+        self.assertEqual(connection.reconnect_delay(), 1)
+        connection.failures = 3
+        self.assertTrue(all(1 <= connection.reconnect_delay() <= 8 for _ in range(100)))
+        connection.failures = 20
+        delays = [connection.reconnect_delay() for _ in range(100)]
+        self.assertTrue(all(1 <= d <= 60 for d in delays))
+        self.assertGreater(max(delays) - min(delays), 1)
+
+
+class TestEventCursor(TestCase):
+    def setUp(self):
+        self.dirname = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.dirname.name, 'ws_cursor.json')
+
+    def tearDown(self):
+        self.dirname.cleanup()
+
+    def test_saves_are_throttled(self):
+        cursor = EventCursor(self.filename, save_interval=60)
+        self.assertTrue(cursor.seen('medicines/', 1))
+        self.assertTrue(cursor.seen('medicines/', 2))
+        self.assertFalse(cursor.seen('medicines/', 1))
+        self.assertEqual(EventCursor(self.filename).get('medicines/'), 1)
+        cursor.save()
+        self.assertEqual(EventCursor(self.filename).get('medicines/'), 2)
+        self.assertFalse(os.path.exists(self.filename + '.tmp'))
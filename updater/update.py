@@ -28,6 +28,9 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 SETTINGS_FILENAME = os.path.join(BASE_DIR, 'src/settings.ini')
 CONFIG_FILENAME = os.path.join(Path.home(), '.speaker/config.json')
 
+session = requests.Session()
+"""Keeps connection to server alive between requests"""
+
 
 def install_pip_req(requirements_file):
     logging.info("Installing pip requirements...")
@@ -80,7 +83,7 @@ def check_if_new_version_available():
     version = settings['GLOBAL']['VERSION']
     host = settings['SERVER']['HOST']
 
-    answer = requests.get('https://' + host + '/speaker/api/v1/speaker/', json={'token': token})
+    answer = session.get('https://' + host + '/speaker/api/v1/speaker/', json={'token': token})
     answer.raise_for_status()
     server_version = answer.json().get('version')
     if server_version != version:
@@ -88,7 +91,7 @@ def check_if_new_version_available():
             "Version on server ({}) and settings.ini ({}) don't match.".format(server_version, version))
     logging.info("Current version detected `{}`.".format(version))
 
-    answer = requests.post('https://' + host + '/speaker/api/v1/firmware/', json={'token': token})
+    answer = session.post('https://' + host + '/speaker/api/v1/firmware/', json={'token': token})
     answer.raise_for_status()
     return answer.json().get('new_firmware')
 
@@ -98,11 +101,11 @@ def update_firmware(version: str):
     token = get_token()
     host = get_settings()['SERVER']['HOST']
 
-    answer = requests.get('https://' + host + '/speaker/api/v1/firmware/', json={'token': token, 'version': version})
+    answer = session.get('https://' + host + '/speaker/api/v1/firmware/', json={'token': token, 'version': version})
     answer.raise_for_status()
 
     url = 'https://' + host + answer.json().get('data')
-    with requests.get(url, stream=True) as answer:
+    with session.get(url, stream=True) as answer:
         answer.raise_for_status()
 
         filename = url.split('/')[-1]
@@ -142,10 +145,13 @@ def main(dev=False):
     if not dev:
         install_pip_req(os.path.join(BASE_DIR, 'src', 'requirements.txt'))
 
-    cash_path = os.path.join(Path.home(), '.speaker/speech.cash')
-    if Path(cash_path).resolve().is_file():
+    cash_path = os.path.join(Path.home(), '.speaker/speech_cash')
+    if Path(cash_path).resolve().is_dir():
         logging.info("Removing cash...")
-        os.remove(cash_path)
+        shutil.rmtree(cash_path, ignore_errors=True)
+    legacy_cash_path = os.path.join(Path.home(), '.speaker/speech.cash')
+    if Path(legacy_cash_path).resolve().is_file():
+        os.remove(legacy_cash_path)
 
     logging.info("Storing init cash...")
     command = [os.path.join(BASE_DIR, 'env', 'bin', 'python'), os.path.join(BASE_DIR, 'src', 'speaker.py'),